@@ -0,0 +1,89 @@
+from level_table import LEVELS
+
+# Score needed to finish each level
+LEVEL_THRESHOLDS = {
+    spec.number: spec.threshold for spec in LEVELS.levels if spec.threshold is not None
+}
+
+# Hit points restored when arriving at a level
+HEALTH_BONUSES = {
+    spec.number: spec.health_bonus
+    for spec in LEVELS.levels
+    if spec.health_bonus is not None
+}
+DEFAULT_HEALTH_BONUS = LEVELS.levels[-1].health_bonus  # Levels past the table
+
+# Damage dealt to the player on contact
+CONTACT_DAMAGE = {
+    "enemies": 15,
+    "flying_enemies": 20,  # Flying enemies do more damage
+    "boss_enemies": 25,  # Boss enemies do most damage
+    "bombs": 25,
+    "jumping_bosses": 30,  # Jumping bosses do most damage
+    "homing_missiles": 10,
+}
+
+# Milliseconds between spawns of each kind
+SPAWN_DELAYS = dict(LEVELS.spawn_delays)
+
+# Levels that spawn faster (or slower) than SPAWN_DELAYS
+LEVEL_SPAWN_DELAYS = {
+    spec.number: dict(spec.spawn_delays) for spec in LEVELS.levels if spec.spawn_delays
+}
+
+
+class Balance:
+    """The tuning numbers of one game.
+
+    Defaults come from the level table and the tables above. Every game
+    gets its own copy of them, so a balance sweep can retune one without
+    touching the others. Settings are named like
+    "spawn_delay_scale", or "table.key" for one table entry, e.g.
+    "level_thresholds.2", "contact_damage.bombs" or
+    "level_spawn_delays.6.flying_enemy_spawn_delay".
+    """
+
+    def __init__(self, overrides=None):
+        self.level_thresholds = dict(LEVEL_THRESHOLDS)
+        self.health_bonuses = dict(HEALTH_BONUSES)
+        self.default_health_bonus = DEFAULT_HEALTH_BONUS
+        self.contact_damage = dict(CONTACT_DAMAGE)
+        self.spawn_delays = dict(SPAWN_DELAYS)
+        self.level_spawn_delays = {
+            level: dict(delays) for level, delays in LEVEL_SPAWN_DELAYS.items()
+        }
+        self.spawn_delay_scale = 1  # Multiplies every spawn delay
+        for name, value in (overrides or {}).items():
+            self.set(name, value)
+
+    def set(self, name, value):
+        attribute, *keys = name.split(".")
+        keys = [int(key) if key.isdigit() else key for key in keys]
+        table = getattr(self, attribute, None)
+        if not keys:
+            if isinstance(table, (int, float)):
+                setattr(self, attribute, value)
+                return
+        else:
+            for key in keys[:-1]:
+                table = table.get(key) if isinstance(table, dict) else None
+            if isinstance(table, dict) and keys[-1] in table:
+                table[keys[-1]] = value
+                return
+        raise KeyError(f"Unknown balance setting: {name}")
+
+    def health_bonus(self, level_number):
+        return self.health_bonuses.get(level_number, self.default_health_bonus)
+
+    def spawn_rates(self, level_number):
+        """Spawn delays in effect on a level"""
+        rates = dict(self.spawn_delays)
+        # Levels past the end of the table play as its last one
+        number = LEVELS[level_number].number
+        rates.update(self.level_spawn_delays.get(number, {}))
+        if self.spawn_delay_scale != 1:
+            rates = {
+                name: round(delay * self.spawn_delay_scale)
+                for name, delay in rates.items()
+            }
+        return rates
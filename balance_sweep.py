@@ -0,0 +1,306 @@
+import argparse
+import itertools
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from balance import Balance
+from game_clock import FRAME_MS
+from scroller import Game
+from vector_env import KEY_STATES, SHOOT
+
+# Bits of a vector_env.KEY_STATES index
+LEFT, RIGHT, JUMP, CROUCH = 1, 2, 4, 8
+
+# The bot keeps its left edge in this range, which on every level is on the
+# ground or on the platform it starts above
+HOME_X = (40, 120)
+
+# How far ahead (pixels from the player's front) the bot reacts to hazards
+JUMP_DISTANCE = 100
+DUCK_DISTANCE = 80
+
+# Episodes are cut short after this much game time, like vector_env's
+MAX_SECONDS = 300
+
+# Episodes per task handed to a worker process
+CHUNK = 25
+
+
+def bot_input(game):
+    """A scripted player: holds its ground near the left edge and fires every
+    step, jumps ground enemies, ducks what flies at head height and steps out
+    from under bombs. Returns (keys, key_presses) for Game.step."""
+    player = game.player
+    front = player.x + player.width
+    middle = player.y + player.height // 2
+    center = player.x + player.width // 2
+    mask = 0
+    if player.x < HOME_X[0]:
+        mask |= RIGHT
+    elif player.x > HOME_X[1]:
+        mask |= LEFT
+
+    for layer in ("enemies", "jumping_bosses"):
+        for hazard in getattr(game, layer):
+            if 0 <= hazard.x - front < JUMP_DISTANCE:
+                mask |= JUMP
+    for layer in ("flying_enemies", "homing_missiles"):
+        for hazard in getattr(game, layer):
+            bottom = hazard.y + hazard.height
+            if 0 <= hazard.x - front < DUCK_DISTANCE and player.y < bottom < middle:
+                mask |= CROUCH
+    for bomb in game.bombs:
+        bomb_center = bomb.x + bomb.width // 2
+        if bomb.y < player.y and abs(bomb_center - center) < player.width:
+            mask = mask & ~(LEFT | RIGHT) | (LEFT if bomb_center > center else RIGHT)
+    return KEY_STATES[mask], SHOOT
+
+
+def empty_stats():
+    """Counters for a batch of episodes; batches add together with merge()"""
+    return {
+        "episodes": 0,
+        "deaths": 0,
+        "survival_s": 0,
+        "score": 0,
+        "survival_histogram": {},  # Whole seconds survived -> episodes
+        "levels_reached": {},  # Highest level -> episodes
+        "deaths_by_level": {},  # Level died on -> episodes
+        "damage": {},  # Damage source -> hit points lost to it
+    }
+
+
+def add_counts(target, counts):
+    for key, value in counts.items():
+        target[key] = target.get(key, 0) + value
+
+
+def merge(stats, other):
+    for name, value in other.items():
+        if isinstance(value, dict):
+            add_counts(stats[name], value)
+        else:
+            stats[name] += value
+
+
+def run_episode(game, seed, level, max_steps, stats):
+    """Play one bot episode on `game` and add it to `stats`"""
+    game.reset(seed, level)
+    steps = 0
+    while not game.game_over and steps < max_steps:
+        game.step(*bot_input(game))
+        steps += 1
+
+    seconds = steps * FRAME_MS / 1000
+    stats["episodes"] += 1
+    stats["survival_s"] += seconds
+    stats["score"] += game.score
+    add_counts(stats["survival_histogram"], {int(seconds): 1})
+    add_counts(stats["levels_reached"], {game.max_level_reached: 1})
+    add_counts(stats["damage"], game.damage_taken)
+    if game.game_over:
+        stats["deaths"] += 1
+        add_counts(stats["deaths_by_level"], {game.level_number: 1})
+
+
+# Each worker process plays all its episodes on one headless game
+_game = None
+
+
+def init_worker():
+    global _game
+    _game = Game(headless=True)
+
+
+def run_chunk(task):
+    """Play a batch of episodes; only their summed stats go back to the
+    parent process"""
+    config, overrides, seeds, level, max_steps = task
+    _game.balance = Balance(overrides)
+    stats = empty_stats()
+    for seed in seeds:
+        run_episode(_game, seed, level, max_steps, stats)
+    return config, stats
+
+
+def parse_value(text):
+    try:
+        return int(text)
+    except ValueError:
+        return float(text)
+
+
+def parse_grid(settings):
+    """Every combination of the --set values, as a list of overrides dicts"""
+    axes = []
+    for setting in settings:
+        name, _, values = setting.partition("=")
+        if not values:
+            raise ValueError(f"expected NAME=VALUE[,VALUE...], got {setting!r}")
+        axes.append([(name, parse_value(v)) for v in values.split(",")])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def sweep(configs, episodes, seed=0, level=1, max_seconds=MAX_SECONDS, workers=1):
+    """Play `episodes` bot episodes per balance config and return one stats
+    dict per config. Every config plays the same seeds, so differences
+    between configs are not down to luck of the draw."""
+    max_steps = round(max_seconds * 1000 / FRAME_MS)
+    tasks = [
+        (
+            config,
+            overrides,
+            range(seed + start, seed + min(start + CHUNK, episodes)),
+            level,
+            max_steps,
+        )
+        for config, overrides in enumerate(configs)
+        for start in range(0, episodes, CHUNK)
+    ]
+    results = [empty_stats() for _ in configs]
+
+    def collect(finished):
+        for done, (config, stats) in enumerate(finished, 1):
+            merge(results[config], stats)
+            print(f"\r{done}/{len(tasks)} batches", end="", file=sys.stderr)
+        print(file=sys.stderr)
+
+    if workers == 1:
+        init_worker()
+        collect(map(run_chunk, tasks))
+    else:
+        with multiprocessing.Pool(workers, initializer=init_worker) as pool:
+            collect(pool.imap_unordered(run_chunk, tasks))
+    return results
+
+
+def median_survival(stats):
+    histogram = stats["survival_histogram"]
+    seen = 0
+    for seconds in sorted(histogram):
+        seen += histogram[seconds]
+        if seen * 2 >= stats["episodes"]:
+            return seconds
+    return 0
+
+
+def settings(table, prefix=""):
+    """(name, value) of every setting in a Balance's tables"""
+    for key, value in table.items():
+        if isinstance(value, dict):
+            yield from settings(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def describe(overrides):
+    return " ".join(f"{name}={value}" for name, value in overrides.items()) or "-"
+
+
+def percentages(cells, total, prefix=""):
+    """(key, count) cells as "<prefix><key> <percent>%" """
+    return " ".join(f"{prefix}{key} {100 * n / total:.0f}%" for key, n in cells)
+
+
+def print_table(configs, results):
+    width = max(len(describe(overrides)) for overrides in configs)
+    width = max(width, len("config"))
+    print(
+        f"{'config':<{width}}{'episodes':>10}{'died':>7}{'surv s':>8}{'p50 s':>7}"
+        f"{'level':>7}{'score':>8}  deaths by level / damage share"
+    )
+    for overrides, stats in zip(configs, results):
+        episodes = max(1, stats["episodes"])
+        mean_level = (
+            sum(level * n for level, n in stats["levels_reached"].items()) / episodes
+        )
+        deaths = sorted(stats["deaths_by_level"].items())
+        print(
+            f"{describe(overrides):<{width}}{stats['episodes']:>10}"
+            f"{100 * stats['deaths'] / episodes:>6.0f}%"
+            f"{stats['survival_s'] / episodes:>8.1f}{median_survival(stats):>7}"
+            f"{mean_level:>7.2f}{stats['score'] / episodes:>8.0f}"
+            f"  {percentages(deaths, episodes, 'L')}"
+        )
+        damage = sorted(stats["damage"].items(), key=lambda item: -item[1])
+        total = max(1, sum(n for _, n in damage))
+        print(f"{'':<{width + 47}}  {percentages(damage, total)}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Sweep Forward Blaster balance settings with a scripted bot"
+    )
+    parser.add_argument(
+        "--set",
+        action="append",
+        default=[],
+        metavar="NAME=V1,V2",
+        help=(
+            "values to try for one balance setting, e.g. level_thresholds.2=150,200"
+            " or spawn_delay_scale=0.8,1 (repeatable; every combination is played)"
+        ),
+    )
+    parser.add_argument(
+        "--episodes", type=int, default=200, help="episodes per combination"
+    )
+    parser.add_argument("--seed", type=int, default=0, help="first episode seed")
+    parser.add_argument("--level", type=int, default=1, help="level to start on")
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=MAX_SECONDS,
+        help="game seconds after which an episode counts as survived",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument(
+        "--list", action="store_true", help="list the balance settings and exit"
+    )
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for name, value in settings(vars(Balance())):
+            print(f"{name} = {value}")
+        return 0
+    try:
+        configs = parse_grid(args.set)
+        for overrides in configs:
+            Balance(overrides)
+    except (KeyError, ValueError) as error:
+        parser.error(error.args[0])
+
+    started = time.perf_counter()
+    results = sweep(
+        configs,
+        args.episodes,
+        args.seed,
+        args.level,
+        args.max_seconds,
+        args.workers,
+    )
+    elapsed = time.perf_counter() - started
+    print_table(configs, results)
+    print(
+        f"\n{len(configs) * args.episodes} episodes in {elapsed:.1f}s "
+        f"on {args.workers} worker(s)"
+    )
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(
+                [
+                    {"overrides": overrides, **stats}
+                    for overrides, stats in zip(configs, results)
+                ],
+                f,
+                indent=2,
+            )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
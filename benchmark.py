@@ -0,0 +1,489 @@
+import argparse
+import json
+import random
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from monsters import BossEnemy, Enemy, JumpingBoss
+from projectiles import BULLET
+from replay import NO_KEYS, Replay
+from scroller import Game, HAZARD_LAYERS
+
+# Simulation steps per scenario, after WARMUP_FRAMES that are not measured
+FRAMES = 600
+WARMUP_FRAMES = 60
+
+# Frames run under tracemalloc, which is too slow to leave on while timing
+MEMORY_FRAMES = 200
+
+# Each scenario runs this many times and keeps the median of each timing. A
+# single run can be twice as slow as the next on a busy machine; the median of
+# several shrugs off the odd slow or fast one
+REPEATS = 5
+
+# A timing may grow by this fraction over the baseline, and by at least
+# MIN_DELTA_MS, before it counts as a regression. Even the medians of repeated
+# runs of an unchanged tree still differ by up to half again from one
+# invocation to the next, so anything tighter flags noise. Peak memory does not
+# wobble and has its own, tighter allowance
+THRESHOLD = 0.6
+MIN_DELTA_MS = 0.05
+MEMORY_THRESHOLD = 0.10
+
+# Timing statistics held to THRESHOLD. The p99 rests on a run's few slowest
+# frames and more than doubles on noise alone, so it is reported but not gated
+GATED_STATS = ("p50", "p95")
+
+# Entities on screen at each point of the scaling curve
+SCALING_COUNTS = (25, 50, 100, 200, 400, 800)
+
+BASELINE_PATH = "benchmark_baseline.json"
+
+
+class Scenario:
+    """A seeded, repeatable game situation to time.
+
+    `populate(game)` runs before every step to hold the situation steady, e.g.
+    topping enemies back up or refreshing power-ups, and the player fires
+    every `fire_every` steps.
+    """
+
+    def __init__(self, name, level, populate=None, fire_every=0, seed=1):
+        self.name = name
+        self.level = level
+        self.populate = populate
+        self.fire_every = fire_every
+        self.seed = seed
+        self.max_steps = None  # Steps available, when the scenario can run out
+
+    def start(self):
+        random.seed(self.seed)
+        game = Game(headless=True, seed=self.seed)
+        game.max_level_reached = self.level
+        game.restart_game()
+        return game
+
+    def prepare(self, game, frame):
+        """Returns (keys, key_presses) for the next step"""
+        # Keep the player alive and on this level for the whole run
+        game.player.hp = game.player.max_hp
+        game.score = 0
+        if self.populate is not None:
+            self.populate(game)
+        if self.fire_every and frame % self.fire_every == 0:
+            return NO_KEYS, (pygame.K_SPACE,)
+        return NO_KEYS, ()
+
+
+class ReplayScenario(Scenario):
+    """Plays back a recorded game instead of a scripted situation"""
+
+    def __init__(self, path):
+        super().__init__(f"replay:{path}", 1)
+        self.replay = Replay.load(path)
+        self.inputs = None
+        self.max_steps = self.replay.steps
+        if self.max_steps <= WARMUP_FRAMES:
+            raise ValueError(f"{path} is too short to benchmark")
+
+    def start(self):
+        self.inputs = self.replay.inputs()
+        return Game(headless=True, seed=self.replay.seed)
+
+    def prepare(self, game, frame):
+        return next(self.inputs)
+
+
+def keep_powerups(game, *names):
+    player = game.player
+    for name in names:
+        if not getattr(player, "has_" + name):
+            getattr(player, "pickup_" + name)()
+
+
+def top_up(game, group, count, make):
+    entities = getattr(game, group)
+    while len(entities) < count:
+        entities.append(make(game))
+
+
+def ground_enemy(game):
+    return Enemy.at(random.uniform(SCREEN_WIDTH / 3, SCREEN_WIDTH), SCREEN_HEIGHT - 140)
+
+
+def flying_enemy(game):
+    return game.pools["flying_enemies"].acquire(
+        random.uniform(SCREEN_WIDTH / 3, SCREEN_WIDTH),
+        random.randint(50, SCREEN_HEIGHT - 100),
+    )
+
+
+def boss_enemy(game):
+    return BossEnemy(
+        random.uniform(SCREEN_WIDTH / 2, SCREEN_WIDTH),
+        random.randint(80, SCREEN_HEIGHT - 250),
+        game.clock,
+        timers=game.timers,
+    )
+
+
+def missile_boss(game):
+    boss = JumpingBoss(
+        random.uniform(SCREEN_WIDTH / 2, SCREEN_WIDTH),
+        SCREEN_HEIGHT - 200,
+        game.clock,
+        timers=game.timers,
+    )
+    boss.missile_delay = 500
+    boss.schedule_missile()
+    boss.health = 1000  # Outlives the whole run
+    return boss
+
+
+def populate_saturation(game):
+    keep_powerups(game, "shotgun", "machine_gun", "penetrator", "rain")
+    top_up(game, "enemies", 15, ground_enemy)
+    top_up(game, "flying_enemies", 15, flying_enemy)
+    top_up(game, "boss_enemies", 4, boss_enemy)
+    top_up(game, "jumping_bosses", 4, missile_boss)
+
+
+def populate_machine_gun(game):
+    keep_powerups(game, "machine_gun")
+    top_up(game, "enemies", 40, ground_enemy)
+
+
+def populate_rain_storm(game):
+    keep_powerups(game, "rain", "shotgun")
+    top_up(game, "flying_enemies", 20, flying_enemy)
+
+
+def populate_missile_swarm(game):
+    top_up(game, "jumping_bosses", 12, missile_boss)
+
+
+def populate_flying_swarm(game):
+    top_up(game, "flying_enemies", 40, flying_enemy)
+
+
+SCENARIOS = {
+    scenario.name: scenario
+    for scenario in (
+        Scenario("level1_idle", 1),
+        Scenario("level7_saturation", 7, populate_saturation, fire_every=3),
+        Scenario("machine_gun_40_enemies", 1, populate_machine_gun),
+        Scenario("rain_storm", 3, populate_rain_storm, fire_every=3),
+        Scenario("missile_swarm", 7, populate_missile_swarm),
+        Scenario("level6_flying_swarm", 6, populate_flying_swarm, fire_every=7),
+    )
+}
+
+
+def entity_count(game):
+    return len(game.projectiles) + sum(
+        len(getattr(game, layer)) for layer in HAZARD_LAYERS
+    )
+
+
+def time_collisions(game, samples):
+    """Record how long each check_collisions() call of this game takes"""
+    check_collisions = game.check_collisions
+
+    def timed():
+        started = time.perf_counter()
+        check_collisions()
+        samples.append((time.perf_counter() - started) * 1000)
+
+    game.check_collisions = timed
+
+
+def percentiles(samples):
+    p50, p95, p99 = np.percentile(samples, (50, 95, 99))
+    return {"p50": round(p50, 4), "p95": round(p95, 4), "p99": round(p99, 4)}
+
+
+def run_scenarios(scenarios, frames=FRAMES, repeats=REPEATS):
+    """Time every scenario `repeats` times, keeping the median of each
+    statistic. The scenarios take turns, so a slow spell of the machine is
+    spread over all of them instead of landing on every run of one."""
+    runs = {scenario.name: [] for scenario in scenarios}
+    for _ in range(repeats):
+        for scenario in scenarios:
+            runs[scenario.name].append(time_scenario(scenario, frames))
+    return {
+        scenario.name: summarize(scenario, runs[scenario.name])
+        for scenario in scenarios
+    }
+
+
+def summarize(scenario, runs):
+    result = {}
+    for metric in ("update_ms", "draw_ms", "collision_ms"):
+        result[metric] = {
+            stat: round(float(np.median([run[metric][stat] for run in runs])), 4)
+            for stat in runs[0][metric]
+        }
+    result["steps_per_second"] = round(
+        float(np.median([run["steps_per_second"] for run in runs])), 1
+    )
+    result["peak_memory_kb"] = measure_memory(scenario)
+    result["mean_entities"] = runs[0]["mean_entities"]
+    return result
+
+
+def time_scenario(scenario, frames):
+    game = scenario.start()
+    update_ms = []
+    draw_ms = []
+    collision_ms = []
+    entities = []
+    steps = WARMUP_FRAMES + frames
+    if scenario.max_steps is not None:
+        steps = min(steps, scenario.max_steps)
+    for frame in range(steps):
+        if frame == WARMUP_FRAMES:
+            time_collisions(game, collision_ms)
+        keys, presses = scenario.prepare(game, frame)
+
+        started = time.perf_counter()
+        game.step(keys, presses)
+        stepped = time.perf_counter()
+        game.draw()
+        drawn = time.perf_counter()
+
+        if frame >= WARMUP_FRAMES:
+            update_ms.append((stepped - started) * 1000)
+            draw_ms.append((drawn - stepped) * 1000)
+            entities.append(entity_count(game))
+
+    return {
+        "update_ms": percentiles(update_ms),
+        "draw_ms": percentiles(draw_ms),
+        "collision_ms": percentiles(collision_ms),
+        "steps_per_second": round(1000 * len(update_ms) / sum(update_ms), 1),
+        "mean_entities": round(float(np.mean(entities)), 1),
+    }
+
+
+def measure_memory(scenario, frames=MEMORY_FRAMES):
+    """Peak Python heap use while the scenario runs, in KiB"""
+    tracemalloc.start()
+    try:
+        game = scenario.start()
+        if scenario.max_steps is not None:
+            frames = min(frames, scenario.max_steps)
+        for frame in range(frames):
+            game.step(*scenario.prepare(game, frame))
+            game.draw()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return round(peak / 1024)
+
+
+def run_scaling(counts=SCALING_COUNTS, frames=120):
+    """Per-frame cost as the number of enemies and bullets grows. A path that
+    scales linearly keeps a flat per-entity cost down the curve"""
+    curve = []
+    for count in counts:
+
+        def populate(game, count=count):
+            top_up(game, "enemies", count // 2, ground_enemy)
+            top_up(game, "flying_enemies", count - count // 2, flying_enemy)
+            for _ in range(count - len(game.projectiles)):
+                game.projectiles.fire(
+                    BULLET,
+                    random.uniform(0, SCREEN_WIDTH),
+                    random.uniform(0, SCREEN_HEIGHT - 100),
+                )
+
+        scenario = Scenario(f"scaling_{count}", 7, populate)
+        game = scenario.start()
+        update_ms = []
+        draw_ms = []
+        collision_ms = []
+        time_collisions(game, collision_ms)
+        for frame in range(frames):
+            scenario.prepare(game, frame)
+            started = time.perf_counter()
+            game.step()
+            stepped = time.perf_counter()
+            game.draw()
+            draw_ms.append((time.perf_counter() - stepped) * 1000)
+            update_ms.append((stepped - started) * 1000)
+
+        point = {"entities": count * 2}
+        for name, samples in (
+            ("update", update_ms),
+            ("draw", draw_ms),
+            ("collision", collision_ms),
+        ):
+            median = float(np.median(samples))
+            point[name + "_ms"] = round(median, 4)
+            point[name + "_us_per_entity"] = round(1000 * median / (count * 2), 3)
+        curve.append(point)
+    return curve
+
+
+def compare(
+    results,
+    baseline,
+    threshold=THRESHOLD,
+    min_delta=MIN_DELTA_MS,
+    memory_threshold=MEMORY_THRESHOLD,
+):
+    """Returns a description of every metric that regressed past its threshold"""
+    regressions = []
+    for name, current in results["scenarios"].items():
+        previous = baseline.get("scenarios", {}).get(name)
+        if previous is None:
+            continue
+        for metric in ("update_ms", "draw_ms", "collision_ms"):
+            for stat in GATED_STATS:
+                value = current[metric][stat]
+                baseline_value = previous[metric][stat]
+                limit = max(
+                    baseline_value * (1 + threshold), baseline_value + min_delta
+                )
+                if value > limit:
+                    regressions.append(
+                        f"{name} {metric} {stat}: {value:.3f} > {limit:.3f}"
+                    )
+        limit = previous["steps_per_second"] / (1 + threshold)
+        if current["steps_per_second"] < limit:
+            regressions.append(
+                f"{name} steps_per_second: "
+                f"{current['steps_per_second']:.0f} < {limit:.0f}"
+            )
+        limit = previous["peak_memory_kb"] * (1 + memory_threshold)
+        if current["peak_memory_kb"] > limit:
+            regressions.append(
+                f"{name} peak_memory_kb: {current['peak_memory_kb']} > {limit:.0f}"
+            )
+    return regressions
+
+
+def print_results(results):
+    print(
+        f"{'scenario':<24}{'update p50/p95/p99 ms':>26}{'draw p50/p95/p99 ms':>26}"
+        f"{'steps/s':>10}{'peak KiB':>10}{'entities':>10}"
+    )
+    for name, result in results["scenarios"].items():
+        update = "/".join(f"{v:.2f}" for v in result["update_ms"].values())
+        draw = "/".join(f"{v:.2f}" for v in result["draw_ms"].values())
+        print(
+            f"{name:<24}{update:>26}{draw:>26}{result['steps_per_second']:>10.0f}"
+            f"{result['peak_memory_kb']:>10}{result['mean_entities']:>10.0f}"
+        )
+    if "scaling" in results:
+        print(
+            f"\n{'entities':>10}{'update us/ent':>15}{'collision us/ent':>18}"
+            f"{'draw us/ent':>13}"
+        )
+        for point in results["scaling"]:
+            print(
+                f"{point['entities']:>10}{point['update_us_per_entity']:>15.3f}"
+                f"{point['collision_us_per_entity']:>18.3f}"
+                f"{point['draw_us_per_entity']:>13.3f}"
+            )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Forward Blaster benchmarks")
+    parser.add_argument(
+        "scenarios", nargs="*", metavar="SCENARIO", help="default: all of them"
+    )
+    parser.add_argument("--frames", type=int, default=FRAMES)
+    parser.add_argument("--output", help="write the results to this JSON file")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=THRESHOLD,
+        help="allowed fractional slowdown before a timing counts as a regression",
+    )
+    parser.add_argument(
+        "--min-delta",
+        type=float,
+        default=MIN_DELTA_MS,
+        help="smallest slowdown in ms that counts as a regression",
+    )
+    parser.add_argument("--memory-threshold", type=float, default=MEMORY_THRESHOLD)
+    parser.add_argument("--repeats", type=int, default=REPEATS)
+    parser.add_argument(
+        "--update-baseline",
+        action="store_true",
+        help="overwrite the baseline with these results instead of comparing",
+    )
+    parser.add_argument(
+        "--scaling", action="store_true", help="also measure the entity scaling curve"
+    )
+    parser.add_argument(
+        "--replay",
+        action="append",
+        default=[],
+        metavar="PATH",
+        help="also benchmark playing back this replay file (repeatable)",
+    )
+    parser.add_argument("--list", action="store_true", help="list scenarios and exit")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        print("\n".join(SCENARIOS))
+        return 0
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    # Replays on their own only run themselves
+    if args.scenarios or not args.replay:
+        names = args.scenarios or list(SCENARIOS)
+    else:
+        names = []
+    scenarios = [SCENARIOS[name] for name in names]
+    scenarios += [ReplayScenario(path) for path in args.replay]
+    results = {
+        "frames": args.frames,
+        "scenarios": run_scenarios(scenarios, args.frames, args.repeats),
+    }
+    if args.scaling:
+        results["scaling"] = run_scaling()
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump(results, f, indent=2)
+        return 0
+
+    try:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+    except FileNotFoundError:
+        print(f"\nNo baseline at {args.baseline}; nothing to compare against")
+        return 0
+    regressions = compare(
+        results,
+        baseline,
+        args.threshold,
+        args.min_delta,
+        args.memory_threshold,
+    )
+    if regressions:
+        print("\nRegressions against", args.baseline)
+        for regression in regressions:
+            print("  " + regression)
+        return 1
+    print("\nNo regressions against", args.baseline)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
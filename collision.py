@@ -0,0 +1,60 @@
+class SpatialHash:
+    """Uniform grid broadphase that buckets rects by the cells they overlap"""
+
+    def __init__(self, cell_size=64):
+        self.cell_size = cell_size
+        self.cells = {}
+        self.entries = []
+        self.pair_tests = 0  # Candidates handed out by query() this tick
+
+    def clear(self):
+        """Forget everything registered during the previous tick"""
+        self.cells.clear()
+        self.entries.clear()
+        self.pair_tests = 0
+
+    def _cell_range(self, rect):
+        size = self.cell_size
+        return (
+            range(rect.left // size, (rect.right - 1) // size + 1),
+            range(rect.top // size, (rect.bottom - 1) // size + 1),
+        )
+
+    def insert(self, obj, rect, layer):
+        """Register an object under a layer name and return its entry"""
+        entry = (len(self.entries), obj, layer, rect)
+        self.entries.append(entry)
+
+        columns, rows = self._cell_range(rect)
+        for cx in columns:
+            for cy in rows:
+                bucket = self.cells.get((cx, cy))
+                if bucket is None:
+                    self.cells[(cx, cy)] = [entry]
+                else:
+                    bucket.append(entry)
+        return entry
+
+    def remove(self, entry):
+        """Drop an entry so later queries in this tick no longer return it"""
+        self.entries[entry[0]] = None
+
+    def query(self, rect, layers=None):
+        """Return live entries sharing a cell with rect, in insertion order"""
+        found = {}
+        columns, rows = self._cell_range(rect)
+        for cx in columns:
+            for cy in rows:
+                bucket = self.cells.get((cx, cy))
+                if bucket:
+                    for entry in bucket:
+                        found[entry[0]] = entry
+
+        entries = self.entries
+        candidates = []
+        for index in sorted(found):
+            entry = entries[index]
+            if entry is not None and (layers is None or entry[2] in layers):
+                candidates.append(entry)
+        self.pair_tests += len(candidates)
+        return candidates
@@ -0,0 +1,139 @@
+import pygame
+
+# Draw order for the dirty renderer, back to front. LayeredDirty draws the
+# sprites of one layer in the order they were added, not in the order the game
+# lists them, so every group gets a layer of its own to overlap other groups
+# the same way the full redraw does
+LAYERS = {
+    group: layer
+    for layer, group in enumerate(
+        (
+            "platforms",
+            "powerups",
+            "player",
+            "projectiles",
+            "enemies",
+            "flying_enemies",
+            "boss_enemies",
+            "jumping_bosses",
+            "homing_missiles",
+            "bombs",
+            "hud",
+            "overlay",
+            "instructions",
+            "profiler",
+        )
+    )
+}
+
+
+class LayerSprite(pygame.sprite.DirtySprite):
+    def __init__(self, layer):
+        super().__init__()
+        self._layer = layer
+        self.image = pygame.Surface((0, 0))
+        self.rect = self.image.get_rect()
+        self.area = None
+        self.seen = 0
+
+    def show(self, image, position, area=None):
+        """Point the sprite at a new image/position, and the part of the image
+        to show if not all of it, marking it dirty on change"""
+        if (
+            image is not self.image
+            or position != self.rect.topleft
+            or area != self.area
+        ):
+            self.image = image
+            self.area = area
+            if area is None:
+                self.source_rect = None
+                self.rect = image.get_rect(topleft=position)
+            else:
+                self.source_rect = pygame.Rect(area)
+                self.rect = pygame.Rect(position, self.source_rect.size)
+            self.dirty = 1
+
+
+class DirtyRenderer:
+    """Draws the game through a LayeredDirty group over the cached background,
+    pushing only the rectangles that changed to the display"""
+
+    def __init__(self, screen):
+        self.screen = screen
+        self.group = pygame.sprite.LayeredDirty()
+        self.entities = {}
+        self.ui_order = []  # HUD sprites in the order the game draws them
+        self.frame = 0
+        self.level = None
+
+    def _set_level(self, level):
+        # New level: new background, so everything gets repainted once
+        self.level = level
+        level.draw_background(self.screen)
+        self.group.clear(self.screen, level.background)
+        self.group.repaint_rect(self.screen.get_rect())
+
+    def _sync(self, group, identity, blit):
+        key = (group, identity)
+        sprite = self.entities.get(key)
+        if sprite is None:
+            sprite = LayerSprite(LAYERS[group])
+            self.group.add(sprite)
+            self.entities[key] = sprite
+        sprite.show(*blit)
+        sprite.seen = self.frame
+        return sprite
+
+    def draw(self, game, alpha=1.0):
+        if game.current_level is not self.level:
+            self._set_level(game.current_level)
+
+        # Sync one dirty sprite per entity and per part of the HUD, dropping
+        # those that are no longer shown. HUD parts are surfaces the HUD keeps,
+        # so one only gets dirty when what it shows changes.
+        self.frame += 1
+        entities = self.entities
+        for group, identity, blit in game.entity_sprites(alpha):
+            self._sync(group, identity, blit)
+        ui_order = [
+            self._sync(group, identity, blit)
+            for group, identity, blit in game.ui_sprites()
+        ]
+        if ui_order != self.ui_order:
+            # Parts of the HUD may overlap, so when some come or go put them
+            # all back in the game's order, which a new sprite would not be in
+            self.group.remove(*ui_order)
+            self.group.add(*ui_order)
+            for sprite in ui_order:
+                sprite.dirty = 1
+            self.ui_order = ui_order
+
+        panel = game.profiler.sprite()
+        if panel is not None:
+            self._sync("profiler", "panel", panel)
+
+        stale = [key for key, sprite in entities.items() if sprite.seen != self.frame]
+        for key in stale:
+            entities.pop(key).kill()
+
+        self._merge_lost_rects()
+        pygame.display.update(self.group.draw(self.screen))
+
+    def _merge_lost_rects(self):
+        """LayeredDirty repaints each sprite once per rect it updates, but only
+        merges overlapping rects of sprites that changed, not of those that
+        were removed. Where two removed sprites overlapped, a translucent edge
+        under them (anti-aliased HUD text) would be blended twice."""
+        lost = self.group.lostsprites
+        if len(lost) < 2:
+            return
+        merged = []
+        for rect in lost:
+            rect = pygame.Rect(rect)
+            i = rect.collidelist(merged)
+            while i > -1:
+                rect.union_ip(merged.pop(i))
+                i = rect.collidelist(merged)
+            merged.append(rect)
+        lost[:] = merged
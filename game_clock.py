@@ -0,0 +1,42 @@
+import pygame
+
+from constants import FPS
+
+# Simulated milliseconds per frame at the target frame rate
+FRAME_MS = 1000 / FPS
+
+# Most simulation steps run to catch up before a render frame; past this the
+# game slows down instead of falling ever further behind
+MAX_STEPS_PER_FRAME = 5
+
+# Render frame cap, so high refresh rate displays draw interpolated frames
+# between simulation steps without spinning the CPU
+MAX_RENDER_FPS = 144
+
+
+class SystemClock:
+    """Wall-clock milliseconds since pygame.init(), like pygame.time.get_ticks()"""
+
+    def get_ticks(self):
+        return pygame.time.get_ticks()
+
+    def advance(self, milliseconds):
+        """Wall time moves by itself, so a step on this clock only updates"""
+
+
+class SimulationClock:
+    """Clock that only moves when the simulation advances it"""
+
+    def __init__(self, start=0):
+        self.time = start
+
+    def get_ticks(self):
+        # Whole milliseconds, like pygame.time.get_ticks()
+        return int(self.time)
+
+    def advance(self, milliseconds):
+        self.time += milliseconds
+
+
+# Shared default for objects created without an explicit clock
+system_clock = SystemClock()
@@ -0,0 +1,19 @@
+import random
+
+
+class RandomStreams:
+    """One seeded random generator per subsystem.
+
+    Every stream is derived from the same seed, but a subsystem rolling more
+    or fewer dice never shifts what the others see, so a recorded game replays
+    the same way even after one subsystem's randomness changes.
+    """
+
+    def __init__(self, seed=None):
+        if seed is None:
+            seed = random.randrange(2**32)
+        self.seed = seed
+        self.spawns = random.Random(f"{seed}/spawns")  # Where enemies appear
+        self.enemies = random.Random(f"{seed}/enemies")  # Enemy speeds and sway
+        self.bosses = random.Random(f"{seed}/bosses")  # Boss timers and bombs
+        self.powerups = random.Random(f"{seed}/powerups")  # Power-up drops
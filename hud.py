@@ -0,0 +1,216 @@
+import pygame
+
+from constants import (
+    SCREEN_WIDTH,
+    SCREEN_HEIGHT,
+    WHITE,
+    BLACK,
+    RED,
+    GREEN,
+    YELLOW,
+    ORANGE,
+    DARK_GRAY,
+    CYAN,
+)
+from fonts import render_text
+
+# Layout of the HUD in the top left corner
+SCORE_POSITION = (10, 10)
+HP_BAR_POSITION = (10, 50)
+HP_BAR_WIDTH = 200
+HP_BAR_HEIGHT = 20
+HP_TEXT_POSITION = (HP_BAR_POSITION[0] + HP_BAR_WIDTH + 10, HP_BAR_POSITION[1])
+LEVEL_POSITION = (10, 80)
+TIMER_X = 10
+TIMER_BAR_OFFSET = 25  # Below the timer's text
+TIMER_BAR_WIDTH = 150
+TIMER_BAR_HEIGHT = 10
+
+INSTRUCTIONS = ("Arrow Keys: Move & Jump", "Down: Crouch", "Space: Shoot")
+
+# How much the transition and game over screens darken the game
+TRANSITION_DIM = 180
+GAME_OVER_DIM = 128
+
+
+class Text:
+    """A line of text that is only rendered again when its value changes"""
+
+    def __init__(self, size, color, template="%s"):
+        self.size = size
+        self.color = color
+        self.template = template  # %-formatted with the value
+        self.value = None
+        self.image = None
+
+    def render(self, value):
+        if self.image is None or value != self.value:
+            self.value = value
+            self.image = render_text(self.template % value, self.size, self.color)
+        return self.image
+
+
+class Bar:
+    """A bar filled from the left with a border round it. Both the empty and
+    the full bar are painted once; showing it blits the empty one and then as
+    much of the full one as is filled"""
+
+    def __init__(self, width, height, color, background):
+        self.height = height
+        self.empty = self.paint(width, height, background)
+        self.full = self.paint(width, height, color)
+
+    @staticmethod
+    def paint(width, height, color):
+        surface = pygame.Surface((width, height))
+        surface.fill(color)
+        pygame.draw.rect(surface, BLACK, surface.get_rect(), 2)
+        return surface
+
+    def sprites(self, key, position, filled):
+        """(key, blit) of the empty bar, then of the filled part if any"""
+        if filled <= 0:
+            return [((key, "empty"), (self.empty, position))]
+        return [
+            ((key, "empty"), (self.empty, position)),
+            ((key, "full"), (self.full, position, (0, 0, filled, self.height))),
+        ]
+
+
+class PowerUpTimer:
+    """A power-up's name and seconds left over a bar of the time left"""
+
+    def __init__(self, label, color):
+        self.label = label
+        self.text = Text(28, color, label + ": %ss")
+        self.bar = Bar(TIMER_BAR_WIDTH, TIMER_BAR_HEIGHT, color, DARK_GRAY)
+
+    def sprites(self, y, remaining_time, duration):
+        seconds = max(0, remaining_time // 1000)
+        filled = int((remaining_time / duration) * TIMER_BAR_WIDTH)
+        return [
+            (("timer", self.label), (self.text.render(seconds), (TIMER_X, y)))
+        ] + self.bar.sprites(
+            ("timer bar", self.label), (TIMER_X, y + TIMER_BAR_OFFSET), filled
+        )
+
+
+class Hud:
+    """Everything drawn over the game, kept as surfaces that are only rendered
+    again when what they show changes. Each part is handed out as a
+    (key, blit) pair: the full redraw blits them all in one blits() call, and
+    the dirty renderer keeps a sprite per key. Each transition screen is laid
+    out once."""
+
+    def __init__(self):
+        self.score = Text(36, BLACK, "Score: %s")
+        self.level = Text(36, BLACK, "Level: %s")
+        self.hp = Text(24, BLACK, "HP: %s/%s")
+        self.hp_bar = Bar(HP_BAR_WIDTH, HP_BAR_HEIGHT, GREEN, RED)
+        self.timers = {}  # Label -> PowerUpTimer, made when first shown
+        self.instructions = None
+        self.dims = {}  # Alpha -> full-screen darkening surface
+        self.transitions = {}  # Transition text -> its sprites
+        self.game_over = (None, None)  # (score, level), sprites
+
+    def sprites(self, score, level_number, hp, max_hp, timers):
+        """The HUD's (key, blit) pairs; timers as returned by
+        Game.powerup_timers()"""
+        filled = int((hp / max_hp) * HP_BAR_WIDTH)
+        sprites = [
+            ("score", (self.score.render(score), SCORE_POSITION)),
+            ("level", (self.level.render(level_number), LEVEL_POSITION)),
+        ]
+        sprites += self.hp_bar.sprites("hp bar", HP_BAR_POSITION, filled)
+        sprites.append(("hp", (self.hp.render((hp, max_hp)), HP_TEXT_POSITION)))
+        for label, color, remaining_time, duration, y in timers:
+            timer = self.timers.get(label)
+            if timer is None:
+                timer = self.timers[label] = PowerUpTimer(label, color)
+            sprites += timer.sprites(y, remaining_time, duration)
+        return sprites
+
+    def instruction_sprites(self):
+        if self.instructions is None:
+            self.instructions = [
+                (
+                    ("instruction", i),
+                    (render_text(line, 24, BLACK), (10, SCREEN_HEIGHT - 80 + i * 25)),
+                )
+                for i, line in enumerate(INSTRUCTIONS)
+            ]
+        return self.instructions
+
+    def transition_sprites(self, transition_data):
+        """The screen between levels for Level.get_level_transition_text()"""
+        key = (
+            transition_data["title"],
+            tuple(transition_data["warnings"]),
+            tuple(transition_data["info"]),
+        )
+        sprites = self.transitions.get(key)
+        if sprites is None:
+            blits = [(self.dim(TRANSITION_DIM), (0, 0))] + transition_blits(*key)
+            sprites = self.transitions[key] = [
+                (("transition", i), blit) for i, blit in enumerate(blits)
+            ]
+        return sprites
+
+    def game_over_sprites(self, score, level_number):
+        shown, sprites = self.game_over
+        if shown != (score, level_number):
+            blits = [(self.dim(GAME_OVER_DIM), (0, 0))] + game_over_blits(
+                score, level_number
+            )
+            sprites = [(("game over", i), blit) for i, blit in enumerate(blits)]
+            self.game_over = ((score, level_number), sprites)
+        return sprites
+
+    def dim(self, alpha):
+        surface = self.dims.get(alpha)
+        if surface is None:
+            # Per-pixel alpha so it also composes onto transparent layers
+            surface = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), pygame.SRCALPHA)
+            surface.fill(BLACK + (alpha,))
+            self.dims[alpha] = surface
+        return surface
+
+
+def centered(text, y_offset):
+    """(text, position) to blit text centred y_offset below the screen's
+    middle"""
+    rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + y_offset))
+    return text, rect.topleft
+
+
+def warning_style(warning):
+    """(font size, color) for a transition warning"""
+    if "LEVEL!" in warning or "FINAL" in warning or "ULTIMATE" in warning:
+        return 48, RED
+    if "SKY LEVEL!" in warning:
+        return 48, CYAN
+    if "NO FLOOR" in warning:
+        return 32, RED
+    return 28, ORANGE if "hits" in warning or "MISSILES" in warning else WHITE
+
+
+def transition_blits(title, warnings, info):
+    blits = [centered(render_text(title, 72, YELLOW), -120)]
+    y_offset = -70
+    for warning in warnings:
+        blits.append(centered(render_text(warning, *warning_style(warning)), y_offset))
+        y_offset += 30
+    for line in info:
+        blits.append(centered(render_text(line, 32, CYAN), y_offset))
+        y_offset += 30
+    blits.append(centered(render_text("Health restored!", 36, GREEN), 70))
+    return blits
+
+
+def game_over_blits(score, level_number):
+    return [
+        centered(render_text("GAME OVER", 72, RED), -50),
+        centered(render_text(f"Final Score: {score}", 36, WHITE), 0),
+        centered(render_text(f"Level Reached: {level_number}", 36, WHITE), 30),
+        centered(render_text("Press R to Restart", 36, WHITE), 70),
+    ]
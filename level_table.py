@@ -0,0 +1,212 @@
+import json
+import os
+from collections import namedtuple
+from types import MappingProxyType
+
+LEVELS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "levels.json")
+
+ENEMY_TYPES = ("ground_enemies", "flying_enemies", "boss_enemies", "jumping_bosses")
+
+# Where flying enemies may appear unless a level says otherwise
+FLYING_SPAWN_Y = (100, 400)
+
+LEVEL_KEYS = {
+    "platforms",
+    "floor",
+    "enemies",
+    "flying_spawn_y",
+    "powerups",
+    "spawn_delays",
+    "threshold",
+    "health_bonus",
+    "sky",
+    "ground_color",
+    "cloud_color",
+    "transition",
+}
+REQUIRED_KEYS = {"platforms", "enemies", "sky", "ground_color", "cloud_color"}
+
+# One compiled level. Everything in it is immutable, so it is shared by every
+# Level made for that number.
+LevelSpec = namedtuple(
+    "LevelSpec",
+    [
+        "number",
+        "platforms",  # (x, y, width, height) of each platform
+        "has_floor",
+        "enemy_types",  # frozenset of ENEMY_TYPES
+        "flying_spawn_y",  # (lowest, highest) y
+        "powerups_enabled",
+        "spawn_delays",  # Overrides of the table-wide spawn delays
+        "threshold",  # Score that finishes the level; None on the last level
+        "health_bonus",  # Hit points restored on arriving here, or None
+        "sky",  # (base_color, color_type)
+        "ground_color",
+        "cloud_color",
+        "title",
+        "warnings",
+        "info",
+    ],
+)
+
+
+class LevelTable:
+    """Every level of the game, compiled from a levels file.
+
+    Levels are numbered from 1 in file order. The last one has no score
+    threshold and goes on until the player dies; levels past the end of the
+    file (e.g. a start level beyond it) play as the last one. There is no
+    level below 1.
+    """
+
+    def __init__(self, spawn_delays, levels):
+        self.spawn_delays = spawn_delays
+        self.levels = levels
+
+    def __len__(self):
+        return len(self.levels)
+
+    def __getitem__(self, level_number):
+        if level_number < 1:
+            raise KeyError(f"No level {level_number}: levels start at 1")
+        return self.levels[min(level_number, len(self.levels)) - 1]
+
+    @classmethod
+    def load(cls, path=LEVELS_PATH):
+        with open(path) as f:
+            data = json.load(f)
+        return cls.compile(data, path)
+
+    @classmethod
+    def compile(cls, data, source="<levels>"):
+        """Validate a levels document and build its table; raises ValueError
+        naming the level and field at fault"""
+        _check(isinstance(data, dict), source, "expected an object")
+        unknown = set(data) - {"spawn_delays", "levels"}
+        _check(not unknown, source, f"unknown keys {sorted(unknown)}")
+        spawn_delays = _delays(data.get("spawn_delays"), source)
+        levels = data.get("levels")
+        _check(isinstance(levels, list) and levels, source, "no levels")
+
+        specs = []
+        for number, level in enumerate(levels, 1):
+            where = f"{source} level {number}"
+            spec = _compile_level(number, level, number == len(levels), where)
+            unknown = set(spec.spawn_delays) - set(spawn_delays)
+            _check(not unknown, where, f"unknown spawn delays {sorted(unknown)}")
+            specs.append(spec)
+        return cls(MappingProxyType(spawn_delays), tuple(specs))
+
+
+def _check(condition, where, message):
+    if not condition:
+        raise ValueError(f"{where}: {message}")
+
+
+def _number(value, where, name):
+    _check(
+        isinstance(value, int) and not isinstance(value, bool) and value >= 0,
+        where,
+        f"{name} must be a whole number >= 0",
+    )
+    return value
+
+
+def _numbers(value, length, where, name):
+    _check(
+        isinstance(value, list) and len(value) == length,
+        where,
+        f"{name} must be a list of {length} numbers",
+    )
+    return tuple(_number(item, where, name) for item in value)
+
+
+def _strings(value, where, name):
+    _check(
+        isinstance(value, list) and all(isinstance(item, str) for item in value),
+        where,
+        f"{name} must be a list of strings",
+    )
+    return tuple(value)
+
+
+def _delays(value, where):
+    value = {} if value is None else value
+    _check(isinstance(value, dict), where, "spawn_delays must be an object")
+    return {
+        name: _number(delay, where, f"spawn_delays.{name}")
+        for name, delay in value.items()
+    }
+
+
+def _compile_level(number, level, last, where):
+    _check(isinstance(level, dict), where, "expected an object")
+    unknown = set(level) - LEVEL_KEYS
+    _check(not unknown, where, f"unknown keys {sorted(unknown)}")
+    missing = REQUIRED_KEYS - set(level)
+    _check(not missing, where, f"missing keys {sorted(missing)}")
+
+    platforms = level["platforms"]
+    _check(isinstance(platforms, list), where, "platforms must be a list")
+    platforms = tuple(_numbers(p, 4, where, "platform") for p in platforms)
+
+    enemies = _strings(level["enemies"], where, "enemies")
+    unknown = set(enemies) - set(ENEMY_TYPES)
+    _check(not unknown, where, f"unknown enemies {sorted(unknown)}")
+
+    floor = level.get("floor", True)
+    powerups = level.get("powerups", False)
+    _check(isinstance(floor, bool), where, "floor must be true or false")
+    _check(isinstance(powerups, bool), where, "powerups must be true or false")
+
+    threshold = level.get("threshold")
+    if last:
+        _check(threshold is None, where, "the last level cannot have a threshold")
+    else:
+        _check(threshold is not None, where, "missing threshold")
+        _number(threshold, where, "threshold")
+    health_bonus = level.get("health_bonus")
+    if health_bonus is not None or last:
+        _number(health_bonus, where, "health_bonus")
+
+    sky = level["sky"]
+    _check(
+        isinstance(sky, dict) and set(sky) == {"base_color", "color_type"},
+        where,
+        "sky must have a base_color and a color_type",
+    )
+    _check(isinstance(sky["color_type"], str), where, "sky color_type must be text")
+
+    transition = level.get("transition", {})
+    _check(isinstance(transition, dict), where, "transition must be an object")
+    unknown = set(transition) - {"title", "warnings", "info"}
+    _check(not unknown, where, f"unknown transition keys {sorted(unknown)}")
+    title = transition.get("title", "LEVEL {number}!")
+    _check(isinstance(title, str), where, "transition title must be text")
+
+    return LevelSpec(
+        number=number,
+        platforms=platforms,
+        has_floor=floor,
+        enemy_types=frozenset(enemies),
+        flying_spawn_y=_numbers(
+            level.get("flying_spawn_y", list(FLYING_SPAWN_Y)),
+            2,
+            where,
+            "flying_spawn_y",
+        ),
+        powerups_enabled=powerups,
+        spawn_delays=MappingProxyType(_delays(level.get("spawn_delays"), where)),
+        threshold=threshold,
+        health_bonus=health_bonus,
+        sky=(_number(sky["base_color"], where, "sky base_color"), sky["color_type"]),
+        ground_color=_numbers(level["ground_color"], 3, where, "ground_color"),
+        cloud_color=_numbers(level["cloud_color"], 3, where, "cloud_color"),
+        title=title,
+        warnings=_strings(transition.get("warnings", []), where, "warnings"),
+        info=_strings(transition.get("info", []), where, "info"),
+    )
+
+
+# Compiled once, on first import
+LEVELS = LevelTable.load()
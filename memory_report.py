@@ -0,0 +1,169 @@
+import argparse
+import sys
+
+import pygame
+
+from balance_sweep import bot_input
+from game_clock import FRAME_MS
+from level_table import LEVELS
+import missiles
+import projectiles
+from monsters.Enemy import COLUMNS as ENEMY_COLUMNS
+from scroller import Game, OBJECT_HAZARDS, STORED_LAYERS
+
+# Game seconds played on each level
+SECONDS = 60
+
+# Live memory is measured every this many steps
+SAMPLE_EVERY = 30
+
+# Layers whose entities are Python objects
+OBJECT_LAYERS = tuple(
+    layer for layer in OBJECT_HAZARDS if layer not in STORED_LAYERS
+) + ("powerups",)
+
+
+def attribute_values(entity):
+    if hasattr(entity, "__dict__"):
+        return list(vars(entity).values())
+    names = [
+        name for cls in type(entity).__mro__ for name in vars(cls).get("__slots__", ())
+    ]
+    return [getattr(entity, name) for name in names if hasattr(entity, name)]
+
+
+def entity_bytes(entity):
+    """Memory owned by one entity: the object, its __dict__ if it has one,
+    and the numbers and hitboxes stored in it. Shared objects (clocks, random generators,
+    booleans, cached small ints, interned strings) are not counted."""
+    size = sys.getsizeof(entity)
+    if hasattr(entity, "__dict__"):
+        size += sys.getsizeof(vars(entity))
+    for value in attribute_values(entity):
+        if isinstance(value, (float, pygame.Rect)) or (
+            type(value) is int and not -5 <= value <= 256
+        ):
+            size += sys.getsizeof(value)
+    return size
+
+
+def store_bytes(store, columns):
+    """(bytes per row, bytes used by the live rows) of a struct-of-arrays
+    store such as the projectiles, ground enemies or homing missiles"""
+    row = sum(getattr(store, name).itemsize for name in columns)
+    size = row * len(store)
+    enemies_hit = getattr(store, "enemies_hit", None)
+    if enemies_hit:
+        size += sys.getsizeof(enemies_hit)
+        size += sum(sys.getsizeof(hit) for hit in enemies_hit.values())
+    return row, size
+
+
+def snapshot(game):
+    """{type: (live count, bytes)} for every entity type in a game"""
+    sizes = {"player": (1, entity_bytes(game.player))}
+    for layer in OBJECT_LAYERS:
+        entities = getattr(game, layer)
+        sizes[layer] = (len(entities), sum(entity_bytes(e) for e in entities))
+    for name, store, columns in (
+        ("projectiles", game.projectiles, projectiles.COLUMNS),
+        ("enemies", game.enemies, ENEMY_COLUMNS),
+        ("homing_missiles", game.homing_missiles, missiles.COLUMNS),
+    ):
+        _, size = store_bytes(store, columns)
+        sizes[name] = (len(store), size)
+    return sizes
+
+
+def pooled_bytes(game):
+    """Memory held by spare entities waiting in the game's pools"""
+    return sum(
+        entity_bytes(entity)
+        for pool in game.pools.values()
+        for entity in pool.free
+        # Reserved spares have not been initialised yet
+        if attribute_values(entity)
+    )
+
+
+def measure(levels, seconds=SECONDS, seed=0):
+    """Play the scripted bot on each level and sample live entity memory.
+    Returns (per-type totals, per-level samples)"""
+    types = {}  # Type -> [entities seen, bytes]
+    per_level = {}  # Level -> list of (entities, bytes, pooled bytes)
+    game = Game(headless=True)
+    steps = round(seconds * 1000 / FRAME_MS)
+    for level in levels:
+        game.reset(seed, level)
+        samples = per_level.setdefault(level, [])
+        for step in range(steps):
+            if game.game_over:
+                # Keep playing this level until its time is up
+                seed += 1
+                game.reset(seed, level)
+            game.score = 0  # Never reach the next level
+            game.step(*bot_input(game))
+            if step % SAMPLE_EVERY:
+                continue
+            sizes = snapshot(game)
+            for name, (count, size) in sizes.items():
+                seen = types.setdefault(name, [0, 0])
+                seen[0] += count
+                seen[1] += size
+            samples.append(
+                (
+                    sum(count for count, _ in sizes.values()),
+                    sum(size for _, size in sizes.values()),
+                    pooled_bytes(game),
+                )
+            )
+    return types, per_level
+
+
+def print_report(types, per_level):
+    print(f"{'entity type':<18}{'bytes each':>12}{'samples':>10}")
+    for name, (count, size) in types.items():
+        each = f"{size / count:.0f}" if count else "-"
+        print(f"{name:<18}{each:>12}{count:>10}")
+
+    print(
+        f"\n{'level':<8}{'entities':>10}{'live KiB':>10}{'peak KiB':>10}"
+        f"{'pooled KiB':>12}"
+    )
+    for level, samples in per_level.items():
+        if not samples:
+            continue
+        entities = sum(sample[0] for sample in samples) / len(samples)
+        live = sum(sample[1] for sample in samples) / len(samples)
+        peak = max(sample[1] for sample in samples)
+        pooled = max(sample[2] for sample in samples)
+        print(
+            f"{level:<8}{entities:>10.1f}{live / 1024:>10.1f}{peak / 1024:>10.1f}"
+            f"{pooled / 1024:>12.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Bytes per entity type and live entity memory per level"
+    )
+    parser.add_argument(
+        "levels",
+        nargs="*",
+        type=int,
+        metavar="LEVEL",
+        help="default: every level in the level table",
+    )
+    parser.add_argument(
+        "--seconds", type=float, default=SECONDS, help="game seconds per level"
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    levels = args.levels or range(1, len(LEVELS) + 1)
+    print_report(*measure(levels, args.seconds, args.seed))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,230 @@
+import math
+from collections import namedtuple
+
+import numpy as np
+import pygame
+
+from constants import RED, ORANGE, YELLOW
+from game_clock import FRAME_MS
+from sprites import atlas
+from trig import cos, phase, sin
+from world import CULL_MARGIN, outside
+
+WIDTH = 12
+HEIGHT = 6
+SPEED = 3
+HOMING_STRENGTH = 0.1  # How aggressively missiles home in
+MAX_LIFETIME = 4000  # ms in flight before self-destruct
+# The same in updates, each one fixed simulation step of FRAME_MS
+LIFETIME_STEPS = round(MAX_LIFETIME / FRAME_MS)
+
+# Missile sprites are pre-rendered for this many evenly spaced headings
+HEADING_BUCKETS = 64
+
+# Per-missile arrays of a MissileStore
+COLUMNS = ("x", "y", "prev_x", "prev_y", "vx", "vy", "lifetime", "alive", "ids")
+
+# What iterating a MissileStore gives, for code that reads hazards one by one
+Missile = namedtuple("Missile", ["x", "y", "width", "height"])
+
+
+class MissileStore:
+    """Struct-of-arrays storage for every homing missile in flight.
+
+    Like projectiles.ProjectileStore, live missiles occupy the first `count`
+    slots in launch order, and one update() steers them all.
+    """
+
+    def __init__(self, capacity=64):
+        self.count = 0
+        self.next_id = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)  # Position before the last update,
+        self.prev_y = np.zeros(capacity)  # for interpolated drawing
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.lifetime = np.zeros(capacity, dtype=np.int64)  # Updates in flight
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.hitbox = pygame.Rect(0, 0, WIDTH, HEIGHT)  # Reused by get_rect()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        n = self.count
+        for x, y in zip(self.x[:n].tolist(), self.y[:n].tolist()):
+            yield Missile(x, y, WIDTH, HEIGHT)
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.count] = column[: self.count]
+            setattr(self, name, grown)
+
+    def launch(self, x, y):
+        """Add a missile at rest; it picks up speed towards its target"""
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.prev_x[i] = x
+        self.prev_y[i] = y
+        self.vx[i] = 0
+        self.vy[i] = 0
+        self.lifetime[i] = 0
+        self.alive[i] = True
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        self.count += 1
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def clear(self):
+        self.alive[: self.count] = False
+        self.sweep()
+
+    def update(self, targets):
+        """Steer every missile towards the nearest of `targets`, a sequence of
+        (x, y) points, then move it and drop the expired and far off-screen"""
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        vx = self.vx[:n]
+        vy = self.vy[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+
+        if len(targets) == 1:
+            ((target_x, target_y),) = targets
+            dx = target_x - x
+            dy = target_y - y
+            distance = np.sqrt(dx * dx + dy * dy)
+        else:
+            targets = np.asarray(targets, dtype=float)
+            dx = targets[:, 0, None] - x  # One row per target
+            dy = targets[:, 1, None] - y
+            distance = np.sqrt(dx * dx + dy * dy)
+            nearest = np.argmin(distance, axis=0)
+            columns = np.arange(n)
+            dx = dx[nearest, columns]
+            dy = dy[nearest, columns]
+            distance = distance[nearest, columns]
+
+        # Blend velocity towards full speed at the target; a missile sitting
+        # exactly on its target keeps its velocity
+        if distance.all():
+            vx += (dx / distance * SPEED - vx) * HOMING_STRENGTH
+            vy += (dy / distance * SPEED - vy) * HOMING_STRENGTH
+        else:
+            moving = distance > 0
+            distance[~moving] = 1
+            vx += np.where(moving, (dx / distance * SPEED - vx) * HOMING_STRENGTH, 0)
+            vy += np.where(moving, (dy / distance * SPEED - vy) * HOMING_STRENGTH, 0)
+        x += vx
+        y += vy
+        self.lifetime[:n] += 1
+
+        # Missiles turn round off screen, so they get a margin to do it in
+        gone = self.lifetime[:n] >= LIFETIME_STEPS
+        gone |= outside(x, y, WIDTH, HEIGHT, CULL_MARGIN)
+        self.alive[:n] &= ~gone
+        self.sweep()
+
+    def sweep(self):
+        """Compact live missiles to the front, keeping their launch order"""
+        n = self.count
+        alive = self.alive[:n]
+        if alive.all():
+            return
+        kept = int(np.count_nonzero(alive))
+        for name in ("x", "y", "prev_x", "prev_y", "vx", "vy", "lifetime", "ids"):
+            column = getattr(self, name)
+            column[:kept] = column[:n][alive]
+        self.alive[:kept] = True
+        self.alive[kept:n] = False
+        self.count = kept
+
+    def hits(self, rect):
+        """Indices, in launch order, of live missiles whose hitbox overlaps
+        rect (hitboxes snap to whole pixels like pygame.Rect)"""
+        n = self.count
+        if n == 0:
+            return []
+        left = self.x[:n].astype(int)
+        top = self.y[:n].astype(int)
+        overlap = (
+            self.alive[:n]
+            & (left < rect.right)
+            & (left + WIDTH > rect.left)
+            & (top < rect.bottom)
+            & (top + HEIGHT > rect.top)
+        )
+        return np.flatnonzero(overlap).tolist()
+
+    def get_rect(self, i):
+        """Hitbox of missile i, valid until the next call"""
+        self.hitbox.update(self.x[i], self.y[i], WIDTH, HEIGHT)
+        return self.hitbox
+
+    def live_ids(self):
+        return self.ids[: self.count][self.alive[: self.count]].tolist()
+
+    def sprites(self, alpha=1.0):
+        """Returns (surface, position) pairs for every live missile, turned to
+        its heading and drawn `alpha` of the way from its previous position
+        to its current one"""
+        n = self.count
+        live = self.alive[:n]
+        headings = np.arctan2(self.vy[:n][live], self.vx[:n][live])
+        headings = np.round(headings / (2 * math.pi) * HEADING_BUCKETS).astype(int)
+        headings %= HEADING_BUCKETS
+
+        xs = self.x[:n][live]
+        ys = self.y[:n][live]
+        if alpha < 1:
+            xs = xs - (xs - self.prev_x[:n][live]) * (1 - alpha)
+            ys = ys - (ys - self.prev_y[:n][live]) * (1 - alpha)
+        sprites = []
+        for heading, x, y in zip(
+            headings.tolist(), xs.astype(int).tolist(), ys.astype(int).tolist()
+        ):
+            image, (dx, dy) = atlas.get(("homing_missile", heading))
+            sprites.append((image, (x + dx, y + dy)))
+        return sprites
+
+    def draw(self, screen, alpha=1.0):
+        screen.blits(self.sprites(alpha), doreturn=False)
+
+
+def paint_homing_missile(surface, x, y, heading):
+    # Draw missile as a red triangle pointing towards movement direction
+    center_x = x + WIDTH // 2
+    center_y = y + HEIGHT // 2
+    angle = phase(heading * 2 * math.pi / HEADING_BUCKETS)
+
+    # Draw main body
+    pygame.draw.circle(surface, RED, (center_x, center_y), 4)
+
+    # Draw nose pointing in direction of travel
+    nose_length = 8
+    nose_x = center_x + int(nose_length * cos(angle))
+    nose_y = center_y + int(nose_length * sin(angle))
+    pygame.draw.line(surface, ORANGE, (center_x, center_y), (nose_x, nose_y), 3)
+
+    # Draw small exhaust trail
+    trail_x = center_x - int(6 * cos(angle))
+    trail_y = center_y - int(6 * sin(angle))
+    pygame.draw.circle(surface, YELLOW, (trail_x, trail_y), 2)
+
+
+atlas.register(
+    "homing_missile", paint_homing_missile, [(i,) for i in range(HEADING_BUCKETS)]
+)
@@ -19,16 +19,27 @@ from constants import (
     BROWN,
     CYAN,
 )
+from game_clock import system_clock
+from pool import reuse_rect
+from scheduler import Scheduler
+from sprites import atlas
+from trig import cos_degrees, phase, sin_degrees, step, sway
+
+# The fuse turns 3 degrees per update, so one sprite per step covers every pose
+FUSE_ANGLE_STEP = 3
 
 
 class Bomb:
-    def __init__(self, x, y):
+    __slots__ = ("x", "y", "rect", "speed_x", "rotation")
+    width = 15
+    height = 20
+    speed_y = 2  # Slow falling speed
+
+    def __init__(self, x, y, rng=None):
         self.x = x
         self.y = y
-        self.width = 15
-        self.height = 20
-        self.speed_x = random.uniform(-1, 1)  # Slight horizontal drift
-        self.speed_y = 2  # Slow falling speed
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
+        self.speed_x = (rng or random).uniform(-1, 1)  # Slight horizontal drift
         self.rotation = 0
 
     def update(self):
@@ -37,94 +48,151 @@ class Bomb:
         self.rotation += 3  # Rotate as it falls
 
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+    def sprite(self):
+        angle_bucket = int(self.rotation % 360) // FUSE_ANGLE_STEP
+        return atlas.place(("bomb", angle_bucket), self.x, self.y)
 
     def draw(self, screen):
+        screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(surface, x, y, angle_bucket):
         # Draw bomb as a dark circle with a fuse
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
-        pygame.draw.circle(screen, BLACK, (center_x, center_y), self.width // 2)
-        pygame.draw.circle(screen, DARK_GRAY, (center_x, center_y), self.width // 2 - 2)
+        rotation = angle_bucket * FUSE_ANGLE_STEP
+        center_x = x + Bomb.width // 2
+        center_y = y + Bomb.height // 2
+        pygame.draw.circle(surface, BLACK, (center_x, center_y), Bomb.width // 2)
+        pygame.draw.circle(
+            surface, DARK_GRAY, (center_x, center_y), Bomb.width // 2 - 2
+        )
 
         # Draw fuse (small line sticking out)
-        fuse_x = center_x + int(6 * math.cos(math.radians(self.rotation)))
-        fuse_y = center_y + int(6 * math.sin(math.radians(self.rotation)))
-        pygame.draw.line(screen, ORANGE, (center_x, center_y), (fuse_x, fuse_y), 2)
+        fuse_x = center_x + int(6 * cos_degrees(rotation))
+        fuse_y = center_y + int(6 * sin_degrees(rotation))
+        pygame.draw.line(surface, ORANGE, (center_x, center_y), (fuse_x, fuse_y), 2)
 
 
 class BossEnemy:
-    def __init__(self, x, y):
+    __slots__ = (
+        "x",
+        "y",
+        "rect",
+        "start_y",
+        "clock",
+        "rng",
+        "timers",
+        "speed",
+        "health",
+        "sway_amplitude",
+        "phase",
+        "phase_step",
+        "last_bomb",
+        "bomb_delay",
+        "bomb_ready",
+        "flash_timer",
+        "hit_flash",
+    )
+    width = 60
+    height = 45
+    sway_top = 50  # Kept within screen bounds
+    sway_bottom = SCREEN_HEIGHT - 200
+    flash_duration = 200  # milliseconds
+
+    def __init__(self, x, y, clock=None, rng=None, timers=None):
         self.x = x
         self.y = y
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
         self.start_y = y
-        self.width = 60
-        self.height = 45
-        self.speed = random.uniform(1, 2)  # Slower than regular flying enemies
+        self.clock = clock or system_clock
+        self.rng = rng or random
+        # Bomb and flash timers; the game runs them every update
+        self.timers = timers or Scheduler()
+        self.speed = self.rng.uniform(1, 2)  # Slower than regular flying enemies
         self.health = 2  # Takes 2 hits to kill
-        self.sway_amplitude = random.uniform(40, 80)
-        self.sway_frequency = random.uniform(0.01, 0.03)  # Slower sway
-        self.time_offset = random.uniform(0, 2 * math.pi)
-        self.time = 0
+        self.sway_amplitude = self.rng.uniform(40, 80)
+        self.phase_step = step(self.rng.uniform(0.01, 0.03))  # Slower sway
+        self.phase = phase(self.rng.uniform(0, 2 * math.pi))
         self.last_bomb = 0
-        self.bomb_delay = random.uniform(2000, 4000)  # 2-4 seconds between bombs
-        self.flash_timer = 0
+        self.bomb_delay = self.rng.uniform(2000, 4000)  # 2-4 seconds between bombs
+        self.bomb_ready = False
+        self.timers.at(
+            self.last_bomb + self.bomb_delay, setattr, self, "bomb_ready", True
+        )
+        self.flash_timer = None
         self.hit_flash = False
 
     def update(self):
-        self.x -= self.speed
-        self.time += self.sway_frequency
-        # Create swaying motion using sine wave
-        self.y = self.start_y + self.sway_amplitude * math.sin(
-            self.time + self.time_offset
-        )
-
-        # Keep within screen bounds
-        self.y = max(50, min(SCREEN_HEIGHT - 200, self.y))
+        self.move()
+        sway((self,), self.sway_top, self.sway_bottom)
 
-        # Handle hit flash
-        if self.hit_flash:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.flash_timer > 200:  # Flash for 200ms
-                self.hit_flash = False
+    def move(self):
+        """Everything update() does but the sway, which Game applies to all
+        boss enemies at once"""
+        self.x -= self.speed
 
     def take_damage(self):
         self.health -= 1
         self.hit_flash = True
-        self.flash_timer = pygame.time.get_ticks()
+        # A new hit restarts the flash
+        if self.flash_timer is not None:
+            self.flash_timer.cancel()
+        self.flash_timer = self.timers.at(
+            self.clock.get_ticks() + self.flash_duration,
+            setattr,
+            self,
+            "hit_flash",
+            False,
+        )
         return self.health <= 0
 
     def can_drop_bomb(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_bomb > self.bomb_delay:
-            self.last_bomb = current_time
-            self.bomb_delay = random.uniform(2000, 4000)  # Reset delay
-            return True
-        return False
-
-    def drop_bomb(self):
+        if not self.bomb_ready:
+            return False
+        self.bomb_ready = False
+        self.last_bomb = self.clock.get_ticks()
+        self.bomb_delay = self.rng.uniform(2000, 4000)  # Reset delay
+        self.timers.at(
+            self.last_bomb + self.bomb_delay, setattr, self, "bomb_ready", True
+        )
+        return True
+
+    def drop_bomb(self, pool=None):
         bomb_x = self.x + self.width // 2
         bomb_y = self.y + self.height
-        return Bomb(bomb_x, bomb_y)
+        if pool is not None:
+            return pool.acquire(bomb_x, bomb_y, self.rng)
+        return Bomb(bomb_x, bomb_y, self.rng)
 
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+    def sprite(self):
+        return atlas.place(("boss_enemy", self.health, self.hit_flash), self.x, self.y)
 
     def draw(self, screen):
+        screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(surface, x, y, health, hit_flash):
         # Draw main body (larger, darker bird)
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
+        center_x = x + BossEnemy.width // 2
+        center_y = y + BossEnemy.height // 2
 
         # Choose color based on health and flash state
-        if self.hit_flash:
+        if hit_flash:
             body_color = (255, 100, 100)  # Red flash when hit
-        elif self.health == 1:
+        elif health == 1:
             body_color = (100, 50, 50)  # Darker red when damaged
         else:
             body_color = (80, 40, 40)  # Dark reddish-brown
 
         # Draw body (larger oval)
         pygame.draw.ellipse(
-            screen, body_color, (self.x, self.y, self.width, self.height)
+            surface, body_color, (x, y, BossEnemy.width, BossEnemy.height)
         )
 
         # Draw wings (larger, more menacing)
@@ -135,7 +203,7 @@ class BossEnemy:
             (center_x - wing_size - 20, center_y - wing_size),
             (center_x - wing_size - 20, center_y + wing_size),
         ]
-        pygame.draw.polygon(screen, DARK_GRAY, left_wing)
+        pygame.draw.polygon(surface, DARK_GRAY, left_wing)
 
         # Right wing
         right_wing = [
@@ -143,14 +211,14 @@ class BossEnemy:
             (center_x + wing_size + 20, center_y - wing_size),
             (center_x + wing_size + 20, center_y + wing_size),
         ]
-        pygame.draw.polygon(screen, DARK_GRAY, right_wing)
+        pygame.draw.polygon(surface, DARK_GRAY, right_wing)
 
         # Draw eyes (larger, more menacing)
         eye_size = 5
-        pygame.draw.circle(screen, RED, (center_x - 8, center_y - 5), eye_size)
-        pygame.draw.circle(screen, RED, (center_x + 8, center_y - 5), eye_size)
-        pygame.draw.circle(screen, BLACK, (center_x - 8, center_y - 5), 2)
-        pygame.draw.circle(screen, BLACK, (center_x + 8, center_y - 5), 2)
+        pygame.draw.circle(surface, RED, (center_x - 8, center_y - 5), eye_size)
+        pygame.draw.circle(surface, RED, (center_x + 8, center_y - 5), eye_size)
+        pygame.draw.circle(surface, BLACK, (center_x - 8, center_y - 5), 2)
+        pygame.draw.circle(surface, BLACK, (center_x + 8, center_y - 5), 2)
 
         # Draw beak (sharp, menacing)
         beak = [
@@ -158,4 +226,12 @@ class BossEnemy:
             (center_x - 8, center_y + 15),
             (center_x + 8, center_y + 15),
         ]
-        pygame.draw.polygon(screen, ORANGE, beak)
+        pygame.draw.polygon(surface, ORANGE, beak)
+
+
+atlas.register("bomb", Bomb.paint, [(i,) for i in range(360 // FUSE_ANGLE_STEP)])
+atlas.register(
+    "boss_enemy",
+    BossEnemy.paint,
+    [(health, flash) for health in (1, 2) for flash in (False, True)],
+)
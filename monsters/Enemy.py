@@ -1,5 +1,8 @@
 import random
 import math
+from collections import namedtuple
+
+import numpy as np
 import pygame
 
 
@@ -20,28 +23,173 @@ from constants import (
     BROWN,
     CYAN,
 )
+from sprites import atlas
+from world import outside
+
+# Per-enemy arrays of an EnemyStore
+COLUMNS = ("x", "y", "prev_x", "prev_y", "speed", "alive", "ids")
 
 
-class Enemy:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 30
-        self.height = 40
-        self.speed = random.uniform(1, 3)
-        self.health = 1
+class Enemy(namedtuple("Enemy", ["x", "y", "speed"])):
+    """A ground enemy, as it is added to an EnemyStore and as iterating one
+    gives it back for code that reads hazards one by one"""
 
-    def update(self):
-        self.x -= self.speed
+    __slots__ = ()
+    width = 30
+    height = 40
 
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+    @classmethod
+    def at(cls, x, y, rng=None):
+        """A new enemy at (x, y) walking left at a random speed"""
+        rng = rng or random
+        return cls(x, y, rng.uniform(1, 3))
 
-    def draw(self, screen):
-        pygame.draw.rect(screen, RED, self.get_rect())
+    @staticmethod
+    def paint(surface, x, y):
+        pygame.draw.rect(surface, RED, (x, y, Enemy.width, Enemy.height))
         # Draw simple face
         eye_size = 4
-        pygame.draw.circle(screen, WHITE, (int(self.x + 8), int(self.y + 10)), eye_size)
-        pygame.draw.circle(
-            screen, WHITE, (int(self.x + 22), int(self.y + 10)), eye_size
+        pygame.draw.circle(surface, WHITE, (x + 8, y + 10), eye_size)
+        pygame.draw.circle(surface, WHITE, (x + 22, y + 10), eye_size)
+
+
+class EnemyStore:
+    """Struct-of-arrays storage for every ground enemy.
+
+    Like projectiles.ProjectileStore, live enemies occupy the first `count`
+    slots in the order they were added, and one update() walks them all.
+    A killed or culled enemy stays in its slot, no longer alive, until
+    sweep() compacts the store, so slots stay put for a whole update.
+    """
+
+    def __init__(self, capacity=16):
+        self.count = 0
+        self.next_id = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)  # Position before the last step,
+        self.prev_y = np.zeros(capacity)  # for interpolated drawing
+        self.speed = np.zeros(capacity)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.rects = []  # A hitbox per slot in use so far, see hitboxes()
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        n = self.count
+        for x, y, speed, alive in zip(
+            self.x[:n].tolist(),
+            self.y[:n].tolist(),
+            self.speed[:n].tolist(),
+            self.alive[:n].tolist(),
+        ):
+            if alive:
+                yield Enemy(x, y, speed)
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.count] = column[: self.count]
+            setattr(self, name, grown)
+
+    def append(self, enemy):
+        """Add an Enemy, such as one made by Enemy.at()"""
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = enemy.x
+        self.y[i] = enemy.y
+        self.prev_x[i] = enemy.x
+        self.prev_y[i] = enemy.y
+        self.speed[i] = enemy.speed
+        self.alive[i] = True
+        self.ids[i] = self.next_id
+        self.next_id += 1
+        self.count += 1
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def clear(self):
+        """Drop every enemy; returns the ids of those that were live"""
+        self.alive[: self.count] = False
+        return self.sweep()
+
+    def save_positions(self):
+        """Remember where every enemy is before a step, to interpolate from"""
+        n = self.count
+        self.prev_x[:n] = self.x[:n]
+        self.prev_y[:n] = self.y[:n]
+
+    def update(self, cull_margin=0):
+        """Walk every enemy left at its own speed, and kill those that lie
+        outside the screen grown by cull_margin"""
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        x -= self.speed[:n]
+        self.alive[:n] &= ~outside(
+            x, self.y[:n], Enemy.width, Enemy.height, cull_margin
         )
+
+    def sweep(self):
+        """Compact live enemies to the front, keeping their order, and return
+        the ids of those that were dropped"""
+        n = self.count
+        alive = self.alive[:n]
+        if alive.all():
+            return []
+        gone = self.ids[:n][~alive].tolist()
+        kept = int(np.count_nonzero(alive))
+        for name in ("x", "y", "prev_x", "prev_y", "speed", "ids"):
+            column = getattr(self, name)
+            column[:kept] = column[:n][alive]
+        self.alive[:kept] = True
+        self.alive[kept:n] = False
+        self.count = kept
+        return gone
+
+    def hitboxes(self):
+        """Yields (slot, hitbox) for every live enemy in order. Each slot has
+        a Rect of its own, valid until the next sweep()"""
+        n = self.count
+        rects = self.rects
+        if len(rects) < n:
+            rects += [pygame.Rect(0, 0, 0, 0) for _ in range(n - len(rects))]
+        for i, (x, y, alive) in enumerate(
+            zip(self.x[:n].tolist(), self.y[:n].tolist(), self.alive[:n].tolist())
+        ):
+            if alive:
+                rect = rects[i]
+                rect.update(x, y, Enemy.width, Enemy.height)
+                yield i, rect
+
+    def live_ids(self):
+        return self.ids[: self.count][self.alive[: self.count]].tolist()
+
+    def sprites(self, alpha=1.0):
+        """Returns (surface, position) pairs for every live enemy, drawn
+        `alpha` of the way from its previous position to its current one"""
+        n = self.count
+        live = self.alive[:n]
+        image, (dx, dy) = atlas.get(("enemy",))
+        xs = self.x[:n][live]
+        ys = self.y[:n][live]
+        if alpha < 1:
+            xs = xs - (xs - self.prev_x[:n][live]) * (1 - alpha)
+            ys = ys - (ys - self.prev_y[:n][live]) * (1 - alpha)
+        return [
+            (image, (x + dx, y + dy))
+            for x, y in zip(xs.astype(int).tolist(), ys.astype(int).tolist())
+        ]
+
+    def draw(self, screen, alpha=1.0):
+        screen.blits(self.sprites(alpha), doreturn=False)
+
+
+atlas.register("enemy", Enemy.paint)
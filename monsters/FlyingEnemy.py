@@ -19,41 +19,67 @@ from constants import (
     BROWN,
     CYAN,
 )
+from pool import reuse_rect
+from sprites import atlas
+from trig import phase, step, sway
 
 
 class FlyingEnemy:
-    def __init__(self, x, y):
+    __slots__ = (
+        "x",
+        "y",
+        "rect",
+        "start_y",
+        "speed",
+        "health",
+        "sway_amplitude",
+        "phase",
+        "phase_step",
+    )
+    width = 25
+    height = 25
+    sway_top = 50  # Kept within screen bounds
+    sway_bottom = SCREEN_HEIGHT - 150
+
+    def __init__(self, x, y, rng=None):
         self.x = x
         self.y = y
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
         self.start_y = y
-        self.width = 25
-        self.height = 25
-        self.speed = random.uniform(2, 4)
+        rng = rng or random
+        self.speed = rng.uniform(2, 4)
         self.health = 1
-        self.sway_amplitude = random.uniform(30, 60)  # How much it sways up/down
-        self.sway_frequency = random.uniform(0.02, 0.05)  # How fast it sways
-        self.time_offset = random.uniform(0, 2 * math.pi)  # Random phase offset
-        self.time = 0
+        self.sway_amplitude = rng.uniform(30, 60)  # How much it sways up/down
+        self.phase_step = step(rng.uniform(0.02, 0.05))  # How fast it sways
+        self.phase = phase(rng.uniform(0, 2 * math.pi))  # Random phase offset
 
     def update(self):
-        self.x -= self.speed
-        self.time += self.sway_frequency
-        # Create swaying motion using sine wave
-        self.y = self.start_y + self.sway_amplitude * math.sin(
-            self.time + self.time_offset
-        )
+        self.move()
+        sway((self,), self.sway_top, self.sway_bottom)
 
-        # Keep within screen bounds
-        self.y = max(50, min(SCREEN_HEIGHT - 150, self.y))
+    def move(self):
+        """Everything update() does but the sway, which Game applies to all
+        flying enemies at once"""
+        self.x -= self.speed
 
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+    def sprite(self):
+        return atlas.place(("flying_enemy",), self.x, self.y)
 
     def draw(self, screen):
+        screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(surface, x, y):
         # Draw main body (purple circle)
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
-        pygame.draw.circle(screen, PURPLE, (center_x, center_y), self.width // 2)
+        center_x = x + FlyingEnemy.width // 2
+        center_y = y + FlyingEnemy.height // 2
+        pygame.draw.circle(
+            surface, PURPLE, (center_x, center_y), FlyingEnemy.width // 2
+        )
 
         # Draw wings (orange triangles)
         wing_size = 8
@@ -63,7 +89,7 @@ class FlyingEnemy:
             (center_x - wing_size - 10, center_y - wing_size),
             (center_x - wing_size - 10, center_y + wing_size),
         ]
-        pygame.draw.polygon(screen, ORANGE, left_wing)
+        pygame.draw.polygon(surface, ORANGE, left_wing)
 
         # Right wing
         right_wing = [
@@ -71,11 +97,14 @@ class FlyingEnemy:
             (center_x + wing_size + 10, center_y - wing_size),
             (center_x + wing_size + 10, center_y + wing_size),
         ]
-        pygame.draw.polygon(screen, ORANGE, right_wing)
+        pygame.draw.polygon(surface, ORANGE, right_wing)
 
         # Draw eyes
         eye_size = 3
-        pygame.draw.circle(screen, WHITE, (center_x - 5, center_y - 3), eye_size)
-        pygame.draw.circle(screen, WHITE, (center_x + 5, center_y - 3), eye_size)
-        pygame.draw.circle(screen, BLACK, (center_x - 5, center_y - 3), 1)
-        pygame.draw.circle(screen, BLACK, (center_x + 5, center_y - 3), 1)
+        pygame.draw.circle(surface, WHITE, (center_x - 5, center_y - 3), eye_size)
+        pygame.draw.circle(surface, WHITE, (center_x + 5, center_y - 3), eye_size)
+        pygame.draw.circle(surface, BLACK, (center_x - 5, center_y - 3), 1)
+        pygame.draw.circle(surface, BLACK, (center_x + 5, center_y - 3), 1)
+
+
+atlas.register("flying_enemy", FlyingEnemy.paint)
@@ -1,5 +1,4 @@
 import random
-import math
 import pygame
 
 from constants import (
@@ -19,195 +18,178 @@ from constants import (
     BROWN,
     CYAN,
 )
-
-
-class HomingMissile:
-    def __init__(self, x, y, target_x, target_y):
-        self.x = x
-        self.y = y
-        self.width = 12
-        self.height = 6
-        self.speed = 3
-        self.target_x = target_x
-        self.target_y = target_y
-        self.homing_strength = 0.1  # How aggressively it homes in
-        self.vel_x = 0
-        self.vel_y = 0
-        self.lifetime = 0
-        self.max_lifetime = 4000  # 8 seconds before self-destruct
-
-    def update(self, player_x, player_y):
-        # Update target to current player position
-        self.target_x = player_x
-        self.target_y = player_y
-
-        # Calculate direction to target
-        dx = self.target_x - self.x
-        dy = self.target_y - self.y
-        distance = math.sqrt(dx * dx + dy * dy)
-
-        if distance > 0:
-            # Normalize direction
-            target_vel_x = (dx / distance) * self.speed
-            target_vel_y = (dy / distance) * self.speed
-
-            # Smoothly adjust velocity towards target
-            self.vel_x += (target_vel_x - self.vel_x) * self.homing_strength
-            self.vel_y += (target_vel_y - self.vel_y) * self.homing_strength
-
-        # Update position
-        self.x += self.vel_x
-        self.y += self.vel_y
-
-        # Update lifetime
-        self.lifetime += 16  # Assuming 60 FPS
-
-    def is_expired(self):
-        return self.lifetime >= self.max_lifetime
-
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
-
-    def draw(self, screen):
-        # Draw missile as a red triangle pointing towards movement direction
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
-
-        # Calculate angle based on velocity
-        angle = math.atan2(self.vel_y, self.vel_x)
-
-        # Draw main body
-        pygame.draw.circle(screen, RED, (center_x, center_y), 4)
-
-        # Draw nose pointing in direction of travel
-        nose_length = 8
-        nose_x = center_x + int(nose_length * math.cos(angle))
-        nose_y = center_y + int(nose_length * math.sin(angle))
-        pygame.draw.line(screen, ORANGE, (center_x, center_y), (nose_x, nose_y), 3)
-
-        # Draw small exhaust trail
-        trail_x = center_x - int(6 * math.cos(angle))
-        trail_y = center_y - int(6 * math.sin(angle))
-        pygame.draw.circle(screen, YELLOW, (trail_x, trail_y), 2)
-
-
-class JumpingBoss:
-    def __init__(self, x, y):
+from game_clock import system_clock
+from physics import Body
+from pool import reuse_rect
+from scheduler import Scheduler
+from sprites import atlas
+
+
+class JumpingBoss(Body):
+    __slots__ = (
+        "rect",
+        "start_y",
+        "clock",
+        "rng",
+        "timers",
+        "health",
+        "jump_timer",
+        "jump_delay",
+        "jump_ready",
+        "last_missile",
+        "missile_delay",
+        "missile_ready",
+        "missile_timer",
+        "flash_timer",
+        "hit_flash",
+    )
+    width = 80
+    height = 60
+    speed = 1.5
+    gravity = 0.8
+    jump_power = -18
+    ground_y = SCREEN_HEIGHT - 140
+    flash_duration = 200  # milliseconds
+
+    def __init__(self, x, y, clock=None, rng=None, timers=None):
         self.x = x
         self.y = y
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
         self.start_y = y
-        self.width = 80
-        self.height = 60
-        self.speed = 1.5
+        self.clock = clock or system_clock
+        self.rng = rng or random
+        # Jump, missile and flash timers; the game runs them every update
+        self.timers = timers or Scheduler()
         self.health = 5  # Takes 5 hits to kill
+        self.vel_x = -self.speed
         self.vel_y = 0
-        self.gravity = 0.8
-        self.jump_power = -18
         self.on_ground = False
         self.jump_timer = 0
-        self.jump_delay = random.uniform(2000, 4000)  # 2-4 seconds between jumps
+        self.jump_delay = self.rng.uniform(2000, 4000)  # 2-4 seconds between jumps
+        self.jump_ready = False
+        self.timers.at(
+            self.jump_timer + self.jump_delay, setattr, self, "jump_ready", True
+        )
         self.last_missile = 0
-        self.missile_delay = random.uniform(3000, 5000)  # 3-5 seconds between missiles
-        self.flash_timer = 0
+        self.missile_delay = self.rng.uniform(
+            3000, 5000
+        )  # 3-5 seconds between missiles
+        self.missile_ready = False
+        self.missile_timer = None
+        self.schedule_missile()
+        self.flash_timer = None
         self.hit_flash = False
-        self.ground_y = SCREEN_HEIGHT - 140
 
     def update(self):
-        self.x -= self.speed
-
-        # Apply gravity
-        self.vel_y += self.gravity
+        # Walks straight through platforms, landing only on the ground
+        self.move(floor_y=self.ground_y)
 
-        # Update vertical position
-        self.y += self.vel_y
-
-        # Ground collision
-        if self.y + self.height >= self.ground_y:
-            self.y = self.ground_y - self.height
-            self.vel_y = 0
-            self.on_ground = True
-        else:
-            self.on_ground = False
-
-        # Handle jumping
-        current_time = pygame.time.get_ticks()
-        if self.on_ground and current_time - self.jump_timer > self.jump_delay:
+        # Jump once the jump delay is up and the boss is back on the ground
+        if self.on_ground and self.jump_ready:
             self.vel_y = self.jump_power
             self.on_ground = False
-            self.jump_timer = current_time
-            self.jump_delay = random.uniform(2000, 4000)  # Reset jump delay
-
-        # Handle hit flash
-        if self.hit_flash:
-            if current_time - self.flash_timer > 200:  # Flash for 200ms
-                self.hit_flash = False
+            self.jump_ready = False
+            self.jump_timer = self.clock.get_ticks()
+            self.jump_delay = self.rng.uniform(2000, 4000)  # Reset jump delay
+            self.timers.at(
+                self.jump_timer + self.jump_delay, setattr, self, "jump_ready", True
+            )
 
     def take_damage(self):
         self.health -= 1
         self.hit_flash = True
-        self.flash_timer = pygame.time.get_ticks()
+        # A new hit restarts the flash
+        if self.flash_timer is not None:
+            self.flash_timer.cancel()
+        self.flash_timer = self.timers.at(
+            self.clock.get_ticks() + self.flash_duration,
+            setattr,
+            self,
+            "hit_flash",
+            False,
+        )
         return self.health <= 0
 
-    def can_fire_missile(self):
-        current_time = pygame.time.get_ticks()
-        if current_time - self.last_missile > self.missile_delay:
-            self.last_missile = current_time
-            self.missile_delay = random.uniform(3000, 5000)  # Reset delay
-            return True
-        return False
+    def schedule_missile(self):
+        """(Re)arm the next missile for missile_delay after the last one"""
+        if self.missile_timer is not None:
+            self.missile_timer.cancel()
+        self.missile_timer = self.timers.at(
+            self.last_missile + self.missile_delay, setattr, self, "missile_ready", True
+        )
 
-    def fire_missile(self, target_x, target_y):
-        missile_x = self.x + self.width // 2
-        missile_y = self.y + self.height // 2
-        return HomingMissile(missile_x, missile_y, target_x, target_y)
+    def can_fire_missile(self):
+        if not self.missile_ready:
+            return False
+        self.missile_ready = False
+        self.last_missile = self.clock.get_ticks()
+        self.missile_delay = self.rng.uniform(3000, 5000)  # Reset delay
+        self.schedule_missile()
+        return True
+
+    def fire_missile(self, missiles):
+        """Launch a homing missile from the boss's centre into a
+        missiles.MissileStore"""
+        missiles.launch(self.x + self.width // 2, self.y + self.height // 2)
 
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+    def sprite(self):
+        return atlas.place(
+            ("jumping_boss", self.health, self.hit_flash), self.x, self.y
+        )
 
     def draw(self, screen):
+        screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(surface, x, y, health, hit_flash):
+        width = JumpingBoss.width
+        height = JumpingBoss.height
+
         # Draw main body (large, intimidating boss)
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
+        center_x = x + width // 2
+        center_y = y + height // 2
 
         # Choose color based on health and flash state
-        if self.hit_flash:
+        if hit_flash:
             body_color = (255, 100, 100)  # Red flash when hit
-        elif self.health <= 2:
+        elif health <= 2:
             body_color = (150, 50, 50)  # Dark red when heavily damaged
-        elif self.health <= 3:
+        elif health <= 3:
             body_color = (120, 60, 60)  # Medium red when moderately damaged
         else:
             body_color = (100, 40, 40)  # Dark reddish-brown when healthy
 
         # Draw main body (large rectangle with rounded edges effect)
-        pygame.draw.ellipse(
-            screen, body_color, (self.x, self.y, self.width, self.height)
-        )
+        pygame.draw.ellipse(surface, body_color, (x, y, width, height))
 
         # Draw mechanical legs/springs (to show jumping capability)
         leg_width = 8
         leg_height = 15
-        left_leg_x = self.x + 15
-        right_leg_x = self.x + self.width - 15 - leg_width
-        leg_y = self.y + self.height - 5
+        left_leg_x = x + 15
+        right_leg_x = x + width - 15 - leg_width
+        leg_y = y + height - 5
 
         # Springs effect
         spring_color = DARK_GRAY
         pygame.draw.rect(
-            screen, spring_color, (left_leg_x, leg_y, leg_width, leg_height)
+            surface, spring_color, (left_leg_x, leg_y, leg_width, leg_height)
         )
         pygame.draw.rect(
-            screen, spring_color, (right_leg_x, leg_y, leg_width, leg_height)
+            surface, spring_color, (right_leg_x, leg_y, leg_width, leg_height)
         )
 
         # Draw coils on springs
         for i in range(3):
             coil_y = leg_y + i * 4
             pygame.draw.line(
-                screen, GRAY, (left_leg_x, coil_y), (left_leg_x + leg_width, coil_y), 2
+                surface, GRAY, (left_leg_x, coil_y), (left_leg_x + leg_width, coil_y), 2
             )
             pygame.draw.line(
-                screen,
+                surface,
                 GRAY,
                 (right_leg_x, coil_y),
                 (right_leg_x + leg_width, coil_y),
@@ -216,27 +198,27 @@ class JumpingBoss:
 
         # Draw missile launchers on shoulders
         launcher_size = 12
-        left_launcher_x = self.x + 8
-        right_launcher_x = self.x + self.width - 8 - launcher_size
-        launcher_y = self.y + 10
+        left_launcher_x = x + 8
+        right_launcher_x = x + width - 8 - launcher_size
+        launcher_y = y + 10
 
         pygame.draw.rect(
-            screen, BLACK, (left_launcher_x, launcher_y, launcher_size, launcher_size)
+            surface, BLACK, (left_launcher_x, launcher_y, launcher_size, launcher_size)
         )
         pygame.draw.rect(
-            screen, BLACK, (right_launcher_x, launcher_y, launcher_size, launcher_size)
+            surface, BLACK, (right_launcher_x, launcher_y, launcher_size, launcher_size)
         )
 
         # Draw launcher barrels
         barrel_color = ORANGE
         pygame.draw.circle(
-            screen,
+            surface,
             barrel_color,
             (left_launcher_x + launcher_size // 2, launcher_y + launcher_size // 2),
             3,
         )
         pygame.draw.circle(
-            screen,
+            surface,
             barrel_color,
             (right_launcher_x + launcher_size // 2, launcher_y + launcher_size // 2),
             3,
@@ -244,34 +226,43 @@ class JumpingBoss:
 
         # Draw menacing eyes
         eye_size = 6
-        pygame.draw.circle(screen, RED, (center_x - 12, center_y - 8), eye_size)
-        pygame.draw.circle(screen, RED, (center_x + 12, center_y - 8), eye_size)
-        pygame.draw.circle(screen, BLACK, (center_x - 12, center_y - 8), 3)
-        pygame.draw.circle(screen, BLACK, (center_x + 12, center_y - 8), 3)
+        pygame.draw.circle(surface, RED, (center_x - 12, center_y - 8), eye_size)
+        pygame.draw.circle(surface, RED, (center_x + 12, center_y - 8), eye_size)
+        pygame.draw.circle(surface, BLACK, (center_x - 12, center_y - 8), 3)
+        pygame.draw.circle(surface, BLACK, (center_x + 12, center_y - 8), 3)
 
         # Draw health indicator (small bars above boss)
-        health_bar_width = self.width - 20
+        health_bar_width = width - 20
         health_bar_height = 6
-        health_bar_x = self.x + 10
-        health_bar_y = self.y - 15
+        health_bar_x = x + 10
+        health_bar_y = y - 15
 
         # Background (red)
         pygame.draw.rect(
-            screen,
+            surface,
             RED,
             (health_bar_x, health_bar_y, health_bar_width, health_bar_height),
         )
 
         # Health (green)
-        health_width = int((self.health / 5) * health_bar_width)
+        health_width = int((health / 5) * health_bar_width)
         pygame.draw.rect(
-            screen, GREEN, (health_bar_x, health_bar_y, health_width, health_bar_height)
+            surface,
+            GREEN,
+            (health_bar_x, health_bar_y, health_width, health_bar_height),
         )
 
         # Border
         pygame.draw.rect(
-            screen,
+            surface,
             BLACK,
             (health_bar_x, health_bar_y, health_bar_width, health_bar_height),
             2,
         )
+
+
+atlas.register(
+    "jumping_boss",
+    JumpingBoss.paint,
+    [(health, flash) for health in range(1, 6) for flash in (False, True)],
+)
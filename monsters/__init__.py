@@ -1,4 +1,4 @@
-from .BossEnemy import BossEnemy
-from .Enemy import Enemy
+from .BossEnemy import BossEnemy, Bomb
+from .Enemy import Enemy, EnemyStore
 from .FlyingEnemy import FlyingEnemy
 from .JumpingBoss import JumpingBoss
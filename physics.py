@@ -0,0 +1,114 @@
+from bisect import bisect_left, bisect_right
+
+
+class PlatformIndex:
+    """The platforms of a level as immutable (left, top, right, bottom)
+    boxes, sorted by left edge so a body only looks at the few platforms
+    under its own horizontal span, however many the level has.
+
+    Built once per level; platforms never move.
+    """
+
+    def __init__(self, platforms):
+        boxes = [
+            (p.x, p.y, p.x + p.width, p.y + p.height, order)
+            for order, p in enumerate(platforms)
+        ]
+        boxes.sort()
+        self.lefts = [box[0] for box in boxes]
+        self.boxes = tuple(boxes)
+        # No platform reaches further right of its left edge than this
+        self.max_width = max((p.width for p in platforms), default=0)
+        # A move shorter than the thinnest platform cannot skip over one
+        self.min_size = min(
+            (min(p.width, p.height) for p in platforms), default=float("inf")
+        )
+
+    def __len__(self):
+        return len(self.boxes)
+
+    def hits(self, rect, before=None):
+        """Boxes that rect overlaps, in level order. With `before`, the rect
+        the body moved from, this includes boxes the body passed right
+        through but not those it was already overlapping."""
+        left, top, right, bottom = rect.left, rect.top, rect.right, rect.bottom
+        if before is not None:
+            # Everything the body covered on the way
+            left = min(left, before.left)
+            top = min(top, before.top)
+            right = max(right, before.right)
+            bottom = max(bottom, before.bottom)
+
+        start = bisect_right(self.lefts, left - self.max_width)
+        end = bisect_left(self.lefts, right)
+        found = []
+        for box in self.boxes[start:end]:
+            if box[2] > left and box[1] < bottom and top < box[3]:
+                if before is not None and not _overlaps(rect, box):
+                    if _overlaps(before, box):
+                        continue  # Moved out of it, not through it
+                found.append(box)
+        if len(found) > 1:
+            found.sort(key=lambda box: box[4])
+        return found
+
+
+def _overlaps(rect, box):
+    return (
+        rect.left < box[2]
+        and box[0] < rect.right
+        and rect.top < box[3]
+        and box[1] < rect.bottom
+    )
+
+
+class Body:
+    """Something that falls under gravity and lands on platforms and floors:
+    the player and the jumping bosses.
+
+    Subclasses set gravity and provide get_rect(), whose height is what
+    lands on a platform (so a crouching player's shorter hitbox does). It
+    may return the same Rect every time, moved in place.
+    """
+
+    __slots__ = ("x", "y", "vel_x", "vel_y", "on_ground")
+
+    def move(self, platforms=None, floor_y=None):
+        """One step: accelerate under gravity, move along x and then y,
+        stopping against any platform of a PlatformIndex, and land on the
+        line floor_y if there is one"""
+        self.vel_y += self.gravity
+
+        # Horizontal: pushed back out of the side of a platform
+        before = None
+        if platforms is not None and abs(self.vel_x) >= platforms.min_size:
+            before = self.get_rect().copy()
+        self.x += self.vel_x
+        if platforms is not None:
+            for box in platforms.hits(self.get_rect(), before):
+                if self.vel_x > 0:  # Moving right
+                    self.x = box[0] - self.width
+                elif self.vel_x < 0:  # Moving left
+                    self.x = box[2]
+
+        # Vertical: land on top of a platform, or bump a head on its bottom
+        before = None
+        if platforms is not None and abs(self.vel_y) >= platforms.min_size:
+            before = self.get_rect().copy()
+        self.y += self.vel_y
+        self.on_ground = False
+        if platforms is not None:
+            rect = self.get_rect()
+            for box in platforms.hits(rect, before):
+                if self.vel_y > 0:  # Falling down
+                    self.y = box[1] - rect.height
+                    self.vel_y = 0
+                    self.on_ground = True
+                elif self.vel_y < 0:  # Jumping up
+                    self.y = box[3]
+                    self.vel_y = 0
+
+        if floor_y is not None and self.y + self.height >= floor_y:
+            self.y = floor_y - self.height
+            self.vel_y = 0
+            self.on_ground = True
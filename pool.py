@@ -0,0 +1,63 @@
+import pygame
+
+
+class Pool:
+    """A free list of spare instances of one entity class.
+
+    acquire(*args) takes a spare instance and re-runs __init__ on it, so it
+    comes back exactly as a new one would (drawing the same random numbers),
+    or builds a new instance when there is none to spare, which counts as a
+    miss. Entities that leave the game are handed back with release().
+    """
+
+    def __init__(self, cls):
+        self.cls = cls
+        self.free = []
+        self.live = 0
+        self.high_water = 0  # Most instances out at once
+        self.acquired = 0
+        self.misses = 0
+
+    def acquire(self, *args):
+        self.acquired += 1
+        if self.free:
+            entity = self.free.pop()
+            entity.__init__(*args)
+        else:
+            self.misses += 1
+            entity = self.cls(*args)
+        self.live += 1
+        if self.live > self.high_water:
+            self.high_water = self.live
+        return entity
+
+    def release(self, entities):
+        self.free.extend(entities)
+        self.live -= len(entities)
+
+    def reserve(self, count):
+        """Make sure `count` spare instances are ready, e.g. sized from the
+        high-water mark of an earlier run"""
+        for _ in range(count - len(self.free)):
+            # Initialised on acquire
+            self.free.append(self.cls.__new__(self.cls))
+
+    def stats(self):
+        return {
+            "live": self.live,
+            "free": len(self.free),
+            "high_water": self.high_water,
+            "acquired": self.acquired,
+            "misses": self.misses,
+        }
+
+
+def reuse_rect(entity, x, y, width, height):
+    """entity's hitbox Rect moved in place to (x, y, width, height), or a new
+    one for an instance that has none yet, so a recycled entity allocates no
+    Rect when __init__ runs again"""
+    rect = getattr(entity, "rect", None)
+    if rect is None:
+        return pygame.Rect(x, y, width, height)
+    rect.update(x, y, width, height)
+    return rect
@@ -0,0 +1,165 @@
+import time
+from collections import deque
+
+import pygame
+
+from constants import WHITE, GREEN, RED, YELLOW, GRAY
+from fonts import get_font
+from game_clock import FRAME_MS
+
+# Frames the rolling averages and the sparkline cover
+WINDOW = 120
+
+# The panel text is rebuilt this often, slow enough to read
+REFRESH_FRAMES = 15
+
+PANEL_X = 600
+PANEL_Y = 10
+PANEL_WIDTH = 390
+LINE_HEIGHT = 16
+SPARKLINE_HEIGHT = 40
+SPARKLINE_MAX_MS = 2 * FRAME_MS
+
+
+class FrameProfiler:
+    """Rolling per-phase frame timings for the F3 overlay.
+
+    The frame is split into sections with lap(name), which charges the time
+    since the previous lap (or mark) to that section. Every call returns
+    straight away while the overlay is hidden.
+    """
+
+    def __init__(self, window=WINDOW):
+        self.enabled = False
+        self.window = window
+        self.sections = {}  # Section name -> ms per frame over the window
+        self.frame_laps = {}
+        self.frame_counts = {}
+        self.counts = {}  # Counter name -> value for the last frame
+        self.frame_times = deque(maxlen=window)
+        self.frame_start = 0
+        self.last_lap = 0
+        self.frames = 0
+        self.panel = None
+
+    def toggle(self):
+        self.enabled = not self.enabled
+        self.sections.clear()
+        self.frame_times.clear()
+        self.counts = {}
+        self.frames = 0
+        self.panel = None
+
+    def begin_frame(self):
+        if not self.enabled:
+            return
+        self.frame_start = self.last_lap = time.perf_counter()
+        self.frame_laps = {}
+        self.frame_counts = {}
+
+    def mark(self):
+        """Restart the lap timer without charging anything to a section"""
+        if not self.enabled:
+            return
+        self.last_lap = time.perf_counter()
+
+    def lap(self, name):
+        if not self.enabled:
+            return
+        now = time.perf_counter()
+        self.frame_laps[name] = self.frame_laps.get(name, 0) + now - self.last_lap
+        self.last_lap = now
+
+    def count(self, name, value):
+        """Add to a per-frame counter, e.g. collision pair tests"""
+        if not self.enabled:
+            return
+        self.frame_counts[name] = self.frame_counts.get(name, 0) + value
+
+    def end_frame(self, entity_counts):
+        """Close the frame; entity_counts() is only called while shown"""
+        if not self.enabled:
+            return
+        self.frame_times.append((time.perf_counter() - self.frame_start) * 1000)
+        if any(name not in self.sections for name in self.frame_laps):
+            # Keep sections in the order this frame ran them
+            order = list(self.frame_laps)
+            order += [name for name in self.sections if name not in self.frame_laps]
+            self.sections = {
+                name: self.sections.get(name) or deque(maxlen=self.window)
+                for name in order
+            }
+        # Sections that did not run this frame (no simulation step was due)
+        # still take a sample, so every average covers the same frames
+        for name, samples in self.sections.items():
+            samples.append(self.frame_laps.get(name, 0) * 1000)
+        # Counters from the last frame that ran a simulation step stay shown
+        self.counts.update(entity_counts())
+        self.counts.update(self.frame_counts)
+
+        self.frames += 1
+        if self.panel is None or self.frames % REFRESH_FRAMES == 0:
+            self.panel = self._render_panel()
+
+    def averages(self):
+        """Mean ms per frame of each section over the window"""
+        return {
+            name: sum(samples) / len(samples) for name, samples in self.sections.items()
+        }
+
+    def _render_panel(self):
+        averages = self.averages()
+        frame_ms = sum(self.frame_times) / max(1, len(self.frame_times))
+        other = frame_ms - sum(averages.values())
+
+        # (label, value, color) cells, laid out one or two to a row
+        rows = [[(f"frame (budget {FRAME_MS:.1f})", f"{frame_ms:.2f} ms", WHITE)]]
+        rows += [[(name, f"{ms:.2f}", WHITE)] for name, ms in averages.items()]
+        rows.append([("other", f"{other:.2f}", GRAY)])
+        counts = [(name, str(value), YELLOW) for name, value in self.counts.items()]
+        rows += [counts[i : i + 2] for i in range(0, len(counts), 2)]
+
+        height = len(rows) * LINE_HEIGHT + SPARKLINE_HEIGHT + 15
+        panel = pygame.Surface((PANEL_WIDTH, height), pygame.SRCALPHA)
+        panel.fill((0, 0, 0, 180))
+        font = get_font(18)
+        column_width = (PANEL_WIDTH - 10) // 2
+        for i, row in enumerate(rows):
+            y = 5 + i * LINE_HEIGHT
+            # A lone cell spans the panel, two share it
+            width = PANEL_WIDTH - 10 if len(row) == 1 else column_width
+            for j, (label, value, color) in enumerate(row):
+                x = 5 + j * column_width
+                panel.blit(font.render(label, True, color), (x, y))
+                text = font.render(value, True, color)
+                panel.blit(text, (x + width - 10 - text.get_width(), y))
+        self._draw_sparkline(panel, height - SPARKLINE_HEIGHT - 5)
+        return panel
+
+    def _draw_sparkline(self, panel, top):
+        # One bar per frame, scaled so the budget line sits halfway up
+        scale = SPARKLINE_HEIGHT / SPARKLINE_MAX_MS
+        bar_width = (PANEL_WIDTH - 10) / self.window
+        bottom = top + SPARKLINE_HEIGHT
+        for i, ms in enumerate(self.frame_times):
+            bar_height = max(1, min(SPARKLINE_HEIGHT, round(ms * scale)))
+            x = 5 + int(i * bar_width)
+            color = GREEN if ms <= FRAME_MS else RED
+            pygame.draw.rect(
+                panel,
+                color,
+                (x, bottom - bar_height, max(1, int(bar_width)), bar_height),
+            )
+        budget_y = bottom - round(FRAME_MS * scale)
+        pygame.draw.line(panel, YELLOW, (5, budget_y), (PANEL_WIDTH - 5, budget_y))
+
+    def sprite(self):
+        """(panel, position) to blit, or None while hidden"""
+        if self.enabled and self.panel is not None:
+            return self.panel, (PANEL_X, PANEL_Y)
+        return None
+
+    def draw(self, surface):
+        sprite = self.sprite()
+        if sprite is not None:
+            surface.blit(*sprite)
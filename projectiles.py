@@ -0,0 +1,235 @@
+import numpy as np
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT, WHITE, YELLOW, CYAN
+from sprites import atlas
+from trig import cos_degrees, sin_degrees
+
+# Projectile kinds
+BULLET = 0
+PENETRATING_BULLET = 1
+RAIN_BULLET = 2
+
+# Per-kind properties, indexed by kind
+WIDTHS = (10, 20, 6)
+HEIGHTS = (4, 8, 12)
+SPEEDS = (10, 4, 8)  # Penetrating bullets are slower than regular bullets
+SPRITE_NAMES = ("bullet", "penetrating_bullet", "rain_bullet")
+
+
+# Per-projectile arrays of a ProjectileStore
+COLUMNS = ("x", "y", "prev_x", "prev_y", "vx", "vy", "kind", "alive", "ids")
+
+
+class ProjectileStore:
+    """Struct-of-arrays storage for every bullet the player has fired.
+
+    Live projectiles occupy the first `count` slots in the order they were
+    fired, so update, culling, collision and drawing all read the same arrays.
+    """
+
+    def __init__(self, capacity=256):
+        self.count = 0
+        self.next_id = 0
+        self.x = np.zeros(capacity)
+        self.y = np.zeros(capacity)
+        self.prev_x = np.zeros(capacity)  # Position before the last update,
+        self.prev_y = np.zeros(capacity)  # for interpolated drawing
+        self.vx = np.zeros(capacity)
+        self.vy = np.zeros(capacity)
+        self.kind = np.zeros(capacity, dtype=np.int8)
+        self.alive = np.zeros(capacity, dtype=bool)
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        # Projectile id -> enemies a penetrator hit: id(enemy), or (layer, store
+        # id) for an enemy kept in a store
+        self.enemies_hit = {}
+        self.hitbox = pygame.Rect(0, 0, 0, 0)  # Reused by get_rect()
+
+    def __len__(self):
+        return self.count
+
+    def _grow(self):
+        capacity = len(self.x) * 2
+        for name in COLUMNS:
+            column = getattr(self, name)
+            grown = np.zeros(capacity, dtype=column.dtype)
+            grown[: self.count] = column[: self.count]
+            setattr(self, name, grown)
+
+    def spawn(self, kind, x, y, vel_x, vel_y):
+        if self.count == len(self.x):
+            self._grow()
+        i = self.count
+        self.x[i] = x
+        self.y[i] = y
+        self.prev_x[i] = x
+        self.prev_y[i] = y
+        self.vx[i] = vel_x
+        self.vy[i] = vel_y
+        self.kind[i] = kind
+        self.alive[i] = True
+        self.ids[i] = self.next_id
+        if kind == PENETRATING_BULLET:
+            self.enemies_hit[self.next_id] = set()
+        self.next_id += 1
+        self.count += 1
+
+    def fire(self, kind, x, y, angle=0):
+        """Spawn a projectile travelling at its kind's speed along angle (whole
+        degrees)"""
+        speed = SPEEDS[kind]
+        self.spawn(
+            kind,
+            x,
+            y,
+            speed * cos_degrees(angle),
+            speed * sin_degrees(angle),
+        )
+
+    def drop(self, x, y):
+        """Spawn a rain bullet falling straight down"""
+        self.spawn(RAIN_BULLET, x, y, 0, SPEEDS[RAIN_BULLET])
+
+    def kill(self, i):
+        self.alive[i] = False
+
+    def clear(self, kind=None):
+        if kind is None:
+            self.alive[: self.count] = False
+        else:
+            self.alive[: self.count] &= self.kind[: self.count] != kind
+        self.sweep()
+
+    def forget(self, keys):
+        """Drop enemies that left the game, by the keys their hits were
+        recorded under, from every penetrator's hits, so that a new enemy with
+        the same key can be hit"""
+        if not self.enemies_hit:
+            return
+        for enemies_hit in self.enemies_hit.values():
+            if enemies_hit:
+                enemies_hit -= keys
+
+    def update(self):
+        n = self.count
+        if n == 0:
+            return
+        x = self.x[:n]
+        y = self.y[:n]
+        self.prev_x[:n] = x
+        self.prev_y[:n] = y
+        x += self.vx[:n]
+        y += self.vy[:n]
+
+        # Bullets are culled as soon as they leave the screen, not by
+        # world.outside(): they only fly away from it, and wider bounds would
+        # let them hit enemies that have not come on screen yet. Rain falls in
+        # from above and may land on a boss hanging off the right edge, so
+        # only its bottom edge culls
+        off_screen = (y > SCREEN_HEIGHT) | (
+            (self.kind[:n] != RAIN_BULLET) & ((x > SCREEN_WIDTH) | (y < 0))
+        )
+        self.alive[:n] &= ~off_screen
+        self.sweep()
+
+    def sweep(self):
+        """Compact live projectiles to the front, keeping their firing order"""
+        n = self.count
+        alive = self.alive[:n]
+        if alive.all():
+            return
+
+        if self.enemies_hit:
+            dead = ~alive & (self.kind[:n] == PENETRATING_BULLET)
+            for projectile_id in self.ids[:n][dead].tolist():
+                del self.enemies_hit[projectile_id]
+
+        kept = int(np.count_nonzero(alive))
+        for name in ("x", "y", "prev_x", "prev_y", "vx", "vy", "kind", "ids"):
+            column = getattr(self, name)
+            column[:kept] = column[:n][alive]
+        self.alive[:kept] = True
+        self.alive[kept:n] = False
+        self.count = kept
+
+    def indices(self, kind=None, exclude=None):
+        """Indices of live projectiles in firing order, optionally filtered"""
+        if self.count == 0:
+            return []
+        mask = self.alive[: self.count].copy()
+        if kind is not None:
+            mask &= self.kind[: self.count] == kind
+        if exclude is not None:
+            mask &= self.kind[: self.count] != exclude
+        return np.flatnonzero(mask).tolist()
+
+    def get_rect(self, i):
+        """Hitbox of projectile i, valid until the next call"""
+        kind = self.kind[i]
+        self.hitbox.update(self.x[i], self.y[i], WIDTHS[kind], HEIGHTS[kind])
+        return self.hitbox
+
+    def live_ids(self):
+        return self.ids[: self.count][self.alive[: self.count]].tolist()
+
+    def sprites(self, alpha=1.0):
+        """Returns (surface, position) pairs for every live projectile, drawn
+        `alpha` of the way from its previous position to its current one"""
+        n = self.count
+        live = self.alive[:n]
+        kinds = self.kind[:n][live]
+        images = []
+        offsets_x = []
+        offsets_y = []
+        for name in SPRITE_NAMES:
+            image, (dx, dy) = atlas.get((name,))
+            images.append(image)
+            offsets_x.append(dx)
+            offsets_y.append(dy)
+
+        xs = self.x[:n][live]
+        ys = self.y[:n][live]
+        if alpha < 1:
+            xs = xs - (xs - self.prev_x[:n][live]) * (1 - alpha)
+            ys = ys - (ys - self.prev_y[:n][live]) * (1 - alpha)
+        xs = xs.astype(int) + np.take(offsets_x, kinds)
+        ys = ys.astype(int) + np.take(offsets_y, kinds)
+        return list(
+            zip(
+                [images[kind] for kind in kinds.tolist()],
+                zip(xs.tolist(), ys.tolist()),
+            )
+        )
+
+    def draw(self, screen, alpha=1.0):
+        screen.blits(self.sprites(alpha), doreturn=False)
+
+
+def paint_bullet(surface, x, y):
+    pygame.draw.rect(surface, YELLOW, (x, y, WIDTHS[BULLET], HEIGHTS[BULLET]))
+
+
+def paint_penetrating_bullet(surface, x, y):
+    # Draw as a larger, purple/violet bullet with glow effect
+    width = WIDTHS[PENETRATING_BULLET]
+    height = HEIGHTS[PENETRATING_BULLET]
+    # Outer glow
+    pygame.draw.ellipse(surface, (150, 50, 255), (x - 2, y - 2, width + 4, height + 4))
+    # Main bullet
+    pygame.draw.ellipse(surface, (200, 100, 255), (x, y, width, height))
+    # Inner core
+    pygame.draw.ellipse(surface, WHITE, (x + 4, y + 2, width - 8, height - 4))
+
+
+def paint_rain_bullet(surface, x, y):
+    # Draw as a blue/cyan falling bullet
+    width = WIDTHS[RAIN_BULLET]
+    height = HEIGHTS[RAIN_BULLET]
+    pygame.draw.ellipse(surface, CYAN, (x, y, width, height))
+    # Add a white core
+    pygame.draw.ellipse(surface, WHITE, (x + 1, y + 2, width - 2, height - 4))
+
+
+atlas.register("bullet", paint_bullet)
+atlas.register("penetrating_bullet", paint_penetrating_bullet)
+atlas.register("rain_bullet", paint_rain_bullet)
@@ -0,0 +1,157 @@
+import json
+import zlib
+
+import pygame
+
+from game_clock import FRAME_MS
+
+# Held keys the simulation reads, stored as one bit each
+HELD_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+MAGIC = b"FBREPLAY 1\n"
+
+# Record kinds in the log body
+HELD = 0  # The set of held keys changed; value is the new bitmask
+PRESS = 1  # A key went down; value is the key code
+
+
+class KeyState:
+    """Pressed keys for driving a game without a keyboard, indexed like
+    pygame.key.get_pressed()"""
+
+    def __init__(self, pressed=()):
+        self.pressed = frozenset(pressed)
+
+    def __getitem__(self, key):
+        return key in self.pressed
+
+
+NO_KEYS = KeyState()
+
+
+def held_mask(keys):
+    mask = 0
+    for bit, key in enumerate(HELD_KEYS):
+        if keys[key]:
+            mask |= 1 << bit
+    return mask
+
+
+def write_varint(buffer, value):
+    while value >= 0x80:
+        buffer.append(value & 0x7F | 0x80)
+        value >>= 7
+    buffer.append(value)
+
+
+def read_varint(data, position):
+    value = 0
+    shift = 0
+    while True:
+        byte = data[position]
+        position += 1
+        value |= (byte & 0x7F) << shift
+        if byte < 0x80:
+            return value, position
+        shift += 7
+
+
+class Recorder:
+    """Logs the input of every simulation step of a game.
+
+    Only changes are stored: each record is the number of steps since the
+    previous record, its kind and a value, all varints, and the body is
+    compressed on save. An idle stretch of any length costs nothing.
+    """
+
+    def __init__(self, seed):
+        self.seed = seed
+        self.steps = 0
+        self.last_record = 0
+        self.mask = 0
+        self.body = bytearray()
+
+    def record(self, keys, key_presses):
+        mask = held_mask(keys)
+        if mask != self.mask:
+            self._add(HELD, mask)
+            self.mask = mask
+        for key in key_presses:
+            self._add(PRESS, key)
+        self.steps += 1
+
+    def _add(self, kind, value):
+        write_varint(self.body, self.steps - self.last_record)
+        self.body.append(kind)
+        write_varint(self.body, value)
+        self.last_record = self.steps
+
+    def save(self, path):
+        header = {
+            "seed": self.seed,
+            "steps": self.steps,
+            "frame_ms": FRAME_MS,
+        }
+        with open(path, "wb") as f:
+            f.write(MAGIC)
+            f.write(json.dumps(header).encode() + b"\n")
+            f.write(zlib.compress(bytes(self.body), 9))
+
+
+class Replay:
+    """A recorded game: its seed and the input of each simulation step"""
+
+    def __init__(self, seed, steps, body):
+        self.seed = seed
+        self.steps = steps
+        self.body = body
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as f:
+            if f.readline() != MAGIC:
+                raise ValueError(f"{path} is not a replay file")
+            header = json.loads(f.readline())
+            body = zlib.decompress(f.read())
+        if header["frame_ms"] != FRAME_MS:
+            raise ValueError(
+                f"{path} was recorded at {header['frame_ms']} ms per step, "
+                f"not {FRAME_MS}"
+            )
+        return cls(header["seed"], header["steps"], body)
+
+    def inputs(self):
+        """Yields (keys, key_presses) for every recorded step, in order"""
+        body = self.body
+        position = 0
+        next_record = None
+        if body:
+            delta, position = read_varint(body, position)
+            next_record = delta
+        keys = KeyState()
+        for step in range(self.steps):
+            key_presses = []
+            while next_record == step:
+                kind = body[position]
+                value, position = read_varint(body, position + 1)
+                if kind == HELD:
+                    keys = KeyState(
+                        key for bit, key in enumerate(HELD_KEYS) if value >> bit & 1
+                    )
+                else:
+                    key_presses.append(value)
+                if position < len(body):
+                    delta, position = read_varint(body, position)
+                    next_record += delta
+                else:
+                    next_record = None
+            yield keys, key_presses
+
+    def play(self, game, draw=False):
+        """Re-run every recorded step on a game made with this replay's seed,
+        as fast as possible"""
+        for keys, key_presses in self.inputs():
+            game.step(keys, key_presses)
+            if draw:
+                game.draw()
+        return game
@@ -0,0 +1,51 @@
+import heapq
+
+
+class Timer:
+    """A callback armed on a Scheduler; cancel() disarms it"""
+
+    __slots__ = ("deadline", "callback", "args")
+
+    def __init__(self, deadline, callback, args):
+        self.deadline = deadline
+        self.callback = callback
+        self.args = args
+
+    def cancel(self):
+        self.callback = None
+        self.args = ()
+
+
+class Scheduler:
+    """Timers kept in a min-heap by deadline, so a tick costs as much as the
+    timers that are due rather than every timer that is armed.
+
+    A timer fires on the first run() whose time is past its deadline, just as
+    a check of `now - start > delay` every tick would. Timers due on the same
+    run fire in deadline order, ties in the order they were armed. Cancelled
+    timers stay in the heap until their deadline comes round.
+    """
+
+    def __init__(self):
+        self.heap = []
+        self.armed = 0  # Timers armed so far, to break ties
+
+    def at(self, deadline, callback, *args):
+        """Arm callback(*args) to run once the time passes `deadline`"""
+        timer = Timer(deadline, callback, args)
+        heapq.heappush(self.heap, (deadline, self.armed, timer))
+        self.armed += 1
+        return timer
+
+    def run(self, now):
+        """Fire every timer due by `now`; returns how many fired"""
+        heap = self.heap
+        fired = 0
+        while heap and heap[0][0] < now:
+            timer = heapq.heappop(heap)[2]
+            callback, args = timer.callback, timer.args
+            if callback is not None:
+                timer.cancel()
+                callback(*args)
+                fired += 1
+        return fired
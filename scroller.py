@@ -1,37 +1,95 @@
+import argparse
+import sys
 import pygame
-import random
-import math
+import time
+from collections import namedtuple
 
-from monsters import Enemy, BossEnemy, FlyingEnemy, JumpingBoss
+from monsters import EnemyStore, BossEnemy, FlyingEnemy, JumpingBoss, Bomb
 from constants import (
     SCREEN_WIDTH,
     SCREEN_HEIGHT,
-    FPS,
     WHITE,
     BLACK,
     RED,
-    GREEN,
     BLUE,
     YELLOW,
-    GRAY,
     PURPLE,
     ORANGE,
-    DARK_GRAY,
     BROWN,
     CYAN,
 )
-from level import Level, Platform
-
-# Initialize Pygame
-pygame.init()
+from level import Level, SPAWN_ORDER, prewarm_backgrounds
+from collision import SpatialHash
+from fonts import render_text
+from hud import Hud
+from sprites import atlas
+from dirty_render import DirtyRenderer
+from profiler import FrameProfiler
+from pool import Pool, reuse_rect
+from scheduler import Scheduler
+from physics import Body
+from game_random import RandomStreams
+from balance import Balance
+from replay import NO_KEYS, Recorder, Replay
+from projectiles import ProjectileStore, BULLET, PENETRATING_BULLET, RAIN_BULLET
+from missiles import MissileStore
+from trig import phase, sin, step, sway
+from world import CULL_MARGIN, outside
+from game_clock import (
+    FRAME_MS,
+    MAX_RENDER_FPS,
+    MAX_STEPS_PER_FRAME,
+    SimulationClock,
+    system_clock,
+)
 
 
-class Player:
-    def __init__(self, x, y):
+class Player(Body):
+    __slots__ = (
+        "rect",
+        "hitbox_top",
+        "clock",
+        "timers",
+        "expiries",
+        "speed",
+        "jump_power",
+        "gravity",
+        "crouching",
+        "last_shot",
+        "shoot_delay",
+        "max_hp",
+        "hp",
+        "invulnerable",
+        "invulnerable_timer",
+        "invulnerable_duration",
+        "has_shotgun",
+        "shotgun_timer",
+        "shotgun_duration",
+        "has_machine_gun",
+        "machine_gun_timer",
+        "machine_gun_duration",
+        "has_penetrator",
+        "penetrator_timer",
+        "penetrator_duration",
+        "has_rain",
+        "rain_timer",
+        "rain_duration",
+    )
+    width = 40
+    height = 60
+
+    def __init__(self, x, y, clock=None, timers=None):
         self.x = x
         self.y = y
-        self.width = 40
-        self.height = 60
+        # Hitbox, moved to the current position in place by get_rect(). It
+        # only changes shape when the player crouches or stands up.
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
+        self.hitbox_top = 0  # Offset of the hitbox from y
+        self.clock = clock or system_clock
+        # Invulnerability and power-ups wear off on these timers, which the
+        # game runs every update
+        self.timers = timers or Scheduler()
+        self.expiries = {}  # Flag -> timer that clears it
         self.vel_x = 0
         self.vel_y = 0
         self.speed = 5
@@ -59,37 +117,9 @@ class Player:
         self.rain_timer = 0
         self.rain_duration = 10000  # 10 seconds
 
-    def update(self, keys, platforms, level=1):
-        # Handle invulnerability
-        if self.invulnerable:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.invulnerable_timer > self.invulnerable_duration:
-                self.invulnerable = False
-
-        # Handle shotgun power-up timer
-        if self.has_shotgun:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.shotgun_timer > self.shotgun_duration:
-                self.has_shotgun = False
-
-        # Handle machine gun power-up timer
-        if self.has_machine_gun:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.machine_gun_timer > self.machine_gun_duration:
-                self.has_machine_gun = False
-
-        # Handle penetrator power-up timer
-        if self.has_penetrator:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.penetrator_timer > self.penetrator_duration:
-                self.has_penetrator = False
-
-        # Handle rain power-up timer
-        if self.has_rain:
-            current_time = pygame.time.get_ticks()
-            if current_time - self.rain_timer > self.rain_duration:
-                self.has_rain = False
-
+    def update(self, keys, platforms, has_floor=True):
+        """One step of input and movement; platforms is a
+        physics.PlatformIndex"""
         # Horizontal movement
         self.vel_x = 0
         if keys[pygame.K_LEFT]:
@@ -102,52 +132,19 @@ class Player:
             self.vel_y = self.jump_power
             self.on_ground = False
 
-        # Crouching
-        self.crouching = keys[pygame.K_DOWN]
-
-        # Apply gravity
-        self.vel_y += self.gravity
-
-        # Update horizontal position
-        self.x += self.vel_x
+        # Crouching halves the hitbox, keeping its bottom edge in place
+        crouching = keys[pygame.K_DOWN]
+        if crouching != self.crouching:
+            height = self.height // 2 if crouching else self.height
+            self.rect.height = height
+            self.hitbox_top = self.height - height
+        self.crouching = crouching
 
-        # Check platform collisions for horizontal movement
-        player_rect = self.get_rect()
-        for platform in platforms:
-            if player_rect.colliderect(platform.get_rect()):
-                if self.vel_x > 0:  # Moving right
-                    self.x = platform.x - self.width
-                elif self.vel_x < 0:  # Moving left
-                    self.x = platform.x + platform.width
-
-        # Update vertical position
-        self.y += self.vel_y
-
-        # Check platform collisions for vertical movement
-        player_rect = self.get_rect()
-        self.on_ground = False
-
-        for platform in platforms:
-            if player_rect.colliderect(platform.get_rect()):
-                if self.vel_y > 0:  # Falling down
-                    self.y = platform.y - self.get_rect().height
-                    self.vel_y = 0
-                    self.on_ground = True
-                elif self.vel_y < 0:  # Jumping up
-                    self.y = platform.y + platform.height
-                    self.vel_y = 0
-
-        # Ground collision (check if level has floor)
-        if level != 6:  # Keep original logic for now, will be improved later
-            ground_y = SCREEN_HEIGHT - 100
-            if self.y + self.height >= ground_y:
-                self.y = ground_y - self.height
-                self.vel_y = 0
-                self.on_ground = True
-        else:
-            # Level 6 has no floor - player dies if they fall off screen
-            if self.y > SCREEN_HEIGHT:
-                self.hp = 0  # Kill player if they fall off
+        # Fall, run into platforms and land on the ground (if the level has a
+        # floor)
+        self.move(platforms, SCREEN_HEIGHT - 100 if has_floor else None)
+        if not has_floor and self.y > SCREEN_HEIGHT:
+            self.hp = 0  # Kill player if they fall off
 
         # Screen boundaries
         if self.x < 0:
@@ -159,31 +156,50 @@ class Player:
         if not self.invulnerable:
             self.hp -= damage
             self.invulnerable = True
-            self.invulnerable_timer = pygame.time.get_ticks()
+            self.invulnerable_timer = self.clock.get_ticks()
+            self.expire(
+                "invulnerable", self.invulnerable_timer, self.invulnerable_duration
+            )
             return True
         return False
 
     def is_alive(self):
         return self.hp > 0
 
+    def expire(self, flag, start, duration):
+        """Clear the flag once `duration` ms have passed since `start`,
+        instead of whenever an earlier call said"""
+        timer = self.expiries.get(flag)
+        if timer is not None:
+            timer.cancel()
+        self.expiries[flag] = self.timers.at(
+            start + duration, setattr, self, flag, False
+        )
+
     def pickup_shotgun(self):
         self.has_shotgun = True
-        self.shotgun_timer = pygame.time.get_ticks()
+        self.shotgun_timer = self.clock.get_ticks()
+        self.expire("has_shotgun", self.shotgun_timer, self.shotgun_duration)
 
     def pickup_machine_gun(self):
         self.has_machine_gun = True
-        self.machine_gun_timer = pygame.time.get_ticks()
+        self.machine_gun_timer = self.clock.get_ticks()
+        self.expire(
+            "has_machine_gun", self.machine_gun_timer, self.machine_gun_duration
+        )
 
     def pickup_penetrator(self):
         self.has_penetrator = True
-        self.penetrator_timer = pygame.time.get_ticks()
+        self.penetrator_timer = self.clock.get_ticks()
+        self.expire("has_penetrator", self.penetrator_timer, self.penetrator_duration)
 
     def pickup_rain(self):
         self.has_rain = True
-        self.rain_timer = pygame.time.get_ticks()
+        self.rain_timer = self.clock.get_ticks()
+        self.expire("has_rain", self.rain_timer, self.rain_duration)
 
-    def shoot(self):
-        current_time = pygame.time.get_ticks()
+    def shoot(self, projectiles):
+        current_time = self.clock.get_ticks()
 
         # Determine shoot delay based on active power-ups
         effective_delay = self.shoot_delay
@@ -192,7 +208,6 @@ class Player:
 
         if current_time - self.last_shot > effective_delay:
             self.last_shot = current_time
-            bullets = []
 
             if self.has_rain and not self.has_machine_gun:
                 # Rain - shoot 10 bullets falling from above, spread out more
@@ -201,83 +216,98 @@ class Player:
                     # Double the spacing (8 pixels apart instead of 4)
                     bullet_x = player_front_x + (i * 8)
                     bullet_y = -20  # Start above screen
-                    bullets.append(RainBullet(bullet_x, bullet_y))
+                    projectiles.drop(bullet_x, bullet_y)
             elif self.has_penetrator and not self.has_machine_gun:
                 # Penetrator - shoot 2 large penetrating bullets with horizontal offset
                 bullet_x1 = self.x + self.width
                 bullet_x2 = self.x + self.width + 10  # Horizontal offset
                 bullet_y1 = self.y + self.height // 2 - 8
                 bullet_y2 = self.y + self.height // 2 + 8
-                bullets.append(PenetratingBullet(bullet_x1, bullet_y1, 0))
-                bullets.append(PenetratingBullet(bullet_x2, bullet_y2, 0))
+                projectiles.fire(PENETRATING_BULLET, bullet_x1, bullet_y1, 0)
+                projectiles.fire(PENETRATING_BULLET, bullet_x2, bullet_y2, 0)
             elif self.has_shotgun and not self.has_machine_gun:
                 # Shotgun - shoot 5 bullets in a cone
                 bullet_x = self.x + self.width
                 bullet_y = self.y + self.height // 2
 
                 # Center bullet
-                bullets.append(Bullet(bullet_x, bullet_y, 0))
-                bullets.append(Bullet(bullet_x, bullet_y, -15))
-                bullets.append(Bullet(bullet_x, bullet_y, -5))
-                bullets.append(Bullet(bullet_x, bullet_y, 5))
-                bullets.append(Bullet(bullet_x, bullet_y, 15))
+                projectiles.fire(BULLET, bullet_x, bullet_y, 0)
+                projectiles.fire(BULLET, bullet_x, bullet_y, -15)
+                projectiles.fire(BULLET, bullet_x, bullet_y, -5)
+                projectiles.fire(BULLET, bullet_x, bullet_y, 5)
+                projectiles.fire(BULLET, bullet_x, bullet_y, 15)
             else:
                 # Normal single bullet (or machine gun single bullet)
                 bullet_x = self.x + self.width
                 bullet_y = self.y + self.height // 2
-                bullets.append(Bullet(bullet_x, bullet_y, 0))
-
-            return bullets
-        return []
+                projectiles.fire(BULLET, bullet_x, bullet_y, 0)
 
-    def auto_shoot_machine_gun(self):
+    def auto_shoot_machine_gun(self, projectiles):
         """Automatically fires machine gun without needing spacebar"""
         if not self.has_machine_gun:
-            return []
+            return
 
-        current_time = pygame.time.get_ticks()
+        current_time = self.clock.get_ticks()
         if current_time - self.last_shot > 10:  # Very fast automatic firing
             self.last_shot = current_time
             bullet_x = self.x + self.width
             bullet_y = self.y + self.height // 2
-            return [Bullet(bullet_x, bullet_y, 0)]
-        return []
+            projectiles.fire(BULLET, bullet_x, bullet_y, 0)
 
     def get_rect(self):
-        height = self.height // 2 if self.crouching else self.height
-        y = self.y + (self.height - height)
-        return pygame.Rect(self.x, y, self.width, height)
+        rect = self.rect
+        rect.update(self.x, self.y + self.hitbox_top, self.width, rect.height)
+        return rect
 
-    def draw(self, screen):
-        rect = self.get_rect()
+    def sprite(self):
         # Flash red when invulnerable
-        if self.invulnerable and pygame.time.get_ticks() % 200 < 100:
-            pygame.draw.rect(screen, (255, 100, 100), rect)
+        flashing = self.invulnerable and self.clock.get_ticks() % 200 < 100
+        key = (
+            "player",
+            self.crouching,
+            flashing,
+            self.has_machine_gun,
+            self.has_penetrator,
+            self.has_shotgun,
+        )
+        return atlas.place(key, self.x, self.y)
+
+    def draw(self, screen):
+        screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(
+        surface, x, y, crouching, flashing, has_machine_gun, has_penetrator, has_shotgun
+    ):
+        height = Player.height // 2 if crouching else Player.height
+        rect = (x, y + (Player.height - height), Player.width, height)
+        if flashing:
+            pygame.draw.rect(surface, (255, 100, 100), rect)
         else:
             # Change color based on active power-ups
-            if self.has_machine_gun:
+            if has_machine_gun:
                 color = RED  # Red for machine gun
-            elif self.has_penetrator:
+            elif has_penetrator:
                 color = (150, 50, 255)  # Purple for penetrator
-            elif self.has_shotgun:
+            elif has_shotgun:
                 color = CYAN  # Cyan for shotgun
             else:
                 color = BLUE  # Default blue
-            pygame.draw.rect(screen, color, rect)
+            pygame.draw.rect(surface, color, rect)
 
         # Draw gun (different appearance based on active power-ups)
-        gun_x = self.x + self.width
-        gun_y = self.y + self.height // 2
+        gun_x = x + Player.width
+        gun_y = y + Player.height // 2
 
-        if self.has_machine_gun:
+        if has_machine_gun:
             gun_color = YELLOW  # Bright yellow for machine gun
             gun_width = 30
             gun_height = 10
-        elif self.has_penetrator:
+        elif has_penetrator:
             gun_color = (200, 100, 255)  # Purple for penetrator
             gun_width = 28
             gun_height = 12
-        elif self.has_shotgun:
+        elif has_shotgun:
             gun_color = ORANGE  # Orange for shotgun
             gun_width = 25
             gun_height = 8
@@ -286,403 +316,635 @@ class Player:
             gun_width = 20
             gun_height = 6
 
-        if self.has_penetrator:
+        if has_penetrator:
             # Draw dual barrels for penetrator
             barrel_height = 4
             pygame.draw.rect(
-                screen, gun_color, (gun_x, gun_y - 8, gun_width, barrel_height)
+                surface, gun_color, (gun_x, gun_y - 8, gun_width, barrel_height)
             )
             pygame.draw.rect(
-                screen, gun_color, (gun_x, gun_y + 4, gun_width, barrel_height)
+                surface, gun_color, (gun_x, gun_y + 4, gun_width, barrel_height)
             )
         else:
             pygame.draw.rect(
-                screen,
+                surface,
                 gun_color,
                 (gun_x, gun_y - gun_height // 2, gun_width, gun_height),
             )
 
 
-class Bullet:
-    def __init__(self, x, y, angle=0):
-        self.x = x
-        self.y = y
-        self.width = 10
-        self.height = 4
-        self.speed = 10
-        self.angle = angle  # Angle in degrees
-        self.vel_x = self.speed * math.cos(math.radians(angle))
-        self.vel_y = self.speed * math.sin(math.radians(angle))
-
-    def update(self):
-        self.x += self.vel_x
-        self.y += self.vel_y
-
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
-
-    def draw(self, screen):
-        pygame.draw.rect(screen, YELLOW, self.get_rect())
-
-
-class PenetratingBullet:
-    def __init__(self, x, y, angle=0):
-        self.x = x
-        self.y = y
-        self.width = 20
-        self.height = 8
-        self.speed = 4  # Slower than regular bullets
-        self.angle = angle  # Angle in degrees
-        self.vel_x = self.speed * math.cos(math.radians(angle))
-        self.vel_y = self.speed * math.sin(math.radians(angle))
-        self.enemies_hit = []  # Track enemies hit for penetration
-
-    def update(self):
-        self.x += self.vel_x
-        self.y += self.vel_y
-
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
-
-    def draw(self, screen):
-        # Draw as a larger, purple/violet bullet with glow effect
-        center_x = int(self.x + self.width // 2)
-        center_y = int(self.y + self.height // 2)
-
-        # Outer glow
-        pygame.draw.ellipse(
-            screen,
-            (150, 50, 255),
-            (self.x - 2, self.y - 2, self.width + 4, self.height + 4),
-        )
-        # Main bullet
-        pygame.draw.ellipse(screen, (200, 100, 255), self.get_rect())
-        # Inner core
-        pygame.draw.ellipse(
-            screen, WHITE, (self.x + 4, self.y + 2, self.width - 8, self.height - 4)
-        )
-
-
-class RainBullet:
-    def __init__(self, x, y):
-        self.x = x
-        self.y = y
-        self.width = 6
-        self.height = 12
-        self.speed = 8
-
-    def update(self):
-        self.y += self.speed
-
-    def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
-
-    def draw(self, screen):
-        # Draw as a blue/cyan falling bullet
-        pygame.draw.ellipse(screen, CYAN, self.get_rect())
-        # Add a white core
-        core_rect = pygame.Rect(self.x + 1, self.y + 2, self.width - 2, self.height - 4)
-        pygame.draw.ellipse(screen, WHITE, core_rect)
-
-
 class PowerUp:
+    __slots__ = (
+        "x",
+        "y",
+        "rect",
+        "power_type",
+        "collected",
+        "bob_phase",
+        "original_y",
+    )
+    width = 30
+    height = 30
+    bob_amplitude = 5
+    bob_step = step(0.1)
+
     def __init__(self, x, y, power_type="shotgun"):
         self.x = x
         self.y = y
-        self.width = 30
-        self.height = 30
+        self.rect = reuse_rect(self, x, y, self.width, self.height)
         self.power_type = power_type
         self.collected = False
-        self.bob_timer = 0
-        self.bob_amplitude = 5
+        self.bob_phase = phase(0)
         self.original_y = y
 
     def update(self):
         # Make the power-up bob up and down
-        self.bob_timer += 0.1
-        self.y = self.original_y + math.sin(self.bob_timer) * self.bob_amplitude
+        self.bob_phase += self.bob_step
+        self.y = self.original_y + sin(self.bob_phase) * self.bob_amplitude
 
     def get_rect(self):
-        return pygame.Rect(self.x, self.y, self.width, self.height)
+        self.rect.update(self.x, self.y, self.width, self.height)
+        return self.rect
+
+    def sprite(self):
+        return atlas.place(("powerup", self.power_type), self.x, self.y)
 
     def draw(self, screen):
         if not self.collected:
-            center_x = int(self.x + self.width // 2)
-            center_y = int(self.y + self.height // 2)
-
-            if self.power_type == "shotgun":
-                # Draw shotgun power-up
-                # Outer glow
-                for i in range(3):
-                    glow_color = (100 + i * 50, 200 + i * 20, 255)
-                    pygame.draw.circle(
-                        screen, glow_color, (center_x, center_y), 18 - i * 3
-                    )
-
-                # Main icon (shotgun shape)
-                pygame.draw.rect(screen, ORANGE, (center_x - 8, center_y - 3, 16, 6))
-                pygame.draw.rect(screen, BROWN, (center_x - 12, center_y - 2, 4, 4))
-
-                # "S" for shotgun
-                font = pygame.font.Font(None, 20)
-                text = font.render("S", True, WHITE)
-                text_rect = text.get_rect(center=(center_x, center_y))
-                screen.blit(text, text_rect)
-
-            elif self.power_type == "machine_gun":
-                # Draw machine gun power-up
-                # Outer glow (red/yellow theme)
-                for i in range(3):
-                    glow_color = (255, 200 - i * 30, 50 + i * 20)
-                    pygame.draw.circle(
-                        screen, glow_color, (center_x, center_y), 18 - i * 3
-                    )
-
-                # Main icon (machine gun shape - longer barrel)
-                pygame.draw.rect(screen, YELLOW, (center_x - 10, center_y - 2, 20, 4))
-                pygame.draw.rect(screen, RED, (center_x - 12, center_y - 3, 4, 6))
-
-                # Draw small bullets/ammo indicator
-                for j in range(3):
-                    bullet_x = center_x - 6 + j * 4
-                    pygame.draw.circle(screen, WHITE, (bullet_x, center_y + 6), 1)
-
-                # "M" for machine gun
-                font = pygame.font.Font(None, 20)
-                text = font.render("M", True, WHITE)
-                text_rect = text.get_rect(center=(center_x, center_y))
-                screen.blit(text, text_rect)
-
-            elif self.power_type == "penetrator":
-                # Draw penetrator power-up
-                # Outer glow (purple/violet theme)
-                for i in range(3):
-                    glow_color = (150 + i * 30, 50 + i * 20, 255)
-                    pygame.draw.circle(
-                        screen, glow_color, (center_x, center_y), 18 - i * 3
-                    )
+            screen.blit(*self.sprite())
+
+    @staticmethod
+    def paint(surface, x, y, power_type):
+        center_x = x + PowerUp.width // 2
+        center_y = y + PowerUp.height // 2
+
+        if power_type == "shotgun":
+            # Draw shotgun power-up
+            # Outer glow
+            for i in range(3):
+                glow_color = (100 + i * 50, 200 + i * 20, 255)
+                pygame.draw.circle(
+                    surface, glow_color, (center_x, center_y), 18 - i * 3
+                )
 
-                # Main icon (dual barrel shape)
-                pygame.draw.rect(
-                    screen, (200, 100, 255), (center_x - 8, center_y - 4, 16, 3)
+            # Main icon (shotgun shape)
+            pygame.draw.rect(surface, ORANGE, (center_x - 8, center_y - 3, 16, 6))
+            pygame.draw.rect(surface, BROWN, (center_x - 12, center_y - 2, 4, 4))
+
+            # "S" for shotgun
+            text = render_text("S", 20, WHITE)
+            text_rect = text.get_rect(center=(center_x, center_y))
+            surface.blit(text, text_rect)
+
+        elif power_type == "machine_gun":
+            # Draw machine gun power-up
+            # Outer glow (red/yellow theme)
+            for i in range(3):
+                glow_color = (255, 200 - i * 30, 50 + i * 20)
+                pygame.draw.circle(
+                    surface, glow_color, (center_x, center_y), 18 - i * 3
                 )
-                pygame.draw.rect(
-                    screen, (200, 100, 255), (center_x - 8, center_y + 1, 16, 3)
+
+            # Main icon (machine gun shape - longer barrel)
+            pygame.draw.rect(surface, YELLOW, (center_x - 10, center_y - 2, 20, 4))
+            pygame.draw.rect(surface, RED, (center_x - 12, center_y - 3, 4, 6))
+
+            # Draw small bullets/ammo indicator
+            for j in range(3):
+                bullet_x = center_x - 6 + j * 4
+                pygame.draw.circle(surface, WHITE, (bullet_x, center_y + 6), 1)
+
+            # "M" for machine gun
+            text = render_text("M", 20, WHITE)
+            text_rect = text.get_rect(center=(center_x, center_y))
+            surface.blit(text, text_rect)
+
+        elif power_type == "penetrator":
+            # Draw penetrator power-up
+            # Outer glow (purple/violet theme)
+            for i in range(3):
+                glow_color = (150 + i * 30, 50 + i * 20, 255)
+                pygame.draw.circle(
+                    surface, glow_color, (center_x, center_y), 18 - i * 3
                 )
-                pygame.draw.rect(
-                    screen, (150, 50, 255), (center_x - 12, center_y - 3, 4, 6)
+
+            # Main icon (dual barrel shape)
+            pygame.draw.rect(
+                surface, (200, 100, 255), (center_x - 8, center_y - 4, 16, 3)
+            )
+            pygame.draw.rect(
+                surface, (200, 100, 255), (center_x - 8, center_y + 1, 16, 3)
+            )
+            pygame.draw.rect(
+                surface, (150, 50, 255), (center_x - 12, center_y - 3, 4, 6)
+            )
+
+            # "P" for penetrator
+            text = render_text("P", 20, WHITE)
+            text_rect = text.get_rect(center=(center_x, center_y))
+            surface.blit(text, text_rect)
+
+        elif power_type == "rain":
+            # Draw rain power-up
+            # Outer glow (blue/cyan theme)
+            for i in range(3):
+                glow_color = (50 + i * 30, 150 + i * 30, 255)
+                pygame.draw.circle(
+                    surface, glow_color, (center_x, center_y), 18 - i * 3
                 )
 
-                # "P" for penetrator
-                font = pygame.font.Font(None, 20)
-                text = font.render("P", True, WHITE)
-                text_rect = text.get_rect(center=(center_x, center_y))
-                screen.blit(text, text_rect)
-
-            elif self.power_type == "rain":
-                # Draw rain power-up
-                # Outer glow (blue/cyan theme)
-                for i in range(3):
-                    glow_color = (50 + i * 30, 150 + i * 30, 255)
-                    pygame.draw.circle(
-                        screen, glow_color, (center_x, center_y), 18 - i * 3
-                    )
+            # Main icon (rain drops falling)
+            for j in range(4):
+                drop_x = center_x - 6 + j * 4
+                drop_y = center_y - 6 + j * 2
+                pygame.draw.ellipse(surface, CYAN, (drop_x, drop_y, 3, 8))
+
+            # "R" for rain
+            text = render_text("R", 20, WHITE)
+            text_rect = text.get_rect(center=(center_x, center_y + 4))
+            surface.blit(text, text_rect)
+
+
+atlas.register(
+    "player",
+    Player.paint,
+    [
+        (crouching, flashing, has_machine_gun, has_penetrator, has_shotgun)
+        for crouching in (False, True)
+        for flashing in (False, True)
+        for has_machine_gun in (False, True)
+        for has_penetrator in (False, True)
+        for has_shotgun in (False, True)
+    ],
+)
+atlas.register(
+    "powerup",
+    PowerUp.paint,
+    [("shotgun",), ("machine_gun",), ("penetrator",), ("rain",)],
+)
 
-                # Main icon (rain drops falling)
-                for j in range(4):
-                    drop_x = center_x - 6 + j * 4
-                    drop_y = center_y - 6 + j * 2
-                    pygame.draw.ellipse(screen, CYAN, (drop_x, drop_y, 3, 8))
 
-                # "R" for rain
-                font = pygame.font.Font(None, 20)
-                text = font.render("R", True, WHITE)
-                text_rect = text.get_rect(center=(center_x, center_y + 4))
-                screen.blit(text, text_rect)
+# A kind of game object: the Game keeps every live one in a list named after
+# its layer, which is also its collision layer, or in a struct-of-arrays store
+# of that name, and runs the same systems over every archetype
+Archetype = namedtuple(
+    "Archetype",
+    [
+        "layer",
+        "cls",
+        "hazard",  # Hurts the player on contact
+        "consumed_on_contact",  # Used up when it hurts the player
+        "kill_score",  # Points for shooting it down; None if bullets pass by
+        "takes_hits",  # Loses health to each hit rather than dying to one
+        "pooled",  # Recycled through a pool.Pool, not left to the collector
+        "sways",  # Moves with move(), then sways with all the others at once
+        "cull_margin",  # See world.outside(); None if it is never culled
+        "attack",  # Game method that lets each one attack, or None
+        "stored",  # Kept in a store, an instance of cls, rather than a list
+    ],
+    defaults=(False, False, None, False, False, False, None, None, False),
+)
+
+# Every archetype, in the order they update. Hazards are registered for
+# collisions, and tested against the player, in this order too.
+ARCHETYPES = (
+    Archetype("powerups", PowerUp),
+    Archetype(
+        "enemies",
+        EnemyStore,
+        hazard=True,
+        consumed_on_contact=True,
+        kill_score=10,
+        cull_margin=0,
+        stored=True,
+    ),
+    Archetype(
+        "flying_enemies",
+        FlyingEnemy,
+        hazard=True,
+        consumed_on_contact=True,
+        kill_score=15,  # Flying enemies worth more points
+        pooled=True,
+        sways=True,
+        cull_margin=0,
+    ),
+    Archetype(
+        "boss_enemies",
+        BossEnemy,
+        hazard=True,
+        kill_score=50,  # Boss enemies worth much more points
+        takes_hits=True,
+        sways=True,
+        cull_margin=0,
+        attack="drop_bomb",
+    ),
+    Archetype(
+        "bombs",
+        Bomb,
+        hazard=True,
+        consumed_on_contact=True,
+        pooled=True,
+        # Dropped by bosses still coming on screen, and drift back in
+        cull_margin=CULL_MARGIN,
+    ),
+    Archetype(
+        "jumping_bosses",
+        JumpingBoss,
+        hazard=True,
+        kill_score=100,  # Jumping bosses worth even more points
+        takes_hits=True,
+        cull_margin=0,
+        attack="fire_missile",
+    ),
+)
+
+# Hazards that go through the collision grid, as objects or, for a stored
+# archetype, as slots of its store. Homing missiles are rows of a
+# missiles.MissileStore, tested against the player last.
+OBJECT_HAZARDS = tuple(a.layer for a in ARCHETYPES if a.hazard)
+HAZARD_LAYERS = OBJECT_HAZARDS + ("homing_missiles",)
+ENEMY_LAYERS = tuple(a.layer for a in ARCHETYPES if a.kill_score is not None)
+
+# Points awarded for destroying an enemy
+KILL_SCORES = {a.layer: a.kill_score for a in ARCHETYPES if a.kill_score is not None}
+
+# Enemies that take several hits (the bosses)
+TOUGH_LAYERS = {a.layer for a in ARCHETYPES if a.takes_hits}
+
+# Archetypes kept in a struct-of-arrays store, which recycles its own slots
+STORED_LAYERS = {a.layer for a in ARCHETYPES if a.stored}
+
+# Short-lived entities that are recycled through a pool.Pool rather than
+# left to the garbage collector
+POOLED_LAYERS = {a.layer: a.cls for a in ARCHETYPES if a.pooled}
+
+# Hazards that are used up when they hurt the player (bosses stay around)
+CONSUMED_ON_CONTACT = {a.layer for a in ARCHETYPES if a.consumed_on_contact}
+
+# Every layer of game objects, power-ups first
+LAYERS = ("powerups",) + HAZARD_LAYERS
+
+# Kinds of collision event
+PICKUP = "pickup"  # The player picked up a power-up
+HIT = "hit"  # A bullet was spent on an enemy
+PIERCE = "pierce"  # A penetrating bullet went through an enemy
+CONTACT = "contact"  # A hazard touched the player
+
+# Entity lists drawn between simulation steps, power-ups first
+INTERPOLATED_GROUPS = (
+    "powerups",
+    "enemies",
+    "flying_enemies",
+    "boss_enemies",
+    "jumping_bosses",
+    "bombs",
+)
+
+
+# Struct-of-arrays stores of game objects that are culled at the screen's edge,
+# by Game attribute
+STORE_LAYERS = (
+    ("projectiles",)
+    + tuple(a.layer for a in ARCHETYPES if a.stored)
+    + ("homing_missiles",)
+)
+
+# An entity that is culled at the edge of the screen and is still around after
+# this many ms has most likely been missed by the despawn stage
+STALE_AFTER = 60000
 
 
 class Game:
-    def __init__(self):
-        self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
-        pygame.display.set_caption("Side-Scrolling Shooter")
-        self.clock = pygame.time.Clock()
+    def __init__(
+        self,
+        render_mode="full",
+        headless=False,
+        clock=None,
+        seed=None,
+        balance=None,
+        check_despawns=False,
+    ):
+        # Game time only moves when step() advances it, in fixed FRAME_MS steps.
+        # A headless game never opens a window: it draws, if asked to, onto an
+        # offscreen surface
+        self.headless = headless
+        self.clock = clock or SimulationClock()
+        self.random = RandomStreams(seed)
+        self.balance = balance or Balance()
+        self.recorder = None  # A replay.Recorder logs every step's input
+        if headless:
+            pygame.font.init()
+            self.screen = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+        else:
+            pygame.init()
+            self.screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+            pygame.display.set_caption("Side-Scrolling Shooter")
+        atlas.prewarm()
+        if not headless:
+            prewarm_backgrounds(self.screen.get_size())
+
+        # "full" repaints and flips the whole screen each frame, "dirty" only
+        # pushes the rectangles that changed
+        if render_mode == "dirty":
+            if headless:
+                raise ValueError("Dirty rendering needs a display")
+            self.dirty_renderer = DirtyRenderer(self.screen)
+        elif render_mode == "full":
+            self.dirty_renderer = None
+        else:
+            raise ValueError(f"Unknown render mode: {render_mode}")
+        self.fps_clock = pygame.time.Clock()
+        self.profiler = FrameProfiler()
+        self.hud = Hud()
+        self.key_presses = []
         self.running = True
 
-        self.player = Player(50, SCREEN_HEIGHT - 160)
-        self.bullets = []
-        self.rain_bullets = []
-        self.enemies = []
-        self.flying_enemies = []
-        self.boss_enemies = []
-        self.jumping_bosses = []
-        self.homing_missiles = []
-        self.bombs = []
-        self.powerups = []
+        # Every timer of the game: spawns, power-ups, boss attacks and flashes
+        self.timers = Scheduler()
+        self.player = Player(50, SCREEN_HEIGHT - 160, self.clock, self.timers)
+        self.projectiles = ProjectileStore()
+        self.pools = {layer: Pool(cls) for layer, cls in POOLED_LAYERS.items()}
+        for archetype in ARCHETYPES:
+            # e.g. self.flying_enemies
+            setattr(self, archetype.layer, archetype.cls() if archetype.stored else [])
+        self.homing_missiles = MissileStore()
         self.score = 0
         self.level_number = 1
         self.max_level_reached = 1
-        self.enemy_spawn_timer = 0
-        self.flying_enemy_spawn_timer = 0
-        self.boss_enemy_spawn_timer = 0
-        self.jumping_boss_spawn_timer = 0
-        self.powerup_spawn_timer = 0
+        self.last_spawns = dict.fromkeys(SPAWN_ORDER, 0)  # Layer -> time
+        self.spawn_timers = {}  # Layer -> timer armed for its next spawn
+        self.spawns_due = []  # Layers whose spawn timer fired this update
         self.game_over = False
         self.level_transition = False
         self.level_transition_timer = 0
+        self.collision_grid = SpatialHash()
+        self.collision_events = []  # This tick's, reused from tick to tick
+        self.despawning = set()  # ids of entities to remove this update
+        # With check_despawns, id -> (layer, time first seen) of every live
+        # entity that should leave the screen, for stale_entities()
+        self.first_seen = {} if check_despawns else None
+        # and layer -> store id -> time first seen for the STORE_LAYERS
+        self.first_seen_in_stores = (
+            {layer: {} for layer in STORE_LAYERS} if check_despawns else None
+        )
+        self.last_audit = 0  # When audit_despawns() last ran
+        self.damage_taken = {}  # Damage source -> hit points lost to it
 
         # Create level object
-        self.current_level = Level(self.level_number)
-
-        # Font for UI
-        self.font = pygame.font.Font(None, 36)
+        self.current_level = Level(
+            self.level_number,
+            self.clock,
+            self.random,
+            self.balance,
+            self.pools,
+            self.timers,
+        )
+        self.schedule_spawns()
+        self.save_positions()
 
     def handle_events(self):
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 self.running = False
             elif event.type == pygame.KEYDOWN:
-                if event.key == pygame.K_SPACE:
-                    if not self.game_over and not self.level_transition:
-                        bullets = self.player.shoot()
-                        # Separate rain bullets from regular bullets
-                        for bullet in bullets:
-                            if isinstance(bullet, RainBullet):
-                                self.rain_bullets.append(bullet)
-                            else:
-                                self.bullets.append(bullet)
-                elif event.key == pygame.K_r and self.game_over:
-                    # Restart game
-                    self.restart_game()
+                if event.key == pygame.K_F3:
+                    self.profiler.toggle()
+                else:
+                    # Gameplay keys act on the next simulation step, so a
+                    # recording can replay them on exactly the same one
+                    self.key_presses.append(event.key)
+
+    def press_key(self, key):
+        if key == pygame.K_SPACE:
+            if not self.game_over and not self.level_transition:
+                self.player.shoot(self.projectiles)
+        elif key == pygame.K_r and self.game_over:
+            # Restart game
+            self.restart_game()
+
+    def step(self, keys=NO_KEYS, key_presses=(), milliseconds=FRAME_MS):
+        """Advance the simulation by one fixed step"""
+        if self.recorder is not None:
+            self.recorder.record(keys, key_presses)
+        if not self.headless:
+            # Only windowed games draw between steps
+            self.save_positions()
+        self.clock.advance(milliseconds)
+        for key in key_presses:
+            self.press_key(key)
+        self.update(keys)
+
+    def save_positions(self):
+        """Remember where everything is before a step, to interpolate from"""
+        self.previous_level = self.current_level
+        self.previous_positions = {
+            entity: (entity.x, entity.y)
+            for group in INTERPOLATED_GROUPS
+            if group not in STORED_LAYERS
+            for entity in getattr(self, group)
+        }
+        for layer in STORED_LAYERS:
+            getattr(self, layer).save_positions()
+        self.previous_positions[self.player] = (self.player.x, self.player.y)
+
+    def interpolate(self, entity, sprite, alpha):
+        """Shift an entity's sprite `alpha` of the way from its previous
+        position to its current one"""
+        previous = self.previous_positions.get(entity)
+        if alpha >= 1 or previous is None:
+            return sprite
+        image, (x, y) = sprite
+        previous_x, previous_y = previous
+        shown_x = entity.x - (entity.x - previous_x) * (1 - alpha)
+        shown_y = entity.y - (entity.y - previous_y) * (1 - alpha)
+        return image, (
+            x + int(shown_x) - int(entity.x),
+            y + int(shown_y) - int(entity.y),
+        )
 
     def restart_game(self):
-        self.player = Player(50, SCREEN_HEIGHT - 160)
-        self.bullets = []
-        self.rain_bullets = []
-        self.enemies = []
-        self.flying_enemies = []
-        self.boss_enemies = []
-        self.jumping_bosses = []
-        self.homing_missiles = []
-        self.bombs = []
-        self.powerups = []
+        self.timers = Scheduler()
+        self.player = Player(50, SCREEN_HEIGHT - 160, self.clock, self.timers)
+        self.projectiles.clear()
+        for layer in LAYERS:
+            self.discard(layer)
         self.score = self.max_level_reached * 100
         self.level_number = self.max_level_reached
-        self.enemy_spawn_timer = 0
-        self.flying_enemy_spawn_timer = 0
-        self.boss_enemy_spawn_timer = 0
-        self.jumping_boss_spawn_timer = 0
-        self.powerup_spawn_timer = 0
+        self.last_spawns = dict.fromkeys(SPAWN_ORDER, 0)
         self.game_over = False
         self.level_transition = False
         self.level_transition_timer = 0
-        self.current_level = Level(self.level_number)
-
-    def check_level_progression(self):
-        level_thresholds = {1: 75, 2: 175, 3: 500, 4: 1000, 5: 1500, 6: 2000}
-        health_bonuses = {2: 30, 3: 40, 4: 50, 5: 60, 6: 65, 7: 70}
-
-        for level, threshold in level_thresholds.items():
-            if self.score >= threshold and self.level_number == level:
-                self.level_number = level + 1
-                self.max_level_reached = max(self.max_level_reached, self.level_number)
-                self.level_transition = True
-                self.level_transition_timer = pygame.time.get_ticks()
-                self.current_level = Level(self.level_number)
-                # Clear existing enemies when transitioning
-                self.enemies.clear()
-                self.flying_enemies.clear()
-                self.boss_enemies.clear()
-                self.jumping_bosses.clear()
-                self.homing_missiles.clear()
-                self.bombs.clear()
-                self.powerups.clear()
-                self.rain_bullets.clear()
-                # Restore player health for new level
-                health_bonus = health_bonuses.get(self.level_number, 70)
-                self.player.hp = min(self.player.max_hp, self.player.hp + health_bonus)
-                # Reset player position to starting location
-                self.player.x = 50
-                self.player.y = SCREEN_HEIGHT - 160
-                self.player.vel_x = 0
-                self.player.vel_y = 0
-                break
-
-    def spawn_powerup(self):
-        if not self.current_level.powerups_enabled:
+        self.damage_taken = {}
+        self.current_level = Level(
+            self.level_number,
+            self.clock,
+            self.random,
+            self.balance,
+            self.pools,
+            self.timers,
+        )
+        self.schedule_spawns()
+
+    def reset(self, seed=None, level=1):
+        """Start a new game at `level` on a fresh clock and seed, keeping the
+        screen and caches; for headless games run back to back"""
+        # restart_game rebuilds everything that holds on to the clock or streams
+        self.clock = SimulationClock()
+        self.random = RandomStreams(seed)
+        self.max_level_reached = level
+        self.restart_game()
+
+    def release(self, layer, entities):
+        """Hand entities that left the game back to their layer's pool, if it
+        has one"""
+        if not entities:
+            return
+        if layer in ENEMY_LAYERS:
+            # Penetrating bullets remember enemies by id, which a new enemy
+            # (recycled or not) may reuse
+            self.projectiles.forget({id(entity) for entity in entities})
+        if self.first_seen is not None:
+            for entity in entities:
+                self.first_seen.pop(id(entity), None)
+        pool = self.pools.get(layer)
+        if pool is None:
             return
+        for entity in entities:
+            # A recycled entity must not be drawn sliding from where the old
+            # one was
+            self.previous_positions.pop(entity, None)
+        pool.release(entities)
+
+    def discard(self, layer):
+        """Remove every entity of a layer"""
+        entities = getattr(self, layer)
+        if layer in STORED_LAYERS:
+            self.forget_stored(layer, entities.clear())
+            return
+        self.release(layer, entities)
+        entities.clear()
 
-        current_time = pygame.time.get_ticks()
-        spawn_delay = self.current_level.get_spawn_delay("powerup_spawn_delay")
-        if current_time - self.powerup_spawn_timer > spawn_delay:
-            self.powerup_spawn_timer = current_time
+    def forget_stored(self, layer, ids):
+        """Let penetrating bullets forget the enemies of a stored layer that
+        left the game, by store id"""
+        if ids and layer in ENEMY_LAYERS:
+            self.projectiles.forget({(layer, store_id) for store_id in ids})
 
-            # Choose a random platform to spawn the power-up on
-            if self.current_level.platforms:
-                platform = random.choice(self.current_level.platforms)
-                powerup_x = platform.x + platform.width // 2 - 15  # Center on platform
-                powerup_y = platform.y - 35  # Above the platform
+    def pool_stats(self):
+        return {layer: pool.stats() for layer, pool in self.pools.items()}
 
-                # Randomly choose between shotgun, machine gun, penetrator, and rain
-                power_type = random.choice(
-                    ["shotgun", "machine_gun", "penetrator", "rain"]
+    def check_level_progression(self):
+        threshold = self.balance.level_thresholds.get(self.level_number)
+        if threshold is None or self.score < threshold:
+            return
+        self.level_number += 1
+        self.max_level_reached = max(self.max_level_reached, self.level_number)
+        self.level_transition = True
+        self.level_transition_timer = self.clock.get_ticks()
+        self.current_level = Level(
+            self.level_number,
+            self.clock,
+            self.random,
+            self.balance,
+            self.pools,
+            self.timers,
+        )
+        self.schedule_spawns()
+        # Clear existing enemies and power-ups when transitioning
+        for layer in LAYERS:
+            self.discard(layer)
+        self.projectiles.clear(RAIN_BULLET)
+        # Restore player health for new level
+        health_bonus = self.balance.health_bonus(self.level_number)
+        self.player.hp = min(self.player.max_hp, self.player.hp + health_bonus)
+        # Reset player position to starting location
+        self.player.x = 50
+        self.player.y = SCREEN_HEIGHT - 160
+        self.player.vel_x = 0
+        self.player.vel_y = 0
+
+    def schedule_spawns(self):
+        """Arm a spawn timer for everything the current level spawns, due its
+        spawn delay after the last spawn of that kind. Those already overdue
+        spawn at the end of this update."""
+        for timer in self.spawn_timers.values():
+            timer.cancel()
+        self.spawn_timers = {}
+        self.spawns_due.clear()
+        current_time = self.clock.get_ticks()
+        level = self.current_level
+        for layer in level.spawned_layers():
+            deadline = self.last_spawns[layer] + level.spawn_delay(layer)
+            if deadline < current_time:
+                self.spawns_due.append(layer)
+            else:
+                self.spawn_timers[layer] = self.timers.at(
+                    deadline, self.spawns_due.append, layer
                 )
-                powerup = PowerUp(powerup_x, powerup_y, power_type)
-                self.powerups.append(powerup)
 
-    def spawn_enemy(self):
-        current_time = pygame.time.get_ticks()
-        enemy, self.enemy_spawn_timer = self.current_level.spawn_enemy(
-            current_time, self.enemy_spawn_timer
-        )
-        if enemy:
-            self.enemies.append(enemy)
-
-    def spawn_flying_enemy(self):
-        current_time = pygame.time.get_ticks()
-        flying_enemy, self.flying_enemy_spawn_timer = (
-            self.current_level.spawn_flying_enemy(
-                current_time, self.flying_enemy_spawn_timer
+    def spawn_due(self):
+        """Spawn everything whose spawn timer has fired, in SPAWN_ORDER, and
+        arm the next spawn of each"""
+        due = self.spawns_due
+        current_time = self.clock.get_ticks()
+        level = self.current_level
+        for layer in SPAWN_ORDER:
+            if layer not in due:
+                continue
+            if layer == "powerups":
+                self.spawn_powerup()
+            else:
+                getattr(self, layer).append(level.spawn(layer))
+            self.last_spawns[layer] = current_time
+            self.spawn_timers[layer] = self.timers.at(
+                current_time + level.spawn_delay(layer), due.append, layer
             )
-        )
-        if flying_enemy:
-            self.flying_enemies.append(flying_enemy)
+        due.clear()
 
-    def spawn_boss_enemy(self):
-        current_time = pygame.time.get_ticks()
-        boss_enemy, self.boss_enemy_spawn_timer = self.current_level.spawn_boss_enemy(
-            current_time, self.boss_enemy_spawn_timer
-        )
-        if boss_enemy:
-            self.boss_enemies.append(boss_enemy)
-
-    def spawn_jumping_boss(self):
-        current_time = pygame.time.get_ticks()
-        jumping_boss, self.jumping_boss_spawn_timer = (
-            self.current_level.spawn_jumping_boss(
-                current_time, self.jumping_boss_spawn_timer
+    def spawn_powerup(self):
+        # Choose a random platform to spawn the power-up on
+        if self.current_level.platforms:
+            platform = self.random.powerups.choice(self.current_level.platforms)
+            powerup_x = platform.x + platform.width // 2 - 15  # Center on platform
+            powerup_y = platform.y - 35  # Above the platform
+
+            # Randomly choose between shotgun, machine gun, penetrator, and rain
+            power_type = self.random.powerups.choice(
+                ["shotgun", "machine_gun", "penetrator", "rain"]
             )
-        )
-        if jumping_boss:
-            self.jumping_bosses.append(jumping_boss)
+            powerup = PowerUp(powerup_x, powerup_y, power_type)
+            self.powerups.append(powerup)
 
-    def update(self):
+    def update(self, keys=None):
         if self.game_over:
             return
 
         # Handle level transition
         if self.level_transition:
-            current_time = pygame.time.get_ticks()
+            current_time = self.clock.get_ticks()
             if current_time - self.level_transition_timer > 2000:  # 3 second transition
                 self.level_transition = False
             return
 
-        keys = pygame.key.get_pressed()
-        self.player.update(keys, self.current_level.platforms, self.level_number)
+        profiler = self.profiler
+        profiler.mark()
+        # Power-ups wear off, boss attacks come due and spawns are queued
+        self.timers.run(self.clock.get_ticks())
+        profiler.lap("timers")
+
+        if keys is None:
+            keys = pygame.key.get_pressed()
+        hp = self.player.hp
+        self.player.update(
+            keys, self.current_level.platform_index, self.current_level.has_floor
+        )
+        if self.player.hp < hp:
+            # The only way to get hurt moving is falling off a floorless level
+            self.add_damage("fall", hp - self.player.hp)
 
         # Automatic machine gun firing
         if self.player.has_machine_gun:
-            auto_bullets = self.player.auto_shoot_machine_gun()
-            self.bullets.extend(auto_bullets)
+            self.player.auto_shoot_machine_gun(self.projectiles)
 
         # Check level progression
         self.check_level_progression()
@@ -691,638 +953,587 @@ class Game:
         if not self.player.is_alive():
             self.game_over = True
             return
+        profiler.lap("player")
 
-        # Update bullets
-        for bullet in self.bullets[:]:
-            bullet.update()
-            if bullet.x > SCREEN_WIDTH or bullet.y < 0 or bullet.y > SCREEN_HEIGHT:
-                self.bullets.remove(bullet)
-
-        # Update rain bullets
-        for rain_bullet in self.rain_bullets[:]:
-            rain_bullet.update()
-            if rain_bullet.y > SCREEN_HEIGHT:
-                self.rain_bullets.remove(rain_bullet)
-
-        # Update power-ups
-        for powerup in self.powerups[:]:
-            powerup.update()
-
-        # Update enemies
-        for enemy in self.enemies[:]:
-            enemy.update()
-            if enemy.x + enemy.width < 0:
-                self.enemies.remove(enemy)
-
-        # Update flying enemies
-        for flying_enemy in self.flying_enemies[:]:
-            flying_enemy.update()
-            if flying_enemy.x + flying_enemy.width < 0:
-                self.flying_enemies.remove(flying_enemy)
-
-        # Update boss enemies and their bombs
-        for boss_enemy in self.boss_enemies[:]:
-            boss_enemy.update()
-            if boss_enemy.x + boss_enemy.width < 0:
-                self.boss_enemies.remove(boss_enemy)
-            elif boss_enemy.can_drop_bomb():
-                bomb = boss_enemy.drop_bomb()
-                self.bombs.append(bomb)
-
-        # Update bombs
-        for bomb in self.bombs[:]:
-            bomb.update()
-            if bomb.y > SCREEN_HEIGHT:
-                self.bombs.remove(bomb)
-
-        # Update jumping bosses and their missiles
-        for jumping_boss in self.jumping_bosses[:]:
-            jumping_boss.update()
-            if jumping_boss.x + jumping_boss.width < 0:
-                self.jumping_bosses.remove(jumping_boss)
-            elif jumping_boss.can_fire_missile():
-                player_center_x = self.player.x + self.player.width // 2
-                player_center_y = self.player.y + self.player.height // 2
-                missile = jumping_boss.fire_missile(player_center_x, player_center_y)
-                self.homing_missiles.append(missile)
-
-        # Update homing missiles
+        # Update bullets and rain bullets, culling those that left the screen
+        self.projectiles.update()
+        profiler.lap("projectiles")
+
+        # Move every archetype, mark what left the game and let the rest attack
+        for archetype in ARCHETYPES:
+            self.update_archetype(archetype)
+            profiler.lap(archetype.layer)
+
+        # Steer every homing missile at the player in one pass, dropping the
+        # expired and far off-screen ones
         player_center_x = self.player.x + self.player.width // 2
         player_center_y = self.player.y + self.player.height // 2
-        for missile in self.homing_missiles[:]:
-            missile.update(player_center_x, player_center_y)
-            if (
-                missile.x < -50
-                or missile.x > SCREEN_WIDTH + 50
-                or missile.y < -50
-                or missile.y > SCREEN_HEIGHT + 50
-                or missile.is_expired()
+        self.homing_missiles.update([(player_center_x, player_center_y)])
+        profiler.lap("missiles")
+
+        self.check_collisions()
+
+        # Remove whatever left the game, was killed or was used up
+        self.despawn()
+        if self.first_seen is not None:
+            self.audit_despawns()
+        profiler.lap("despawn")
+
+        # Spawn enemies and power-ups
+        if self.spawns_due:
+            self.spawn_due()
+        profiler.lap("spawn")
+
+    def update_archetype(self, archetype):
+        """Move every entity of one archetype, then mark those that have gone
+        for despawning and let the others attack, in list order"""
+        layer = archetype.layer
+        entities = getattr(self, layer)
+        if archetype.stored:
+            # Killed in place and swept out by despawn()
+            entities.update(archetype.cull_margin)
+            return
+        if archetype.sways:
+            for entity in entities:
+                entity.move()
+            cls = archetype.cls
+            sway(entities, cls.sway_top, cls.sway_bottom)
+        margin = archetype.cull_margin
+        attack = getattr(self, archetype.attack) if archetype.attack else None
+        despawning = self.despawning
+        for entity in entities:
+            if not archetype.sways:
+                entity.update()
+            if margin is not None and outside(
+                entity.x, entity.y, entity.width, entity.height, margin
             ):
-                self.homing_missiles.remove(missile)
+                despawning.add(id(entity))
+            elif attack is not None:
+                attack(entity)
+
+    def drop_bomb(self, boss_enemy):
+        if boss_enemy.can_drop_bomb():
+            self.bombs.append(boss_enemy.drop_bomb(self.pools["bombs"]))
+
+    def fire_missile(self, jumping_boss):
+        if jumping_boss.can_fire_missile():
+            jumping_boss.fire_missile(self.homing_missiles)
+
+    def check_collisions(self):
+        """Find this tick's collisions, then resolve them"""
+        events = self.collision_events
+        events.clear()
+        self.detect_collisions(events)
+        self.resolve_collisions(events)
+
+    def detect_collisions(self, events):
+        """Append a (kind, layer, entity, index) event to `events` for every
+        collision, in the order they are to be resolved. `index` is the row of
+        the projectile or homing missile involved, if any.
+
+        Nothing is damaged here; an enemy just stops blocking bullets once
+        enough have hit it to kill it.
+        """
+        # Register every enemy, hazard and power-up once for this tick so each
+        # projectile only has to be tested against its neighbours
+        profiler = self.profiler
+        grid = self.collision_grid
+        grid.clear()
+        despawning = self.despawning
+        for archetype in ARCHETYPES:
+            layer = archetype.layer
+            if archetype.stored:
+                # A stored entity is its slot, for the rest of this update
+                for slot, rect in getattr(self, layer).hitboxes():
+                    grid.insert(slot, rect, layer)
+                continue
+            for entity in getattr(self, layer):
+                if despawning and id(entity) in despawning:
+                    continue  # Already gone
+                grid.insert(entity, entity.get_rect(), layer)
+        profiler.lap("collide: grid")
 
         # Check player-powerup collisions
         player_rect = self.player.get_rect()
-        for powerup in self.powerups[:]:
-            if player_rect.colliderect(powerup.get_rect()) and not powerup.collected:
-                powerup.collected = True
-                self.powerups.remove(powerup)
-                # Restore 25 hit points when picking up any power-up
-                self.player.hp = min(self.player.max_hp, self.player.hp + 25)
-                if powerup.power_type == "shotgun":
-                    self.player.pickup_shotgun()
-                elif powerup.power_type == "machine_gun":
-                    self.player.pickup_machine_gun()
-                elif powerup.power_type == "penetrator":
-                    self.player.pickup_penetrator()
-                elif powerup.power_type == "rain":
-                    self.player.pickup_rain()
-
-        # Check bullet-enemy collisions (ground enemies)
-        for bullet in self.bullets[:]:
-            for enemy in self.enemies[:]:
-                if bullet.get_rect().colliderect(enemy.get_rect()):
-                    # Handle penetrating bullets differently
-                    if isinstance(bullet, PenetratingBullet):
-                        # Check if this enemy was already hit by this bullet
-                        if enemy not in bullet.enemies_hit:
-                            bullet.enemies_hit.append(enemy)
-                            self.enemies.remove(enemy)
-                            self.score += 10
-                    else:
-                        # Regular bullet - remove both bullet and enemy
-                        self.bullets.remove(bullet)
-                        self.enemies.remove(enemy)
-                        self.score += 10
-                        break
-
-        # Check bullet-flying enemy collisions
-        for bullet in self.bullets[:]:
-            for flying_enemy in self.flying_enemies[:]:
-                if bullet.get_rect().colliderect(flying_enemy.get_rect()):
-                    # Handle penetrating bullets differently
-                    if isinstance(bullet, PenetratingBullet):
-                        # Check if this enemy was already hit by this bullet
-                        if flying_enemy not in bullet.enemies_hit:
-                            bullet.enemies_hit.append(flying_enemy)
-                            self.flying_enemies.remove(flying_enemy)
-                            self.score += 15  # Flying enemies worth more points
-                    else:
-                        # Regular bullet - remove both bullet and enemy
-                        self.bullets.remove(bullet)
-                        self.flying_enemies.remove(flying_enemy)
-                        self.score += 15  # Flying enemies worth more points
-                        break
-
-        # Check bullet-boss enemy collisions
-        for bullet in self.bullets[:]:
-            for boss_enemy in self.boss_enemies[:]:
-                if bullet.get_rect().colliderect(boss_enemy.get_rect()):
-                    # Handle penetrating bullets differently
-                    if isinstance(bullet, PenetratingBullet):
-                        # Check if this enemy was already hit by this bullet
-                        if boss_enemy not in bullet.enemies_hit:
-                            bullet.enemies_hit.append(boss_enemy)
-                            if (
-                                boss_enemy.take_damage()
-                            ):  # Returns True if boss is killed
-                                self.boss_enemies.remove(boss_enemy)
-                                self.score += 50  # Boss enemies worth much more points
-                    else:
-                        # Regular bullet - remove bullet
-                        self.bullets.remove(bullet)
-                        if boss_enemy.take_damage():  # Returns True if boss is killed
-                            self.boss_enemies.remove(boss_enemy)
-                            self.score += 50  # Boss enemies worth much more points
-                        break
-
-        # Check bullet-jumping boss collisions
-        for bullet in self.bullets[:]:
-            for jumping_boss in self.jumping_bosses[:]:
-                if bullet.get_rect().colliderect(jumping_boss.get_rect()):
-                    # Handle penetrating bullets differently
-                    if isinstance(bullet, PenetratingBullet):
-                        # Check if this enemy was already hit by this bullet
-                        if jumping_boss not in bullet.enemies_hit:
-                            bullet.enemies_hit.append(jumping_boss)
-                            if (
-                                jumping_boss.take_damage()
-                            ):  # Returns True if boss is killed
-                                self.jumping_bosses.remove(jumping_boss)
-                                self.score += (
-                                    100  # Jumping bosses worth even more points
-                                )
+        for _, powerup, layer, powerup_rect in grid.query(player_rect, ("powerups",)):
+            if player_rect.colliderect(powerup_rect) and not powerup.collected:
+                events.append((PICKUP, layer, powerup, None))
+        profiler.lap("collide: power-ups")
+
+        # Check bullet-enemy collisions, regular bullets before rain bullets
+        projectiles = self.projectiles
+        order = projectiles.indices(exclude=RAIN_BULLET)
+        order += projectiles.indices(kind=RAIN_BULLET)
+        hits_taken = {}  # id(enemy) -> hits on an enemy that takes several
+        for i in order:
+            bullet_rect = projectiles.get_rect(i)
+            enemies_hit = projectiles.enemies_hit.get(projectiles.ids[i])
+            for entry in grid.query(bullet_rect, ENEMY_LAYERS):
+                _, enemy, layer, enemy_rect = entry
+                if not bullet_rect.colliderect(enemy_rect):
+                    continue
+                if enemies_hit is not None:
+                    # Penetrating bullet - hits each enemy once on its way
+                    if layer in STORED_LAYERS:
+                        key = (layer, int(getattr(self, layer).ids[enemy]))
                     else:
-                        # Regular bullet - remove bullet
-                        self.bullets.remove(bullet)
-                        if jumping_boss.take_damage():  # Returns True if boss is killed
-                            self.jumping_bosses.remove(jumping_boss)
-                            self.score += 100  # Jumping bosses worth even more points
-                        break
-
-        # Check rain bullet-enemy collisions (ground enemies)
-        for rain_bullet in self.rain_bullets[:]:
-            for enemy in self.enemies[:]:
-                if rain_bullet.get_rect().colliderect(enemy.get_rect()):
-                    self.rain_bullets.remove(rain_bullet)
-                    self.enemies.remove(enemy)
-                    self.score += 10
-                    break
-
-        # Check rain bullet-flying enemy collisions
-        for rain_bullet in self.rain_bullets[:]:
-            for flying_enemy in self.flying_enemies[:]:
-                if rain_bullet.get_rect().colliderect(flying_enemy.get_rect()):
-                    self.rain_bullets.remove(rain_bullet)
-                    self.flying_enemies.remove(flying_enemy)
-                    self.score += 15
-                    break
-
-        # Check rain bullet-boss enemy collisions
-        for rain_bullet in self.rain_bullets[:]:
-            for boss_enemy in self.boss_enemies[:]:
-                if rain_bullet.get_rect().colliderect(boss_enemy.get_rect()):
-                    self.rain_bullets.remove(rain_bullet)
-                    if boss_enemy.take_damage():
-                        self.boss_enemies.remove(boss_enemy)
-                        self.score += 50
-                    break
-
-        # Check rain bullet-jumping boss collisions
-        for rain_bullet in self.rain_bullets[:]:
-            for jumping_boss in self.jumping_bosses[:]:
-                if rain_bullet.get_rect().colliderect(jumping_boss.get_rect()):
-                    self.rain_bullets.remove(rain_bullet)
-                    if jumping_boss.take_damage():
-                        self.jumping_bosses.remove(jumping_boss)
-                        self.score += 100
-                    break
-
-        # Check player-enemy collisions (ground enemies)
-        player_rect = self.player.get_rect()
-        for enemy in self.enemies[:]:
-            if player_rect.colliderect(enemy.get_rect()):
-                if self.player.take_damage(15):
-                    self.enemies.remove(enemy)
-
-        # Check player-flying enemy collisions
-        for flying_enemy in self.flying_enemies[:]:
-            if player_rect.colliderect(flying_enemy.get_rect()):
-                if self.player.take_damage(20):  # Flying enemies do more damage
-                    self.flying_enemies.remove(flying_enemy)
-
-        # Check player-boss enemy collisions
-        for boss_enemy in self.boss_enemies[:]:
-            if player_rect.colliderect(boss_enemy.get_rect()):
-                if self.player.take_damage(25):  # Boss enemies do most damage
-                    pass  # Don't remove boss enemy on collision
-
-        # Check player-bomb collisions
-        for bomb in self.bombs[:]:
-            if player_rect.colliderect(bomb.get_rect()):
-                if self.player.take_damage(25):
-                    self.bombs.remove(bomb)
-
-        # Check player-jumping boss collisions
-        for jumping_boss in self.jumping_bosses[:]:
-            if player_rect.colliderect(jumping_boss.get_rect()):
-                if self.player.take_damage(30):  # Jumping bosses do most damage
-                    pass  # Don't remove jumping boss on collision
-
-        # Check player-homing missile collisions
-        for missile in self.homing_missiles[:]:
-            if player_rect.colliderect(missile.get_rect()):
-                if self.player.take_damage(10):
-                    self.homing_missiles.remove(missile)
-
-        # Spawn enemies and power-ups
-        self.spawn_enemy()
-        self.spawn_flying_enemy()
-        self.spawn_boss_enemy()
-        self.spawn_jumping_boss()
-        self.spawn_powerup()
+                        key = id(enemy)
+                    if key in enemies_hit:
+                        continue
+                    enemies_hit.add(key)
+                    events.append((PIERCE, layer, enemy, i))
+                else:
+                    events.append((HIT, layer, enemy, i))
+
+                killed = True
+                if layer in TOUGH_LAYERS:
+                    hits = hits_taken.get(id(enemy), 0) + 1
+                    hits_taken[id(enemy)] = hits
+                    killed = hits >= enemy.health
+                if killed:
+                    grid.remove(entry)
+                if enemies_hit is None:
+                    break  # Regular bullet - spent on the first enemy
+        profiler.lap("collide: bullets")
+
+        # Check player-enemy and player-hazard collisions
+        for _, hazard, layer, hazard_rect in grid.query(player_rect, OBJECT_HAZARDS):
+            if player_rect.colliderect(hazard_rect):
+                events.append((CONTACT, layer, hazard, None))
+        for i in self.homing_missiles.hits(player_rect):
+            events.append((CONTACT, "homing_missiles", None, i))
+        profiler.lap("collide: player")
+        profiler.count("pair tests", grid.pair_tests)
+
+    def resolve_collisions(self, events):
+        """Apply collision events in order: power-up pick-ups, damage to
+        enemies and the player, scoring, and despawning whatever was used up
+        or killed, for the despawn stage"""
+        player = self.player
+        despawning = self.despawning
+        projectiles = self.projectiles
+        missiles = self.homing_missiles
+        contact_damage = self.balance.contact_damage
+        score = 0
+        for kind, layer, entity, index in events:
+            if kind == PICKUP:
+                entity.collected = True
+                despawning.add(id(entity))
+                # Restore 25 hit points when picking up any power-up
+                player.hp = min(player.max_hp, player.hp + 25)
+                if entity.power_type == "shotgun":
+                    player.pickup_shotgun()
+                elif entity.power_type == "machine_gun":
+                    player.pickup_machine_gun()
+                elif entity.power_type == "penetrator":
+                    player.pickup_penetrator()
+                elif entity.power_type == "rain":
+                    player.pickup_rain()
+            elif kind == CONTACT:
+                # Only the first contact hurts; it leaves the player invulnerable
+                damage = contact_damage[layer]
+                if player.take_damage(damage):
+                    self.add_damage(layer, damage)
+                    if index is not None:
+                        missiles.kill(index)
+                    elif layer in CONSUMED_ON_CONTACT:
+                        self.mark_despawn(layer, entity)
+            else:
+                if kind == HIT:
+                    projectiles.kill(index)
+                if layer in TOUGH_LAYERS:
+                    killed = entity.take_damage()  # Returns True if boss is killed
+                else:
+                    killed = True
+                if killed:
+                    self.mark_despawn(layer, entity)
+                    score += KILL_SCORES[layer]
+        self.score += score
+        projectiles.sweep()
+        missiles.sweep()
+        self.profiler.lap("collide: resolve")
+
+    def mark_despawn(self, layer, entity):
+        """Mark an entity, or the slot of a stored one, for despawn()"""
+        if layer in STORED_LAYERS:
+            getattr(self, layer).kill(entity)
+        else:
+            self.despawning.add(id(entity))
+
+    def despawn(self):
+        """Take every entity marked this update out of its list, compacting
+        each list in place in one pass that keeps the order of the rest, and
+        hand them back to their pools. Stores are swept the same way."""
+        despawning = self.despawning
+        for archetype in ARCHETYPES:
+            layer = archetype.layer
+            entities = getattr(self, layer)
+            if archetype.stored:
+                self.forget_stored(layer, entities.sweep())
+                continue
+            if not despawning:
+                continue
+            kept = 0
+            gone = []
+            for entity in entities:
+                if id(entity) in despawning:
+                    gone.append(entity)
+                else:
+                    entities[kept] = entity
+                    kept += 1
+            if gone:
+                del entities[kept:]
+                self.release(layer, gone)
+        despawning.clear()
+
+    def audit_despawns(self):
+        """Note when each entity that should eventually be culled was first
+        seen; release() forgets it again, and a store's entries are forgotten
+        once they are no longer live"""
+        first_seen = self.first_seen
+        current_time = self.clock.get_ticks()
+        for archetype in ARCHETYPES:
+            if archetype.cull_margin is None or archetype.stored:
+                continue  # Stays until collected or the level ends, or below
+            layer = archetype.layer
+            for entity in getattr(self, layer):
+                if id(entity) not in first_seen:
+                    first_seen[id(entity)] = (layer, current_time)
+        stores = self.first_seen_in_stores
+        for layer, seen in stores.items():
+            stores[layer] = {
+                store_id: seen.get(store_id, current_time)
+                for store_id in getattr(self, layer).live_ids()
+            }
+        self.last_audit = current_time
+        self.profiler.count("stale entities", len(self.stale_entities()))
+
+    def stale_entities(self, max_age=None):
+        """(layer, age in ms) of every entity that had outstayed max_age,
+        STALE_AFTER by default, as of the last update that ran; needs a Game
+        made with check_despawns"""
+        max_age = max_age or STALE_AFTER
+        now = self.last_audit
+        stale = [
+            (layer, now - seen)
+            for layer, seen in self.first_seen.values()
+            if now - seen > max_age
+        ]
+        for layer, seen in self.first_seen_in_stores.items():
+            stale += [
+                (layer, now - time) for time in seen.values() if now - time > max_age
+            ]
+        return stale
+
+    def add_damage(self, source, damage):
+        self.damage_taken[source] = self.damage_taken.get(source, 0) + damage
 
     def draw_background(self):
         self.current_level.draw_background(self.screen)
 
-    def draw_ui(self):
-        score_text = self.font.render(f"Score: {self.score}", True, BLACK)
-        self.screen.blit(score_text, (10, 10))
-
-        level_text = self.font.render(f"Level: {self.level_number}", True, BLACK)
-        self.screen.blit(level_text, (10, 80))
-
-        # Draw health bar
-        hp_bar_width = 200
-        hp_bar_height = 20
-        hp_bar_x = 10
-        hp_bar_y = 50
-
-        # Background (red)
-        pygame.draw.rect(
-            self.screen, RED, (hp_bar_x, hp_bar_y, hp_bar_width, hp_bar_height)
-        )
-
-        # Health (green)
-        health_width = int((self.player.hp / self.player.max_hp) * hp_bar_width)
-        pygame.draw.rect(
-            self.screen, GREEN, (hp_bar_x, hp_bar_y, health_width, hp_bar_height)
-        )
-
-        # Border
-        pygame.draw.rect(
-            self.screen, BLACK, (hp_bar_x, hp_bar_y, hp_bar_width, hp_bar_height), 2
-        )
-
-        # HP text
-        hp_text = pygame.font.Font(None, 24).render(
-            f"HP: {self.player.hp}/{self.player.max_hp}", True, BLACK
-        )
-        self.screen.blit(hp_text, (hp_bar_x + hp_bar_width + 10, hp_bar_y))
+    def entity_counts(self):
+        counts = {"projectiles": len(self.projectiles)}
+        for layer in HAZARD_LAYERS + ("powerups",):
+            counts[layer] = len(getattr(self, layer))
+        # Pool sizing: a miss is an entity that had to be allocated
+        pools = self.pools.values()
+        counts["pool high water"] = sum(pool.high_water for pool in pools)
+        counts["pool misses"] = sum(pool.misses for pool in pools)
+        return counts
+
+    def powerup_timers(self):
+        """Returns (label, color, remaining_ms, duration, y) for each active power-up"""
+        player = self.player
+        current_time = self.clock.get_ticks()
+        timers = []
 
         # Shotgun power-up indicator
-        if self.player.has_shotgun:
-            remaining_time = self.player.shotgun_duration - (
-                pygame.time.get_ticks() - self.player.shotgun_timer
+        if player.has_shotgun:
+            remaining_time = player.shotgun_duration - (
+                current_time - player.shotgun_timer
             )
-            remaining_seconds = max(0, remaining_time // 1000)
-
-            shotgun_text = pygame.font.Font(None, 28).render(
-                f"SHOTGUN: {remaining_seconds}s", True, CYAN
-            )
-            self.screen.blit(shotgun_text, (10, 110))
-
-            # Shotgun timer bar
-            timer_bar_width = 150
-            timer_bar_height = 10
-            timer_bar_x = 10
-            timer_bar_y = 135
-
-            # Background
-            pygame.draw.rect(
-                self.screen,
-                DARK_GRAY,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-            )
-
-            # Timer
-            timer_width = int(
-                (remaining_time / self.player.shotgun_duration) * timer_bar_width
-            )
-            pygame.draw.rect(
-                self.screen,
-                CYAN,
-                (timer_bar_x, timer_bar_y, timer_width, timer_bar_height),
-            )
-
-            # Border
-            pygame.draw.rect(
-                self.screen,
-                BLACK,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-                2,
+            timers.append(
+                ("SHOTGUN", CYAN, remaining_time, player.shotgun_duration, 110)
             )
 
         # Machine gun power-up indicator
-        if self.player.has_machine_gun:
-            remaining_time = self.player.machine_gun_duration - (
-                pygame.time.get_ticks() - self.player.machine_gun_timer
-            )
-            remaining_seconds = max(0, remaining_time // 1000)
-
+        if player.has_machine_gun:
             # Adjust position if shotgun is also active
-            ui_y_offset = 160 if self.player.has_shotgun else 110
-
-            machine_gun_text = pygame.font.Font(None, 28).render(
-                f"MACHINE GUN: {remaining_seconds}s", True, RED
+            ui_y_offset = 160 if player.has_shotgun else 110
+            remaining_time = player.machine_gun_duration - (
+                current_time - player.machine_gun_timer
             )
-            self.screen.blit(machine_gun_text, (10, ui_y_offset))
-
-            # Machine gun timer bar
-            timer_bar_width = 150
-            timer_bar_height = 10
-            timer_bar_x = 10
-            timer_bar_y = ui_y_offset + 25
-
-            # Background
-            pygame.draw.rect(
-                self.screen,
-                DARK_GRAY,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-            )
-
-            # Timer
-            timer_width = int(
-                (remaining_time / self.player.machine_gun_duration) * timer_bar_width
-            )
-            pygame.draw.rect(
-                self.screen,
-                RED,
-                (timer_bar_x, timer_bar_y, timer_width, timer_bar_height),
-            )
-
-            # Border
-            pygame.draw.rect(
-                self.screen,
-                BLACK,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-                2,
+            timers.append(
+                (
+                    "MACHINE GUN",
+                    RED,
+                    remaining_time,
+                    player.machine_gun_duration,
+                    ui_y_offset,
+                )
             )
 
         # Penetrator gun power-up indicator
-        if self.player.has_penetrator:
-            remaining_time = self.player.penetrator_duration - (
-                pygame.time.get_ticks() - self.player.penetrator_timer
-            )
-            remaining_seconds = max(0, remaining_time // 1000)
-
+        if player.has_penetrator:
             # Adjust position if shotgun is also active
-            ui_y_offset = 160 if self.player.has_penetrator else 110
-
-            penetrator_text = pygame.font.Font(None, 28).render(
-                f"Penetrator: {remaining_seconds}s", True, PURPLE
-            )
-            self.screen.blit(penetrator_text, (10, ui_y_offset))
-
-            # Machine gun timer bar
-            timer_bar_width = 150
-            timer_bar_height = 10
-            timer_bar_x = 10
-            timer_bar_y = ui_y_offset + 25
-
-            # Background
-            pygame.draw.rect(
-                self.screen,
-                DARK_GRAY,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
+            ui_y_offset = 160 if player.has_penetrator else 110
+            remaining_time = player.penetrator_duration - (
+                current_time - player.penetrator_timer
             )
-
-            # Timer
-            timer_width = int(
-                (remaining_time / self.player.penetrator_duration) * timer_bar_width
-            )
-            pygame.draw.rect(
-                self.screen,
-                PURPLE,
-                (timer_bar_x, timer_bar_y, timer_width, timer_bar_height),
-            )
-
-            # Border
-            pygame.draw.rect(
-                self.screen,
-                BLACK,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-                2,
+            timers.append(
+                (
+                    "Penetrator",
+                    PURPLE,
+                    remaining_time,
+                    player.penetrator_duration,
+                    ui_y_offset,
+                )
             )
 
         # Rain power-up indicator
-        if self.player.has_rain:
-            remaining_time = self.player.rain_duration - (
-                pygame.time.get_ticks() - self.player.rain_timer
-            )
-            remaining_seconds = max(0, remaining_time // 1000)
-
+        if player.has_rain:
             # Calculate position based on active power-ups
             ui_y_offset = 110
-            if self.player.has_shotgun:
+            if player.has_shotgun:
                 ui_y_offset += 50
-            if self.player.has_machine_gun:
+            if player.has_machine_gun:
                 ui_y_offset += 50
-            if self.player.has_penetrator:
+            if player.has_penetrator:
                 ui_y_offset += 50
-
-            rain_text = pygame.font.Font(None, 28).render(
-                f"RAIN: {remaining_seconds}s", True, CYAN
-            )
-            self.screen.blit(rain_text, (10, ui_y_offset))
-
-            # Rain timer bar
-            timer_bar_width = 150
-            timer_bar_height = 10
-            timer_bar_x = 10
-            timer_bar_y = ui_y_offset + 25
-
-            # Background
-            pygame.draw.rect(
-                self.screen,
-                DARK_GRAY,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
+            remaining_time = player.rain_duration - (current_time - player.rain_timer)
+            timers.append(
+                ("RAIN", CYAN, remaining_time, player.rain_duration, ui_y_offset)
             )
 
-            # Timer
-            timer_width = int(
-                (remaining_time / self.player.rain_duration) * timer_bar_width
+        return timers
+
+    def ui_sprites(self):
+        """Returns (group, identity, blit) for everything drawn over the game:
+        the HUD, any transition or game over screen and the controls"""
+        hud = self.hud
+        player = self.player
+        sprites = [
+            ("hud", key, blit)
+            for key, blit in hud.sprites(
+                self.score,
+                self.level_number,
+                player.hp,
+                player.max_hp,
+                self.powerup_timers(),
             )
-            pygame.draw.rect(
-                self.screen,
-                CYAN,
-                (timer_bar_x, timer_bar_y, timer_width, timer_bar_height),
-            )
-
-            # Border
-            pygame.draw.rect(
-                self.screen,
-                BLACK,
-                (timer_bar_x, timer_bar_y, timer_bar_width, timer_bar_height),
-                2,
-            )
-
-        # Level transition screen
+        ]
         if self.level_transition:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(180)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
-
-            transition_data = self.current_level.get_level_transition_text()
-
-            level_up_text = pygame.font.Font(None, 72).render(
-                transition_data["title"], True, YELLOW
-            )
-            text_rect = level_up_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 120)
-            )
-            self.screen.blit(level_up_text, text_rect)
-
-            y_offset = -70
-            for warning in transition_data["warnings"]:
-                if "LEVEL!" in warning or "FINAL" in warning or "ULTIMATE" in warning:
-                    font_size = 48
-                    color = RED
-                elif "SKY LEVEL!" in warning:
-                    font_size = 48
-                    color = CYAN
-                elif "NO FLOOR" in warning:
-                    font_size = 32
-                    color = RED
-                else:
-                    font_size = 28
-                    color = (
-                        ORANGE if "hits" in warning or "MISSILES" in warning else WHITE
-                    )
-
-                warning_text = pygame.font.Font(None, font_size).render(
-                    warning, True, color
-                )
-                warning_rect = warning_text.get_rect(
-                    center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + y_offset)
-                )
-                self.screen.blit(warning_text, warning_rect)
-                y_offset += 30
-
-            for info in transition_data["info"]:
-                info_text = pygame.font.Font(None, 32).render(info, True, CYAN)
-                info_rect = info_text.get_rect(
-                    center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + y_offset)
-                )
-                self.screen.blit(info_text, info_rect)
-                y_offset += 30
-
-            if False:  # Old hardcoded transition text (keeping as reference)
-                pass
-
-            health_text = pygame.font.Font(None, 36).render(
-                "Health restored!", True, GREEN
-            )
-            health_rect = health_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70)
-            )
-            self.screen.blit(health_text, health_rect)
-
-        # Game over screen
+            transition = self.current_level.get_level_transition_text()
+            sprites += [
+                ("overlay", key, blit)
+                for key, blit in hud.transition_sprites(transition)
+            ]
         if self.game_over:
-            overlay = pygame.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
-            overlay.set_alpha(128)
-            overlay.fill(BLACK)
-            self.screen.blit(overlay, (0, 0))
-
-            game_over_text = pygame.font.Font(None, 72).render("GAME OVER", True, RED)
-            text_rect = game_over_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 - 50)
-            )
-            self.screen.blit(game_over_text, text_rect)
+            sprites += [
+                ("overlay", key, blit)
+                for key, blit in hud.game_over_sprites(self.score, self.level_number)
+            ]
+        sprites += [
+            ("instructions", key, blit) for key, blit in hud.instruction_sprites()
+        ]
+        return sprites
 
-            final_score_text = self.font.render(
-                f"Final Score: {self.score}", True, WHITE
-            )
-            score_rect = final_score_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2)
-            )
-            self.screen.blit(final_score_text, score_rect)
-
-            level_reached_text = self.font.render(
-                f"Level Reached: {self.level_number}", True, WHITE
-            )
-            level_rect = level_reached_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 30)
+    def draw_ui(self):
+        self.screen.blits([blit for _, _, blit in self.ui_sprites()], doreturn=False)
+
+    def entity_sprites(self, alpha=1.0):
+        """Returns (group, identity, (surface, position)) for everything between
+        the background and the UI, back to front, `alpha` of the way between
+        the last two simulation steps"""
+        if self.current_level is not self.previous_level:
+            # Everything was moved or replaced by the level change
+            alpha = 1.0
+        sprites = [
+            ("platforms", id(platform), platform.sprite())
+            for platform in self.current_level.platforms
+        ]
+        sprites += [
+            (
+                "powerups",
+                id(powerup),
+                self.interpolate(powerup, powerup.sprite(), alpha),
             )
-            self.screen.blit(level_reached_text, level_rect)
-
-            restart_text = pygame.font.Font(None, 36).render(
-                "Press R to Restart", True, WHITE
+            for powerup in self.powerups
+            if not powerup.collected
+        ]
+        sprites.append(
+            (
+                "player",
+                id(self.player),
+                self.interpolate(self.player, self.player.sprite(), alpha),
             )
-            restart_rect = restart_text.get_rect(
-                center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2 + 70)
+        )
+        sprites += [
+            ("projectiles", projectile_id, sprite)
+            for projectile_id, sprite in zip(
+                self.projectiles.live_ids(), self.projectiles.sprites(alpha)
             )
-            self.screen.blit(restart_text, restart_rect)
-
-        # Instructions
-        instructions = ["Arrow Keys: Move & Jump", "Down: Crouch", "Space: Shoot"]
-        for i, instruction in enumerate(instructions):
-            text = pygame.font.Font(None, 24).render(instruction, True, BLACK)
-            self.screen.blit(text, (10, SCREEN_HEIGHT - 80 + i * 25))
+        ]
+        missiles = self.homing_missiles
+        for group in INTERPOLATED_GROUPS[1:]:
+            if group in STORED_LAYERS:
+                store = getattr(self, group)
+                sprites += [
+                    (group, store_id, sprite)
+                    for store_id, sprite in zip(store.live_ids(), store.sprites(alpha))
+                ]
+                continue
+            if group == "bombs":
+                # Missiles go over the bosses that fire them, under the bombs
+                sprites += [
+                    ("homing_missiles", missile_id, sprite)
+                    for missile_id, sprite in zip(
+                        missiles.live_ids(), missiles.sprites(alpha)
+                    )
+                ]
+            sprites += [
+                (group, id(entity), self.interpolate(entity, entity.sprite(), alpha))
+                for entity in getattr(self, group)
+            ]
+        return sprites
+
+    def draw(self, alpha=1.0):
+        profiler = self.profiler
+        profiler.mark()
+        if self.dirty_renderer is not None:
+            self.dirty_renderer.draw(self, alpha)
+            profiler.lap("draw: dirty")
+            return
 
-    def draw(self):
         self.draw_background()
+        profiler.lap("draw: background")
 
-        # Draw platforms
-        for platform in self.current_level.platforms:
-            platform.draw(self.screen)
-
-        # Draw power-ups
-        for powerup in self.powerups:
-            powerup.draw(self.screen)
-
-        # Draw game objects
-        self.player.draw(self.screen)
-
-        for bullet in self.bullets:
-            bullet.draw(self.screen)
-
-        for rain_bullet in self.rain_bullets:
-            rain_bullet.draw(self.screen)
-
-        for enemy in self.enemies:
-            enemy.draw(self.screen)
-
-        for flying_enemy in self.flying_enemies:
-            flying_enemy.draw(self.screen)
-
-        for boss_enemy in self.boss_enemies:
-            boss_enemy.draw(self.screen)
-
-        for jumping_boss in self.jumping_bosses:
-            jumping_boss.draw(self.screen)
-
-        for missile in self.homing_missiles:
-            missile.draw(self.screen)
-
-        for bomb in self.bombs:
-            bomb.draw(self.screen)
+        # Every platform, power-up and game object is a single atlas blit
+        self.screen.blits(
+            [sprite for _, _, sprite in self.entity_sprites(alpha)], doreturn=False
+        )
+        profiler.lap("draw: entities")
 
         self.draw_ui()
-
-        pygame.display.flip()
-
-    def run(self):
+        profiler.draw(self.screen)
+        profiler.lap("draw: ui")
+
+        if not self.headless:
+            pygame.display.flip()
+            profiler.lap("draw: flip")
+
+    def run(self, max_fps=MAX_RENDER_FPS):
+        # Fixed timestep: wall time accumulates and is spent in FRAME_MS
+        # simulation steps, several per render frame when catching up after a
+        # stall, and each render frame interpolates between the last two steps
+        lag = 0
+        last_frame = time.perf_counter()
         while self.running:
+            self.profiler.begin_frame()
+            now = time.perf_counter()
+            lag = min(lag + (now - last_frame) * 1000, MAX_STEPS_PER_FRAME * FRAME_MS)
+            last_frame = now
+
             self.handle_events()
-            self.update()
-            self.draw()
-            self.clock.tick(FPS)
+            self.profiler.lap("events")
+            keys = pygame.key.get_pressed()
+            while lag >= FRAME_MS:
+                key_presses, self.key_presses = self.key_presses, []
+                self.step(keys, key_presses)
+                lag -= FRAME_MS
+            self.draw(lag / FRAME_MS)
+            self.profiler.end_frame(self.entity_counts)
+            self.fps_clock.tick(max_fps)
 
         pygame.quit()
 
+    def run_headless(self, seconds, keys=NO_KEYS):
+        """Simulate `seconds` of game time as fast as possible, without drawing"""
+        for _ in range(round(seconds * 1000 / FRAME_MS)):
+            self.step(keys)
+
+
+def summary(game):
+    text = (
+        f"score {game.score}, level {game.level_number}, hp {game.player.hp}, "
+        f"seed {game.random.seed}"
+    )
+    if game.first_seen is not None:
+        stale = game.stale_entities()
+        text += f", {len(stale)} stale entities"
+        for layer, age in stale:
+            text += f"\n  {layer} alive for {age / 1000:.0f}s"
+    return text
+
 
 if __name__ == "__main__":
-    game = Game()
-    game.run()
+    parser = argparse.ArgumentParser(description="Forward Blaster")
+    parser.add_argument(
+        "--render-mode",
+        choices=["full", "dirty"],
+        default="full",
+        help="full: redraw and flip every frame; dirty: update changed rects only",
+    )
+    parser.add_argument(
+        "--headless",
+        type=float,
+        metavar="SECONDS",
+        help="simulate this many game seconds without a window, then print the result",
+    )
+    parser.add_argument("--seed", type=int, help="seed for every random stream")
+    parser.add_argument(
+        "--record",
+        metavar="PATH",
+        help="log every step's input to a replay file, saved on exit or crash",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="PATH",
+        help="re-run a replay file as fast as possible, then print the result",
+    )
+    parser.add_argument(
+        "--render", action="store_true", help="draw every step of a --replay"
+    )
+    parser.add_argument(
+        "--check-despawns",
+        action="store_true",
+        help="report entities that outlive the screen without being removed",
+    )
+    args = parser.parse_args()
+
+    if args.replay:
+        replay = Replay.load(args.replay)
+        game = Game(
+            headless=not args.render,
+            seed=replay.seed,
+            check_despawns=args.check_despawns,
+        )
+        started = time.perf_counter()
+        replay.play(game, draw=args.render)
+        elapsed = time.perf_counter() - started
+        print(f"Replayed {replay.steps} steps in {elapsed:.2f}s: {summary(game)}")
+        sys.exit()
+
+    if args.headless is not None:
+        game = Game(headless=True, seed=args.seed, check_despawns=args.check_despawns)
+    else:
+        game = Game(
+            render_mode=args.render_mode,
+            seed=args.seed,
+            check_despawns=args.check_despawns,
+        )
+    if args.record:
+        game.recorder = Recorder(game.random.seed)
+
+    try:
+        if args.headless is not None:
+            started = time.perf_counter()
+            game.run_headless(args.headless)
+            elapsed = time.perf_counter() - started
+            print(f"Simulated {args.headless:g}s in {elapsed:.2f}s: {summary(game)}")
+        else:
+            game.run()
+    finally:
+        # Saved even when the game crashes, as a repro of how it got there
+        if args.record:
+            game.recorder.save(args.record)
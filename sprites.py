@@ -0,0 +1,64 @@
+import pygame
+
+# Painters draw an entity with its top-left corner at this point of a scratch
+# surface, leaving room for art that pokes out of the hitbox (wings, health
+# bars, glows)
+SCRATCH_SIZE = 256
+SCRATCH_ORIGIN = 64
+
+
+class SpriteAtlas:
+    """Pre-rendered surfaces for every visual state of every entity type.
+
+    Sprite keys are tuples whose first item names a registered painter and
+    whose remaining items are passed to it. Each sprite is stored with the
+    offset from the entity position to the sprite's top-left corner.
+    """
+
+    def __init__(self):
+        self.painters = {}
+        self.states = {}
+        self.sprites = {}
+        self.display = None  # Display surface the sprites were converted for
+
+    def register(self, name, painter, states=((),)):
+        """Add a painter(surface, x, y, *state) and the states to pre-render"""
+        self.painters[name] = painter
+        self.states[name] = [tuple(state) for state in states]
+
+    def prewarm(self):
+        """Render every registered state; call once the display exists.
+        Sprites already rendered for the current display are kept"""
+        display = pygame.display.get_surface()
+        if display is not self.display:
+            self.sprites.clear()
+            self.display = display
+        for name, states in self.states.items():
+            for state in states:
+                self.get((name,) + state)
+
+    def get(self, key):
+        sprite = self.sprites.get(key)
+        if sprite is None:
+            # States nobody registered up front are rendered on first use
+            sprite = self._render(key)
+            self.sprites[key] = sprite
+        return sprite
+
+    def place(self, key, x, y):
+        """Returns (surface, position) ready for Surface.blit or Surface.blits"""
+        image, (dx, dy) = self.get(key)
+        return image, (int(x) + dx, int(y) + dy)
+
+    def _render(self, key):
+        scratch = pygame.Surface((SCRATCH_SIZE, SCRATCH_SIZE), pygame.SRCALPHA)
+        self.painters[key[0]](scratch, SCRATCH_ORIGIN, SCRATCH_ORIGIN, *key[1:])
+
+        bounds = scratch.get_bounding_rect()
+        image = scratch.subsurface(bounds).copy()
+        if pygame.display.get_surface() is not None:
+            image = image.convert_alpha()
+        return image, (bounds.x - SCRATCH_ORIGIN, bounds.y - SCRATCH_ORIGIN)
+
+
+atlas = SpriteAtlas()
@@ -0,0 +1,39 @@
+import os
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pygame
+
+from monsters import BossEnemy, Enemy, FlyingEnemy, JumpingBoss
+from scroller import Game
+
+
+def overlapping_scene(game):
+    """Yields after each of two frames' worth of changes: a flying enemy and
+    a jumping boss, then a boss and a ground enemy added on top of them. The
+    later ones are created last but are drawn under the jumping boss"""
+    x, y = 400, 300
+    game.jumping_bosses.append(JumpingBoss(x, y, game.clock, timers=game.timers))
+    game.flying_enemies.append(FlyingEnemy(x + 20, y + 10))
+    yield
+    game.boss_enemies.append(BossEnemy(x - 10, y, game.clock, timers=game.timers))
+    game.enemies.append(Enemy.at(x + 10, y + 20))
+    yield
+
+
+def frames(game):
+    for _ in overlapping_scene(game):
+        game.draw()
+        yield pygame.image.tostring(game.screen, "RGB")
+
+
+def test_dirty_frames_match_full_frames_where_enemy_types_overlap():
+    pygame.init()
+    try:
+        dirty = list(frames(Game(render_mode="dirty", seed=1)))
+        full = list(frames(Game(render_mode="full", headless=True, seed=1)))
+    finally:
+        pygame.quit()
+    assert len(dirty) == len(full) == 2
+    for dirty_frame, full_frame in zip(dirty, full):
+        assert dirty_frame == full_frame
@@ -0,0 +1,230 @@
+import numpy as np
+import pygame
+
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+from replay import KeyState
+from scroller import Game, HAZARD_LAYERS
+
+# Columns of an action row; each is 0 or 1
+BUTTONS = ("left", "right", "jump", "crouch", "shoot")
+HELD_BUTTON_KEYS = (pygame.K_LEFT, pygame.K_RIGHT, pygame.K_UP, pygame.K_DOWN)
+
+# The held keys for every combination of the first four buttons, by bitmask
+KEY_STATES = [
+    KeyState(key for bit, key in enumerate(HELD_BUTTON_KEYS) if mask >> bit & 1)
+    for mask in range(1 << len(HELD_BUTTON_KEYS))
+]
+SHOOT = (pygame.K_SPACE,)
+
+# Columns of the "player" observation
+PLAYER_FEATURES = (
+    "x",
+    "y",
+    "vel_x",
+    "vel_y",
+    "hp",
+    "on_ground",
+    "crouching",
+    "invulnerable",
+    "shotgun",
+    "machine_gun",
+    "penetrator",
+    "rain",
+    "level",
+)
+
+# Columns of each "hazards" row: whether the slot is filled, the hazard's
+# offset from the player's centre and size, then a one-hot of its kind
+HAZARD_FEATURES = ("present", "dx", "dy", "width", "height") + HAZARD_LAYERS
+
+MAX_HAZARDS = 16
+
+# Steps after which an episode is cut short, five minutes of game time
+MAX_EPISODE_STEPS = 5 * 60 * 60
+
+
+class VectorEnv:
+    """N independent headless games stepped in lockstep, Gym style.
+
+    Actions are an (N, len(BUTTONS)) array of 0/1 buttons. Observations are
+    a dict of fixed-size float32 arrays: "player" is (N, len(PLAYER_FEATURES))
+    and "hazards" is (N, max_hazards, len(HAZARD_FEATURES)), holding the
+    hazards nearest the player, nearest first, zero padded. Positions and
+    sizes are in screen widths/heights.
+
+    The reward is score_weight per point scored plus hp_weight per hit point
+    gained (negative when hit). A game that ends is reset straight away with
+    the next seed of its own sequence, and step() reports it as terminated
+    (the player died) or truncated (it ran for max_steps). As in Gymnasium's
+    vector API, the observation it ended on is in info["final_observation"],
+    with info["_final_observation"] marking the games it holds.
+    """
+
+    def __init__(
+        self,
+        num_envs=64,
+        seed=None,
+        start_level=1,
+        max_hazards=MAX_HAZARDS,
+        frame_skip=1,
+        max_steps=MAX_EPISODE_STEPS,
+        score_weight=0.1,
+        hp_weight=0.1,
+    ):
+        self.num_envs = num_envs
+        self.start_level = start_level
+        self.max_hazards = max_hazards
+        self.frame_skip = frame_skip
+        self.max_steps = max_steps
+        self.score_weight = score_weight
+        self.hp_weight = hp_weight
+
+        self.games = [Game(headless=True) for _ in range(num_envs)]
+        self.seeds = None
+        self.steps = np.zeros(num_envs, dtype=np.int64)
+        self.scores = np.zeros(num_envs)
+        self.hps = np.zeros(num_envs)
+        self.player = np.zeros((num_envs, len(PLAYER_FEATURES)), dtype=np.float32)
+        self.hazards = np.zeros(
+            (num_envs, max_hazards, len(HAZARD_FEATURES)), dtype=np.float32
+        )
+        self.reset(seed)
+
+    def reset(self, seed=None):
+        """Start a new episode in every game and return the observations"""
+        # Each game draws its episode seeds from its own sequence
+        self.seeds = [
+            np.random.default_rng(sequence)
+            for sequence in np.random.SeedSequence(seed).spawn(self.num_envs)
+        ]
+        for i in range(self.num_envs):
+            self._reset_game(i)
+        return self.observe()
+
+    def _reset_game(self, i):
+        game = self.games[i]
+        seed = int(self.seeds[i].integers(2**32))
+        game.reset(seed, self.start_level)
+        self.steps[i] = 0
+        self.scores[i] = game.score
+        self.hps[i] = game.player.hp
+
+    def step(self, actions):
+        """Advance every game by frame_skip steps with its row of actions.
+
+        Returns (observations, rewards, terminated, truncated, info). The
+        observations of a game that ended are of the game that replaced it;
+        info["final_observation"] has the same layout and holds the last
+        observation of each game that ended, zeros for the others.
+        """
+        actions = np.asarray(actions)
+        masks = (actions[:, :4] != 0) @ (1, 2, 4, 8)
+        shooting = actions[:, 4] != 0
+        rewards = np.zeros(self.num_envs)
+        terminated = np.zeros(self.num_envs, dtype=bool)
+        truncated = np.zeros(self.num_envs, dtype=bool)
+        final_scores = np.full(self.num_envs, np.nan)
+        final_player = np.zeros_like(self.player)
+        final_hazards = np.zeros_like(self.hazards)
+        levels = np.zeros(self.num_envs, dtype=np.int64)
+
+        for i, (game, mask, shoot) in enumerate(
+            zip(self.games, masks.tolist(), shooting.tolist())
+        ):
+            keys = KEY_STATES[mask]
+            key_presses = SHOOT if shoot else ()
+            for _ in range(self.frame_skip):
+                game.step(keys, key_presses)
+                if game.game_over:
+                    break
+            self.steps[i] += 1
+
+            score = game.score
+            hp = max(game.player.hp, 0)
+            rewards[i] = (score - self.scores[i]) * self.score_weight + (
+                hp - self.hps[i]
+            ) * self.hp_weight
+            self.scores[i] = score
+            self.hps[i] = hp
+            levels[i] = game.level_number
+
+            if game.game_over or self.steps[i] >= self.max_steps:
+                terminated[i] = game.game_over
+                truncated[i] = not game.game_over
+                final_scores[i] = score
+                # Bootstrapping needs what the episode ended on, which the
+                # reset is about to replace
+                self._observe(i)
+                final_player[i] = self.player[i]
+                final_hazards[i] = self.hazards[i]
+                self._reset_game(i)
+
+        info = {
+            "level": levels,
+            "final_score": final_scores,
+            "final_observation": {"player": final_player, "hazards": final_hazards},
+            "_final_observation": terminated | truncated,
+        }
+        return self.observe(), rewards, terminated, truncated, info
+
+    def observe(self):
+        for i in range(self.num_envs):
+            self._observe(i)
+        return {"player": self.player.copy(), "hazards": self.hazards.copy()}
+
+    def _observe(self, i):
+        """Fill game i's rows of the observation arrays"""
+        game = self.games[i]
+        hazards = self.hazards[i]
+        hazards.fill(0)
+        kinds = len(HAZARD_FEATURES) - len(HAZARD_LAYERS)
+        p = game.player
+        self.player[i] = (
+            p.x / SCREEN_WIDTH,
+            p.y / SCREEN_HEIGHT,
+            p.vel_x,
+            p.vel_y,
+            p.hp / p.max_hp,
+            p.on_ground,
+            p.crouching,
+            p.invulnerable,
+            p.has_shotgun,
+            p.has_machine_gun,
+            p.has_penetrator,
+            p.has_rain,
+            game.level_number,
+        )
+
+        # Offsets of every hazard from the player's centre, nearest kept
+        center_x = p.x + p.width / 2
+        center_y = p.y + p.height / 2
+        nearby = [
+            (
+                (h.x - center_x) ** 2 + (h.y - center_y) ** 2,
+                h.x - center_x,
+                h.y - center_y,
+                h.width,
+                h.height,
+                kind,
+            )
+            for kind, layer in enumerate(HAZARD_LAYERS)
+            for h in getattr(game, layer)
+        ]
+        nearby.sort(key=lambda hazard: hazard[0])
+        del nearby[self.max_hazards :]
+        for slot, (_, dx, dy, width, height, kind) in enumerate(nearby):
+            row = hazards[slot]
+            row[:5] = (
+                1,
+                dx / SCREEN_WIDTH,
+                dy / SCREEN_HEIGHT,
+                width / SCREEN_WIDTH,
+                height / SCREEN_HEIGHT,
+            )
+            row[kinds + kind] = 1
+
+    def render(self, index=0):
+        """Draw one game and return its screen as an (H, W, 3) uint8 array"""
+        game = self.games[index]
+        game.draw()
+        return pygame.surfarray.array3d(game.screen).swapaxes(0, 1)
@@ -0,0 +1,19 @@
+from constants import SCREEN_WIDTH, SCREEN_HEIGHT
+
+# Game objects are gone for good once they lie entirely outside the screen
+# grown by their cull margin on every side. Things that start or wander off
+# screen (bombs dropped by bosses still coming on, homing missiles turning round) get
+# this margin; everything else none. The player's bullets keep their own
+# rule, in projectiles.py.
+CULL_MARGIN = 50
+
+
+def outside(x, y, width, height, margin=0):
+    """Whether a box lies entirely outside the screen grown by `margin`.
+    Works on NumPy arrays of boxes too."""
+    return (
+        (x + width < -margin)
+        | (x > SCREEN_WIDTH + margin)
+        | (y + height < -margin)
+        | (y > SCREEN_HEIGHT + margin)
+    )